@@ -2,6 +2,7 @@ from stratified_bayesian_optimization.util.json_file import JSONFile
 from os import path
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.initializers.log import SBOLog
+from problems.arxiv.category_index import CategoryIndex
 import ujson
 
 logger = SBOLog(__name__)
@@ -79,6 +80,9 @@ class Categories(object):
 
         """
 
+        if CategoryIndex.has_index():
+            return CategoryIndex.get_category(arxiv_id)
+
         filename = path.join(cls._papers_path, '20' + year)
         date = year + month
 
@@ -0,0 +1,117 @@
+import os
+from os import path
+
+import ujson
+
+from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.initializers.log import SBOLog
+
+logger = SBOLog(__name__)
+
+
+class CategoryIndex(object):
+    """
+    Index arxiv_id => category built in one pass over the *_idcat.json files, so that the
+    category of a paper is found with a dictionary look-up instead of parsing up to 40 daily
+    files per paper.
+    """
+
+    _papers_path = '/data/json/idcat/'
+    _index_path = 'problems/arxiv/data/idcat_index.json'
+
+    # Index loaded in memory, it's read at most once per process.
+    _index = {}
+
+    @classmethod
+    def build_index(cls, papers_path=None, index_path=None):
+        """
+        Scans all the *_idcat.json files once, and writes a JSON file with the format:
+
+        {
+            'arxiv_id': category (str)
+        }
+
+        Files are processed in chronological order, and the first category found for each paper
+        is kept (as in get_cats).
+
+        :param papers_path: (str) directory with one sub-directory per year
+        :param index_path: (str)
+        :return: {str: str}
+        """
+        if papers_path is None:
+            papers_path = cls._papers_path
+
+        if index_path is None:
+            index_path = cls._index_path
+
+        filenames = []
+        for (dirpath, dirnames, files) in os.walk(papers_path):
+            filenames += [path.join(dirpath, f) for f in files if f.endswith('_idcat.json')]
+
+        # The name of the file is yymmdd_idcat.json
+        filenames.sort(key=lambda x: path.basename(x))
+
+        index = {}
+        for filename in filenames:
+            with open(filename) as f:
+                data = ujson.load(f)
+
+            for dicts in data.get('new', []):
+                arxiv_id = dicts['id']
+                if arxiv_id not in index:
+                    index[arxiv_id] = dicts["cat"].split(":")[0].lower()
+
+        logger.info("Indexed %d papers from %d files" % (len(index), len(filenames)))
+
+        JSONFile.write(index, index_path)
+        cls._index[index_path] = index
+
+        return index
+
+    @classmethod
+    def load_index(cls, index_path=None):
+        """
+        Load the index, or return None if it hasn't been built.
+
+        :param index_path: (str)
+        :return: {str: str} or None
+        """
+        if index_path is None:
+            index_path = cls._index_path
+
+        if index_path not in cls._index:
+            index = JSONFile.read(index_path)
+            if index is None:
+                return None
+            cls._index[index_path] = index
+
+        return cls._index[index_path]
+
+    @classmethod
+    def has_index(cls, index_path=None):
+        """
+        :param index_path: (str)
+        :return: boolean
+        """
+        return cls.load_index(index_path) is not None
+
+    @classmethod
+    def get_category(cls, arxiv_id, index_path=None):
+        """
+        Get category of a paper from the index.
+
+        :param arxiv_id: (str) without version, e.g. '1601.00001'
+        :param index_path: (str)
+        :return: str or None
+        """
+        index = cls.load_index(index_path)
+
+        if index is None:
+            return None
+
+        cat = index.get(arxiv_id)
+
+        if cat is None:
+            logger.info("Couldn't find category of paper %s" % arxiv_id)
+
+        return cat
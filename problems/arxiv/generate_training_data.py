@@ -24,6 +24,10 @@ class TrainingData(object):
                                '.json'.format
     _name_fold_data_validation_matlab = 'problems/arxiv/data/{year}_{month}_fold_{fold}_' \
                                         'validation_data.mat'.format
+    _name_fold_data_training_npy = 'problems/arxiv/data/{year}_{month}_fold_{fold}_training_data' \
+                                   '.npy'.format
+    _name_fold_data_validation_npy = 'problems/arxiv/data/{year}_{month}_fold_{fold}_' \
+                                     'validation_data.npy'.format
     _name_fold_indexes = 'problems/arxiv/data/{year}_{month}_fold_indexes' \
                                '.json'.format
     _name_file_final_categ = 'problems/arxiv/data/{year}_{month}_top_users_top_' \
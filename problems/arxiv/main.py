@@ -4,6 +4,7 @@ import numpy as np
 from copy import deepcopy
 
 from problems.pmf.pmf import PMF
+from problems.pmf.fold_store import FoldStore
 from problems.arxiv.generate_training_data import TrainingData
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.lib.parallel import Parallel
@@ -31,20 +32,21 @@ num_batches = int((n_folds - 1) * (float(total_obs) / float(n_folds)) / 500.0)
 train=[]
 validate=[]
 
-file_name = TrainingData._name_fold_indexes(year=year, month=month)
-random_indexes = JSONFile.read(file_name)
-
 # file_name = TrainingData._name_training_data(year=year, month=month)
 # training_data = JSONFile.read(file_name)
 
+# The folds are stored as .npy files and opened with memory mapping, so the JSON files are
+# parsed only once and the workers of Parallel share the same data.
 for i in range(n_folds):
     file_name = TrainingData._name_fold_data_training(year=year, month=month, fold=i)
-    training = JSONFile.read(file_name)
-    train.append(np.array(training))
+    train.append(FoldStore.load_fold(
+        TrainingData._name_fold_data_training_npy(year=year, month=month, fold=i),
+        lambda file_name=file_name: JSONFile.read(file_name)))
 
     file_name = TrainingData._name_fold_data_validation(year=year, month=month, fold=i)
-    validation = JSONFile.read(file_name)
-    validate.append(np.array(validation))
+    validate.append(FoldStore.load_fold(
+        TrainingData._name_fold_data_validation_npy(year=year, month=month, fold=i),
+        lambda file_name=file_name: JSONFile.read(file_name)))
 
 def toy_example(x):
     """
@@ -4,17 +4,33 @@ import os
 from os import path
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.lib.parallel import Parallel
+from problems.arxiv.category_index import CategoryIndex
 import ujson
+import numpy as np
 
 logger = SBOLog(__name__)
 
 
+def wrapper_process_click_file(filename, self, chunks_path, flush_every):
+     """
+     Wrapper of ProcessRawData.process_click_file used to call it in parallel.
+
+     :param filename: str
+     :param self: ProcessRawData
+     :param chunks_path: str
+     :param flush_every: int
+     :return: [str]
+     """
+     return self.process_click_file(filename, chunks_path, flush_every)
+
 class ProcessRawData(object):
 
      _years = [2017, 2016, 2015, 2014, 2013, 2012]
      _data_path = '/data/json/usage/'
      _papers_path = '/data/json/idcat/'
      _store_path = 'problems/arxiv/data/click_data_{year}.json'.format
+     _chunks_path = 'problems/arxiv/data/click_chunks/'
 
      @classmethod
      def get_click_data(cls, filenames, store_filename):
@@ -85,6 +101,287 @@ class ProcessRawData(object):
 
           JSONFile.write([process_data, paper], store_filename)
 
+     @classmethod
+     def iterate_entries(cls, filename, chunk_size=2 ** 20):
+          """
+          Iterates over the entries of a usage file without loading the whole file in memory.
+          The file is read in chunks, and each entry of the list 'entries' is decoded as soon as
+          it's complete.
+
+          :param filename: str (gzip file)
+          :param chunk_size: int
+          :return: generator of dictionaries
+          """
+          decoder = json.JSONDecoder()
+
+          with gzip.open(filename, 'rb') as f:
+               buffer_ = ''
+               key_position = -1
+
+               while key_position < 0:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                         return
+                    buffer_ += chunk
+                    key_position = buffer_.find('"entries"')
+
+               position = buffer_.find('[', key_position)
+               while position < 0:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                         return
+                    buffer_ += chunk
+                    position = buffer_.find('[', key_position)
+
+               # The entries are decoded from an offset into the buffer, which is only sliced
+               # when the next chunk is read, so each chunk is copied a constant number of times.
+               position += 1
+               eof = False
+
+               while True:
+                    while position < len(buffer_) and buffer_[position] in ' \t\r\n,':
+                         position += 1
+
+                    if position < len(buffer_) and buffer_[position] == ']':
+                         return
+
+                    try:
+                         entry, position = decoder.raw_decode(buffer_, position)
+                    except ValueError:
+                         if eof:
+                              if buffer_[position:].strip():
+                                   raise
+                              return
+                         chunk = f.read(chunk_size)
+                         if not chunk:
+                              eof = True
+                         buffer_ = buffer_[position:] + chunk
+                         position = 0
+                         continue
+
+                    yield entry
+
+     @classmethod
+     def _flush_click_chunk(cls, users, papers, counts, chunk_filename):
+          """
+          Writes the aggregated clicks into a compact .npz file with the arrays:
+               users: [str], papers: [str], user_index: [int], paper_index: [int], counts: [int]
+
+          :param users: {str: int}
+          :param papers: {str: int}
+          :param counts: {(int, int): int}
+          :param chunk_filename: str
+          """
+          pairs = np.array(counts.keys(), dtype=np.int32).reshape((len(counts), 2))
+
+          users_ = [None] * len(users)
+          for user, index in users.iteritems():
+               users_[index] = user
+
+          papers_ = [None] * len(papers)
+          for paper, index in papers.iteritems():
+               papers_[index] = paper
+
+          with open(chunk_filename, 'wb') as f:
+               np.savez(f, users=np.array(users_), papers=np.array(papers_),
+                        user_index=pairs[:, 0], paper_index=pairs[:, 1],
+                        counts=np.array(counts.values(), dtype=np.int32))
+
+     @classmethod
+     def process_click_file(cls, filename, chunks_path, flush_every=1000000):
+          """
+          Streams one usage file and writes its clicks aggregated per (user, paper) into chunk
+          files of at most flush_every entries. A file whose chunks were already written is
+          skipped.
+
+          :param filename: str
+          :param chunks_path: str
+          :param flush_every: int
+          :return: [str] names of the chunk files
+          """
+          name = path.basename(filename).split('.')[0]
+          done_filename = path.join(chunks_path, name + '_done.json')
+
+          chunks = JSONFile.read(done_filename)
+          if chunks is not None:
+               return chunks
+
+          logger.info("Processing filename: %s" % filename)
+
+          chunks = []
+          users = {}
+          papers = {}
+          counts = {}
+          n_entries = 0
+
+          for entry in cls.iterate_entries(filename):
+               if 'arxiv_id' not in entry or 'cookie_hash' not in entry:
+                    continue
+
+               user = users.setdefault(entry['cookie_hash'], len(users))
+               paper = papers.setdefault(entry['arxiv_id'], len(papers))
+               counts[(user, paper)] = counts.get((user, paper), 0) + 1
+               n_entries += 1
+
+               if n_entries == flush_every:
+                    chunk_filename = path.join(chunks_path, '%s_%d.npz' % (name, len(chunks)))
+                    cls._flush_click_chunk(users, papers, counts, chunk_filename)
+                    chunks.append(chunk_filename)
+                    users = {}
+                    papers = {}
+                    counts = {}
+                    n_entries = 0
+
+          if n_entries > 0:
+               chunk_filename = path.join(chunks_path, '%s_%d.npz' % (name, len(chunks)))
+               cls._flush_click_chunk(users, papers, counts, chunk_filename)
+               chunks.append(chunk_filename)
+
+          JSONFile.write(chunks, done_filename)
+
+          return chunks
+
+     @classmethod
+     def merge_click_chunks(cls, chunks):
+          """
+          Merges chunk files into the format of get_click_data:
+
+          [{'cookie_hash': {'arxiv_id': clicks}}, {'arxiv_id': {'views': views}}]
+
+          The whole result is kept in memory, use write_click_chunks to write it into a file.
+
+          :param chunks: [str]
+          :return: [dict, dict]
+          """
+          process_data = {}
+          paper = {}
+
+          for chunk_filename in chunks:
+               chunk = np.load(chunk_filename)
+               users = chunk['users']
+               papers = chunk['papers']
+
+               for user_index, paper_index, count in zip(chunk['user_index'],
+                                                         chunk['paper_index'], chunk['counts']):
+                    user = users[user_index]
+                    arxiv_id = papers[paper_index]
+                    count = int(count)
+
+                    if user not in process_data:
+                         process_data[user] = {}
+                    process_data[user][arxiv_id] = process_data[user].get(arxiv_id, 0) + count
+
+                    if arxiv_id not in paper:
+                         paper[arxiv_id] = {'views': 0}
+                    paper[arxiv_id]['views'] += count
+
+          return [process_data, paper]
+
+     @classmethod
+     def write_click_chunks(cls, chunks, store_filename, n_shards=16):
+          """
+          Merges chunk files and writes the result into store_filename with the format of
+          get_click_data. The users are split into n_shards shards by their hash, and the chunks
+          are read once per shard, so only the clicks of one shard are kept in memory. Each user
+          is written as soon as its shard is merged.
+
+          :param chunks: [str]
+          :param store_filename: str
+          :param n_shards: int
+          """
+          paper = {}
+
+          tmp_filename = store_filename + '.tmp'
+          with open(tmp_filename, 'w') as f:
+               f.write('[{')
+               first = True
+
+               for shard in xrange(n_shards):
+                    logger.info("Merging shard %d of %d" % (shard + 1, n_shards))
+                    process_data = {}
+
+                    for chunk_filename in chunks:
+                         chunk = np.load(chunk_filename)
+                         users = chunk['users']
+                         papers = chunk['papers']
+                         user_index = chunk['user_index']
+                         paper_index = chunk['paper_index']
+                         counts = chunk['counts']
+
+                         if shard == 0:
+                              views = np.bincount(paper_index, weights=counts,
+                                                  minlength=len(papers))
+                              for arxiv_id, view in zip(papers, views):
+                                   if view == 0:
+                                        continue
+                                   if arxiv_id not in paper:
+                                        paper[arxiv_id] = {'views': 0}
+                                   paper[arxiv_id]['views'] += int(view)
+
+                         shards = np.array([hash(user) % n_shards for user in users],
+                                           dtype=np.int32)
+                         rows = np.where(shards[user_index] == shard)[0]
+
+                         for row in rows:
+                              user = users[user_index[row]]
+                              arxiv_id = papers[paper_index[row]]
+
+                              if user not in process_data:
+                                   process_data[user] = {}
+                              process_data[user][arxiv_id] = \
+                                   process_data[user].get(arxiv_id, 0) + int(counts[row])
+
+                    for user, clicks in process_data.iteritems():
+                         if not first:
+                              f.write(',')
+                         f.write(ujson.dumps(user) + ':' + ujson.dumps(clicks))
+                         first = False
+
+               f.write('},')
+               f.write(ujson.dumps(paper))
+               f.write(']')
+
+          os.rename(tmp_filename, store_filename)
+
+     @classmethod
+     def get_click_data_streaming(cls, filenames, store_filename=None, chunks_path=None,
+                                  flush_every=1000000, parallel=True):
+          """
+          Streaming version of get_click_data. Each file is parsed incrementally by a different
+          process and its clicks are flushed into chunk files, so memory is bounded by
+          flush_every. Files already processed are skipped, so the computation can be resumed.
+
+          :param filenames: [str]
+          :param store_filename: str, if it's not None, the chunks are merged shard by shard
+               and written into this file with the format of get_click_data.
+          :param chunks_path: str
+          :param flush_every: int
+          :param parallel: boolean
+          :return: [str] names of the chunk files
+          """
+          if chunks_path is None:
+               chunks_path = cls._chunks_path
+
+          if not path.exists(chunks_path):
+               os.makedirs(chunks_path)
+
+          arguments = {}
+          for i, filename in enumerate(filenames):
+               arguments[i] = filename
+
+          results = Parallel.run_function_different_arguments_parallel(
+               wrapper_process_click_file, arguments, all_success=True, parallel=parallel,
+               self=cls, chunks_path=chunks_path, flush_every=flush_every)
+
+          chunks = []
+          for i in xrange(len(filenames)):
+               chunks += results[i]
+
+          if store_filename is not None:
+               cls.write_click_chunks(chunks, store_filename)
+
+          return chunks
+
      @classmethod
      def generate_filenames_year(cls, year):
           """
@@ -140,6 +437,9 @@ class ProcessRawData(object):
 
           """
 
+          if CategoryIndex.has_index():
+              return CategoryIndex.get_category(arxiv_id)
+
           filename = path.join(cls._papers_path, '20' + year)
           date = year + month
 
@@ -0,0 +1,10 @@
+from problems.arxiv.category_index import CategoryIndex
+
+from stratified_bayesian_optimization.initializers.log import SBOLog
+
+logger = SBOLog(__name__)
+
+
+if __name__ == '__main__':
+    # python -m problems.arxiv.scripts.run_build_category_index
+    CategoryIndex.build_index()
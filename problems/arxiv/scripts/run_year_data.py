@@ -11,6 +11,8 @@ if __name__ == '__main__':
     # python -m problems.arxiv.scripts.run_year_data '1'
     parser = argparse.ArgumentParser()
     parser.add_argument('month', help='e.g. 23')
+    parser.add_argument('--streaming', help='process the files in parallel with bounded memory',
+                        action='store_true')
     args = parser.parse_args()
     month = args.month
 
@@ -19,5 +21,9 @@ if __name__ == '__main__':
     logger.info("Files to be processed: ")
     logger.info(files)
 
-    ProcessRawData.get_click_data(
-        files,"problems/arxiv/data/2016_%s_processed_data.json" % month)
\ No newline at end of file
+    if args.streaming:
+        ProcessRawData.get_click_data_streaming(
+            files, "problems/arxiv/data/2016_%s_processed_data.json" % month)
+    else:
+        ProcessRawData.get_click_data(
+            files,"problems/arxiv/data/2016_%s_processed_data.json" % month)
\ No newline at end of file
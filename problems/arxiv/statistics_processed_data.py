@@ -4,6 +4,7 @@ import os
 from os import path
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.initializers.log import SBOLog
+from problems.arxiv.category_index import CategoryIndex
 import ujson
 from bisect import bisect_left
 import matplotlib.pyplot as plt
@@ -292,6 +293,9 @@ class StatisticsProcessedData(object):
 
           """
 
+          if CategoryIndex.has_index():
+              return CategoryIndex.get_category(arxiv_id)
+
           filename = path.join(cls._papers_path, '20' + year)
           date = year + month
 
@@ -5,6 +5,7 @@ import numpy as np
 from copy import deepcopy
 
 from problems.pmf.pmf import PMF
+from problems.pmf.fold_store import FoldStore
 from stratified_bayesian_optimization.lib.parallel import Parallel
 from stratified_bayesian_optimization.lib.util import (
     convert_dictionary_to_list,
@@ -19,11 +20,16 @@ n_folds = 5
 train=[]
 validate=[]
 
+_name_fold = "problems/movies_collaborative/ml-100k/u%d.%s"
+_name_fold_npy = "problems/movies_collaborative/data/u%d_%s.npy"
+
+# The folds are stored as .npy files and opened with memory mapping, so the text files are
+# parsed only once and the workers of Parallel share the same data.
 for i in range(1, 6):
-    data = np.loadtxt("problems/movies_collaborative/ml-100k/u%d.base"%i)
-    test = np.loadtxt("problems/movies_collaborative/ml-100k/u%d.test"%i)
-    train.append(data)
-    validate.append(test)
+    train.append(FoldStore.load_fold(
+        _name_fold_npy % (i, 'base'), lambda i=i: np.loadtxt(_name_fold % (i, 'base'))))
+    validate.append(FoldStore.load_fold(
+        _name_fold_npy % (i, 'test'), lambda i=i: np.loadtxt(_name_fold % (i, 'test'))))
 
 def toy_example(x):
     """
@@ -0,0 +1,71 @@
+from __future__ import absolute_import
+
+import os
+from os import path
+
+import numpy as np
+
+from stratified_bayesian_optimization.initializers.log import SBOLog
+
+logger = SBOLog(__name__)
+
+
+class FoldStore(object):
+    """
+    Stores the folds used by PMF as contiguous .npy files with columns [user_id, item_id, rating].
+    The files are opened with memory mapping, so importing an objective is cheap and all the
+    worker processes share the same pages instead of parsing their own copy of the folds.
+    """
+
+    @staticmethod
+    def write(data, filename):
+        """
+        Write a fold into a .npy file. It's stored as int32 if all its entries are integers, and
+        as float32 otherwise.
+
+        :param data: [[user_id, item_id, rating]] or np.array(nx3+)
+        :param filename: str
+        """
+        data = np.asarray(data)[:, 0:3]
+
+        if np.all(np.mod(data, 1) == 0):
+            data = np.ascontiguousarray(data, dtype=np.int32)
+        else:
+            data = np.ascontiguousarray(data, dtype=np.float32)
+
+        # Several workers may build the same fold, so the file is written atomically.
+        tmp_filename = filename + '.%d.tmp' % os.getpid()
+        with open(tmp_filename, 'wb') as f:
+            np.save(f, data)
+        os.rename(tmp_filename, filename)
+
+    @staticmethod
+    def read(filename):
+        """
+        Open a fold with memory mapping (read only), or return None if it doesn't exist.
+
+        :param filename: str
+        :return: np.memmap or None
+        """
+        if not path.exists(filename):
+            return None
+
+        return np.load(filename, mmap_mode='r')
+
+    @classmethod
+    def load_fold(cls, filename, get_data):
+        """
+        Open a fold, creating its .npy file the first time from get_data().
+
+        :param filename: str
+        :param get_data: function that returns the fold, e.g. read from a JSON file.
+        :return: np.memmap
+        """
+        fold = cls.read(filename)
+
+        if fold is None:
+            logger.info('Creating fold store %s' % filename)
+            cls.write(get_data(), filename)
+            fold = cls.read(filename)
+
+        return fold
@@ -1,9 +1,15 @@
 from __future__ import absolute_import
 
 from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.lib.constant import MULTIVARIATE_NORMAL_SAMPLING
+from problems.test_simulated_gp.simulate_function import get_filename
 import numpy as np
 
-read = JSONFile.read("problems/test_simulated_gp/simulated_function_with_1000_5")
+# Method used to simulate the function (see simulate_function). The default reads the stored
+# function, the other methods need to run simulate_function with --method first.
+SAMPLING_METHOD = MULTIVARIATE_NORMAL_SAMPLING
+
+read = JSONFile.read(get_filename(1000, 5, SAMPLING_METHOD))
 points = read['points']
 function = read['function']
 
@@ -1,36 +1,69 @@
 import numpy as np
 
+import argparse
+
 from os import path
 
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.kernels.matern52 import Matern52
 from stratified_bayesian_optimization.lib.sample_functions import SampleFunctions
+from stratified_bayesian_optimization.lib.constant import (
+    MULTIVARIATE_NORMAL_SAMPLING,
+    CHOLESKY_SAMPLING,
+    FOURIER_FEATURES_SAMPLING,
+)
+
+
+def get_filename(n_points, random_seed, method=MULTIVARIATE_NORMAL_SAMPLING):
+    """
+    The stored function was sampled with MULTIVARIATE_NORMAL_SAMPLING. The other methods give
+    different functions for the same seed, so they're written into other files.
+
+    :param n_points: int
+    :param random_seed: int
+    :param method: (str) method used by SampleFunctions.sample_from_gp
+    :return: str
+    """
+    name = 'simulated_function_with_%d_%d' % (n_points, random_seed)
+    if method != MULTIVARIATE_NORMAL_SAMPLING:
+        name += '_%s' % method
+
+    return path.join('problems', 'test_simulated_gp', name)
+
 
+if __name__ == '__main__':
+    # python -m problems.test_simulated_gp.simulate_function --method cholesky
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--method', help='method used to sample from the GP',
+                        default=MULTIVARIATE_NORMAL_SAMPLING,
+                        choices=[MULTIVARIATE_NORMAL_SAMPLING, CHOLESKY_SAMPLING,
+                                 FOURIER_FEATURES_SAMPLING])
+    args = parser.parse_args()
+    method = args.method
 
-decimals = 10
-random_seed = 5
-np.random.seed(random_seed)
-n_points = 1000
-points = np.linspace(0, 100, n_points)
-points = np.round(points, decimals=decimals)
-points = points.reshape([n_points, 1])
+    decimals = 10
+    random_seed = 5
+    np.random.seed(random_seed)
+    n_points = 1000
+    points = np.linspace(0, 100, n_points)
+    points = np.round(points, decimals=decimals)
+    points = points.reshape([n_points, 1])
 
-tasks = np.array([[0, 1]])
+    tasks = np.array([[0, 1]])
 
-add = [10, -10]
-kernel = Matern52.define_kernel_from_array(1, np.array([100.0, 1.0]))
-function = SampleFunctions.sample_from_gp(points, kernel)
-function = function[0, :]
+    add = [10, -10]
+    kernel = Matern52.define_kernel_from_array(1, np.array([100.0, 1.0]))
+    function = SampleFunctions.sample_from_gp(points, kernel, method=method)
+    function = function[0, :]
 
-final_function = {}
+    final_function = {}
 
-for task in range(2):
-    final_function[task] = []
-    for i in xrange(n_points):
-        point = np.concatenate((points[i, :], np.array([task])))
-        final_function[task].append(function[i] + add[task])
+    for task in range(2):
+        final_function[task] = []
+        for i in xrange(n_points):
+            point = np.concatenate((points[i, :], np.array([task])))
+            final_function[task].append(function[i] + add[task])
 
-filename = path.join('problems', 'test_simulated_gp', 'simulated_function_with_%d_%d' %
-                     (n_points, random_seed))
+    filename = get_filename(n_points, random_seed, method)
 
-JSONFile.write({'function': final_function, 'points': points}, filename)
+    JSONFile.write({'function': final_function, 'points': points}, filename)
@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+
+import argparse
+import sys
+
+from stratified_bayesian_optimization.services.benchmark import BenchmarkService
+
+
+if __name__ == '__main__':
+    # Example usage:
+    # python -m scripts.run_benchmarks --write_baseline
+    # python -m scripts.run_benchmarks --names log_likelihood sbo_evaluate
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--names', nargs='*', help='names of the benchmarks', default=None)
+    parser.add_argument('--n_repeats', type=int, help='repeats of each benchmark', default=3)
+    parser.add_argument('--baseline', type=str, help='baseline file', default=None)
+    parser.add_argument('--tolerance', type=float, help='allowed relative slowdown',
+                        default=0.5)
+    parser.add_argument('--memory_tolerance', type=float,
+                        help='allowed relative increase of the memory', default=0.5)
+    parser.add_argument('--write_baseline', action='store_true',
+                        help='store the results as the new baseline')
+
+    args = parser.parse_args()
+
+    results = BenchmarkService.run(names=args.names, n_repeats=args.n_repeats)
+
+    for key, result in results.iteritems():
+        memory = 'unavailable'
+        if result['memory'] is not None:
+            memory = '%.1f MB' % result['memory']
+        print '%s: %.6f seconds, %s' % (key, result['time'], memory)
+
+    if args.write_baseline:
+        BenchmarkService.write_baseline(results, args.baseline)
+        sys.exit(0)
+
+    baseline = BenchmarkService.read_baseline(args.baseline)
+
+    if baseline is None:
+        print 'There is no baseline, run with --write_baseline to store one.'
+        sys.exit(0)
+
+    regressions = BenchmarkService.compare(results, baseline, tolerance=args.tolerance,
+                                           memory_tolerance=args.memory_tolerance)
+
+    units = {'time': 'seconds', 'memory': 'MB'}
+    for key, regression in regressions.iteritems():
+        for metric, values in regression.iteritems():
+            print 'Regression of the %s of %s: %.6f %s, baseline %.6f %s (x%.2f)' % (
+                metric, key, values['value'], units[metric], values['baseline'], units[metric],
+                values['ratio'])
+
+    sys.exit(int(len(regressions) > 0))
@@ -1,11 +1,15 @@
 from __future__ import absolute_import
 
 import argparse
+from os import path
+import sys
 import ujson
 
 from stratified_bayesian_optimization.entities.run_spec import MultipleSpecEntity
 from stratified_bayesian_optimization.services.spec import SpecService
 from stratified_bayesian_optimization.services.bayesian_global_optimization import BGO
+from stratified_bayesian_optimization.services.scheduler import SchedulerService
+from stratified_bayesian_optimization.lib.constant import MULTIPLESPECS_DIR
 
 
 if __name__ == '__main__':
@@ -14,12 +18,27 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser()
     parser.add_argument('multiple_spec', help='e.g. test_multiple_spec.json')
-    parser.add_argument('spec', help="e.g. 1, number of specification")
+    parser.add_argument('spec', help="e.g. 1, number of specification. If it's not given, all "
+                                     "the specs are run by the scheduler.", nargs='?')
     parser.add_argument('--niter', type=int, help='number of iterations', default=5)
     parser.add_argument('--output_file', type=str, help='output file', default='output.json')
+    parser.add_argument('--n_specs_parallel', type=int, help='specs run at the same time',
+                        default=None)
+    parser.add_argument('--n_processes_spec', type=int, help='processes used by each spec',
+                        default=None)
 
     args = parser.parse_args()
 
+    if args.spec is None:
+        # python -m scripts.run_multiple_spec arxiv_10_training_random_seeds.json
+        # --n_specs_parallel 4
+        multiple_spec = MultipleSpecEntity.from_json(args.multiple_spec)
+        status_file = path.join(
+            MULTIPLESPECS_DIR, args.multiple_spec.split('.')[0] + '_status.json')
+        SchedulerService.run_multiple_spec(
+            multiple_spec, status_file, n_specs_parallel=args.n_specs_parallel,
+            n_processes_spec=args.n_processes_spec, output_file=args.output_file)
+        sys.exit(0)
 
     output_file = args.output_file
     n_spec = int(args.spec)
@@ -35,6 +35,7 @@ from stratified_bayesian_optimization.services.domain import (
     DomainService,
 )
 from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.lib.la_functions import cho_solve
 
 logger = SBOLog(__name__)
 
@@ -65,6 +66,10 @@ class EI(object):
         self.noisy_evaluations = noisy_evaluations
         self.optimization_results = []
 
+        # Cholesky decomposition, solve and best solution for each sample of the parameters of the
+        # model, used to evaluate EI over all the samples at once.
+        self.cache_samples_parameters = {}
+
         self.bounds_opt = deepcopy(self.gp.bounds)
 
         self.simplex_domain = self.gp.simplex_domain
@@ -111,6 +116,77 @@ class EI(object):
 
         return evaluation
 
+    def evaluate_samples_parameters(self, points, n_samples_parameters, compute_gradient=False):
+        """
+        Computes EI and its gradient averaged over the last n_samples_parameters samples of the
+        parameters of the model, for a batch of points. Only for GP models.
+
+        :param points: np.array(kxn)
+        :param n_samples_parameters: int
+        :param compute_gradient: boolean
+        :return: {'value': np.array(k), 'gradient': np.array(kxn)}
+        """
+
+        parameters = self.gp.samples_parameters[-n_samples_parameters:]
+        n_samples = len(parameters)
+        n_points = points.shape[0]
+
+        mu = np.zeros((n_samples, n_points))
+        var = np.zeros((n_samples, n_points))
+        best = np.zeros((n_samples, 1))
+
+        grad_mu = None
+        grad_var = None
+        if compute_gradient:
+            grad_mu = np.zeros((n_samples, n_points, points.shape[1]))
+            grad_var = np.zeros((n_samples, n_points, points.shape[1]))
+
+        for i, parameter in enumerate(parameters):
+            var_noise = parameter[0]
+            mean = parameter[1]
+            parameters_kernel = parameter[2:]
+
+            index = self.gp.cache_keys.get_key(parameter)
+            factors = self.cache_samples_parameters.get(index)
+            if factors is None:
+                chol, cov = self.gp._chol_cov_including_noise(var_noise, parameters_kernel,
+                                                              cache=False)
+                solve = cho_solve(chol, self.gp.data['evaluations'] - mean)
+                factors = {
+                    'chol': chol,
+                    'solve': solve,
+                    'best': self.gp.get_historical_best_solution(
+                        var_noise, mean, parameters_kernel, self.noisy_evaluations),
+                }
+                self.cache_samples_parameters[index] = factors
+
+            posterior = self.gp.compute_posterior_parameters_and_gradient(
+                points, var_noise, mean, parameters_kernel, compute_gradient=compute_gradient,
+                chol_solve=factors)
+
+            mu[i, :] = posterior['mean']
+            var[i, :] = posterior['var']
+            best[i, 0] = factors['best']
+
+            if compute_gradient:
+                grad_mu[i, :, :] = posterior['grad_mean']
+                grad_var[i, :, :] = posterior['grad_var']
+
+        std = np.sqrt(np.clip(var, 0, None))
+        normalized_factor = (mu - best) / std
+
+        values = (mu - best) * norm.cdf(normalized_factor) + std * norm.pdf(normalized_factor)
+
+        gradient = None
+        if compute_gradient:
+            # d EI / dx = cdf(z) * grad_mu + pdf(z) * grad_std
+            grad_std = 0.5 * grad_var / std[:, :, np.newaxis]
+            gradients = norm.cdf(normalized_factor)[:, :, np.newaxis] * grad_mu + \
+                norm.pdf(normalized_factor)[:, :, np.newaxis] * grad_std
+            gradient = np.mean(gradients, axis=0)
+
+        return {'value': np.mean(values, axis=0), 'gradient': gradient}
+
     def evaluate_gradient_sample_params(self, point, random_seed=None):
         """
         Computes the gradient of EI taking a random sample of the parameters of the model.
@@ -143,11 +219,26 @@ class EI(object):
         :return: np.array(n)
         """
 
-        post_parameters = self.gp.compute_posterior_parameters(
-            point, var_noise, mean, parameters_kernel)
+        if self.gp.name_model == BAYESIAN_QUADRATURE:
+            post_parameters = self.gp.compute_posterior_parameters(
+                point, var_noise, mean, parameters_kernel)
 
-        mu = post_parameters['mean']
-        cov = post_parameters['cov']
+            mu = post_parameters['mean']
+            cov = post_parameters['cov']
+
+            gradient = self.gp.gradient_posterior_parameters(
+                point, var_noise, mean, parameters_kernel, parallel=False)
+            grad_mu = gradient['mean']
+            grad_cov = gradient['cov']
+        else:
+            # Mean, variance and gradients from one cross covariance evaluation and one solve
+            post_parameters = self.gp.compute_posterior_parameters_and_gradient(
+                point, var_noise, mean, parameters_kernel)
+
+            mu = post_parameters['mean']
+            cov = post_parameters['var']
+            grad_mu = post_parameters['grad_mean']
+            grad_cov = post_parameters['grad_var']
 
         cov = np.clip(cov, 0, None)
 
@@ -156,11 +247,6 @@ class EI(object):
 
         std = np.sqrt(cov)
 
-        gradient = self.gp.gradient_posterior_parameters(point, var_noise, mean, parameters_kernel,
-                                                         parallel=False)
-        grad_mu = gradient['mean']
-        grad_cov = gradient['cov']
-
         grad_std = 0.5 * grad_cov / np.sqrt(cov)
 
         grad_factor = (grad_mu * std - grad_std * (mu - best)) / cov
@@ -178,7 +264,7 @@ class EI(object):
 
     def optimize(self, start=None, random_seed=None, parallel=True, n_restarts=10,
                  n_best_restarts=0, n_samples_parameters=0, start_new_chain=False,
-                 maxepoch=11, **kwargs):
+                 maxepoch=11, n_threads=0, **kwargs):
         """
         Optimizes EI
 
@@ -190,6 +276,8 @@ class EI(object):
         :param n_samples_parameters: int
         :param start_new_chain: (boolean) If True, we start a new chain with n_samples_parameters
             samples of the parameters of the GP model.
+        :param n_threads: (int) If n_threads > 0, the restarts run in a pool of n_threads threads
+            instead of processes.
         :return:
         """
 
@@ -238,7 +326,7 @@ class EI(object):
             point_dict = {}
             for j in xrange(start.shape[0]):
                 point_dict[j] = start[j, :]
-            args = (False, None, True, 0, self, DEFAULT_N_PARAMETERS)
+            args = (False, None, True, n_threads, self, DEFAULT_N_PARAMETERS)
             ei_values = Parallel.run_function_different_arguments_parallel(
                 wrapper_objective_acquisition_function, point_dict, *args)
             values = [ei_values[i] for i in ei_values]
@@ -264,7 +352,7 @@ class EI(object):
                 grad_function,
                 minimize=False)
 
-            args = (False, None, parallel, 0, optimization, self, n_samples_parameters)
+            args = (False, None, parallel, n_threads, optimization, self, n_samples_parameters)
 
             opt_method = wrapper_optimize
 
@@ -278,20 +366,32 @@ class EI(object):
 
             args_ = (self, DEFAULT_N_PARAMETERS)
 
+            if self.gp.name_model == BAYESIAN_QUADRATURE:
+                # Each step averages the gradients at n_samples_parameters new samples of the
+                # parameters.
+                gradient_sgd = wrapper_evaluate_gradient_ei_sample_params
+                args_sgd = (n_samples_parameters, self)
+            else:
+                # Each step uses the exact average of the gradients at the last
+                # n_samples_parameters samples, computed in one batch with the cached
+                # factorizations, as the objective.
+                gradient_sgd = grad_function
+                args_sgd = (1, self, n_samples_parameters)
+
             optimization = Optimization(
                 SGD_NAME,
                 objective_function,
                 bounds,
-                wrapper_evaluate_gradient_ei_sample_params,
+                gradient_sgd,
                 minimize=False,
                 full_gradient=grad_function,
                 args=args_, debug=True, simplex_domain=self.simplex_domain,
                 **{'maxepoch': maxepoch}
             )
 
-            args = (False, None, parallel, 0, optimization, n_samples_parameters, self)
-
-            #TODO: THINK ABOUT N_THREADS. Do we want to run it in parallel?
+            # The restarts of SGD always run in processes because wrapper_sgd seeds the global
+            # random state.
+            args = (False, None, parallel, 0, optimization) + args_sgd
 
             opt_method = wrapper_sgd
 
@@ -473,4 +573,5 @@ class EI(object):
         """
         Cleans the cache
         """
+        self.cache_samples_parameters = {}
         self.gp.clean_cache()
@@ -9,7 +9,6 @@ import os
 
 from copy import deepcopy
 
-import multiprocessing as mp
 
 import sys
 
@@ -38,6 +37,7 @@ from stratified_bayesian_optimization.services.domain import (
 )
 from stratified_bayesian_optimization.lib.optimization import Optimization
 from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
 from stratified_bayesian_optimization.initializers.log import SBOLog
 from stratified_bayesian_optimization.lib.distances import Distances
 from stratified_bayesian_optimization.lib.util import (
@@ -55,15 +55,25 @@ from stratified_bayesian_optimization.lib.util import (
     wrapper_evaluate_sbo_by_sample_2,
     wrapper_grad_voi_sgd,
     wrapper_sgd,
+    wrapper_optimize_sbo,
     wrapper_get_parameters_for_samples_2,
     wrapper_evaluate_sbo_by_sample_bayesian_2,
     wrapper_evaluate_hessian_sample,
     wrapper_evaluate_sbo_by_sample_no_sp,
     wrapper_optimize_posterior_mean,
 )
-from stratified_bayesian_optimization.lib.constant import DEFAULT_N_PARAMETERS, DEFAULT_N_SAMPLES
+from stratified_bayesian_optimization.lib.constant import (
+    DEFAULT_N_PARAMETERS,
+    DEFAULT_N_SAMPLES,
+    DEFAULT_N_POINTS_ADAPTIVE_DISCRETIZATION,
+    MAX_WARM_START_POINTS,
+)
 from stratified_bayesian_optimization.util.json_file import JSONFile
-from stratified_bayesian_optimization.lib.util import wrapper_evaluate_sbo
+from stratified_bayesian_optimization.lib.util import (
+    wrapper_evaluate_sbo,
+    add_warm_start_points,
+    combine_start_points,
+)
 from stratified_bayesian_optimization.acquisition_functions.ei import EI
 from stratified_bayesian_optimization.acquisition_functions.multi_task import MultiTasks
 from stratified_bayesian_optimization.numerical_tools.bayesian_quadrature import BayesianQuadrature
@@ -82,21 +92,33 @@ class SBO(object):
                                 '{type_kernel}_{training_name}_{n_training}_{random_seed}_mc_' \
                                 '{monte_carlo}.json'.format
 
-    _filename_points_voi_evaluations = 'points_for_voi_{model_type}_{problem_name}_' \
-                                '{type_kernel}_{training_name}_{n_training}_{random_seed}.' \
-                                'json'.format
 
 
-    def __init__(self, bayesian_quadrature, discretization_domain=None):
+    def __init__(self, bayesian_quadrature, discretization_domain=None,
+                 adaptive_discretization=False, n_points_adaptive_discretization=None,
+                 common_random_numbers=False):
         """
 
         :param bayesian_quadrature: a bayesian quadrature instance.
         :param discretization_domain: np.array(mxl), discretization of the domain of x.
+        :param adaptive_discretization: (boolean) If True, the discretization is rebuilt before
+            each optimization of the VOI (see build_adaptive_discretization).
+        :param n_points_adaptive_discretization: (int) Number of points of the adaptive
+            discretization.
+        :param common_random_numbers: (boolean) If True, the MC estimator of SBO optimizes
+            a_{n+1} for each sample starting only from its optimum at the previous candidate.
         """
 
         self.bq = bayesian_quadrature
         self.discretization = discretization_domain
 
+        self.adaptive_discretization = adaptive_discretization
+        if n_points_adaptive_discretization is None:
+            n_points_adaptive_discretization = DEFAULT_N_POINTS_ADAPTIVE_DISCRETIZATION
+        self.n_points_adaptive_discretization = n_points_adaptive_discretization
+        # First points of the adaptive discretization, which are kept across iterations
+        self.fixed_discretization = None
+
         self.bounds_opt = deepcopy(self.bq.bounds)
         if self.bq.separate_tasks and not self.bq.task_continue:
             self.bounds_opt.append([None, None])
@@ -124,6 +146,23 @@ class SBO(object):
 
         # Cached evaluations of the SBO by taking samples of the parameters of the model.
         self.mc_bayesian = {}
+
+        # Common random numbers: the samples are kept until the cache is cleaned, and
+        # warm_start_samples[parameters][i] is the optimum of a_{n+1} for the sample i at the last
+        # evaluated candidate.
+        self.common_random_numbers = common_random_numbers
+        self.warm_start_samples = {}
+
+        # Warm starts kept across iterations, the most recent first (clean_cache doesn't clean
+        # them):
+        # 'samples': optima of a_{n+1} at the samples, used with the optima of the posterior mean
+        #   (bq.warm_start_solutions) as the first starting points of the optimizations of a_{n+1}.
+        # 'acquisition': maximizers of the SBO, used as the first starting points of optimize.
+        self.warm_start_store = {'samples': [], 'acquisition': []}
+
+        # Optima of a_{n+1} at the samples of the last evaluated candidate. They're added to
+        # warm_start_store['samples'] when the cache is cleaned.
+        self.last_optima_samples = []
         self.args_handler = ()
 
 
@@ -271,7 +310,7 @@ class SBO(object):
         if var_noise is None:
             index_cache = 'mc_mean'
         else:
-            index_cache = (var_noise, mean, tuple(parameters_kernel))
+            index_cache = self.bq.gp.cache_keys.get_id(var_noise, mean, parameters_kernel)
 
         if start is None:
             start_points = DomainService.get_points_domain(n_restarts + 1, bounds_x,
@@ -283,7 +322,7 @@ class SBO(object):
                 start = [start] + start_points[0 : -1]
                 start = np.array(start)
             else:
-                start = np.array(start_points)
+                start = combine_start_points(self.get_warm_start_points_samples(), start_points)
         else:
             n_restarts = 0
             parallel = False
@@ -381,17 +420,7 @@ class SBO(object):
 
         start_points = DomainService.get_points_domain(n_restarts + 1, bounds_x,
                                                        type_bounds=len(bounds_x) * [0])
-        prev_starts = []
-        # if len(self.bq.optimal_solutions) > 0:
-        #     for index in self.bq.optimal_solutions:
-        #         if len(self.bq.optimal_solutions[index]) > 0:
-        #             start = self.bq.optimal_solutions[index][-1]['solution']
-        #             prev_starts.append(start)
-        if len(prev_starts) > 0:
-            start = prev_starts + start_points
-            start = np.array(start)
-        else:
-            start = np.array(start_points)
+        start = combine_start_points(self.get_warm_start_points_samples(), start_points)
 
         if cache:
             self.starting_points_sbo = start
@@ -427,8 +456,9 @@ class SBO(object):
             start = self.starting_points_sbo
             n_restarts = start.shape[0]
 
-        if tuple(candidate_point[0,:]) in self.mc_bayesian:
-            value = self.mc_bayesian[tuple(candidate_point[0,:])]
+        index_candidate = self.bq.gp.cache_keys.get_key(candidate_point[0, :])
+        value = self.mc_bayesian.get(index_candidate)
+        if value is not None:
             return value
 
         arguments = {}
@@ -443,14 +473,27 @@ class SBO(object):
         point_start = {}
         max_values = []
 
+        # The warm starts are kept across data versions
+        index_warm_start = [self.bq.gp.cache_keys.get_id(param[0], param[1], param[2:])
+                            for param in parameters]
+        warm_start = self.common_random_numbers and all(
+            index_warm_start[k] in self.warm_start_samples for k in xrange(n_samples_parameters))
+
         for k in xrange(n_samples_parameters):
             for i in xrange(n_samples):
+                if warm_start:
+                    optimum = self.warm_start_samples[index_warm_start[k]][i]
+                    point_dict[(0, i, k)] = [optimum.reshape((1, len(optimum))), samples[i],
+                                             parameters[k]]
+                    continue
                 for j in xrange(n_restarts):
                     point_dict[(j, i, k)] = [deepcopy(start[j:j + 1, :]), samples[i], parameters[k]]
                     point_start[(j, i, k)] = [deepcopy(start[j:j + 1, :]), candidate_point,
                                            samples[i], parameters[k]]
         n_restarts_ = n_restarts
-        if n_best_restarts > 0 and n_best_restarts < n_restarts:
+        if warm_start:
+            n_restarts_ = 1
+        elif n_best_restarts > 0 and n_best_restarts < n_restarts:
             point_dict = {}
 
             args = (False, None, True, n_threads, self)
@@ -482,7 +525,9 @@ class SBO(object):
         self.optimal_samples = {}
 
         for k in xrange(n_samples_parameters):
-            index_cache_2 = (tuple(candidate_point[0, :]), tuple(parameters[k]))
+            params = parameters[k]
+            index_cache_2 = self.bq.gp.cache_keys.get_key(
+                candidate_point[0, :], params[0], params[1], params[2:])
             self.optimal_samples[index_cache_2] = {}
             self.optimal_samples[index_cache_2]['optimum'] = {}
             max_values = []
@@ -498,8 +543,11 @@ class SBO(object):
                 max_ = np.max(values)
                 max_values.append(max_)
 
-            params = parameters[k]
-            index_cache = (params[0], params[1], tuple(params[2:]))
+            if self.common_random_numbers:
+                self.warm_start_samples[index_warm_start[k]] = \
+                    self.optimal_samples[index_cache_2]['optimum']
+
+            index_cache = self.bq.gp.cache_keys.get_key(params[0], params[1], params[2:])
 
             if not compute_max_mean:
                 max_mean = 0
@@ -515,8 +563,16 @@ class SBO(object):
             values_parameters.append(np.mean(max_values) - max_mean)
         sbo_value = np.mean(values_parameters)
 
+        self.last_optima_samples = []
+        for k in xrange(n_samples_parameters):
+            params = parameters[k]
+            index_cache_2 = self.bq.gp.cache_keys.get_key(
+                candidate_point[0, :], params[0], params[1], params[2:])
+            optimum = self.optimal_samples[index_cache_2]['optimum']
+            self.last_optima_samples += [optimum[i] for i in sorted(optimum)]
+
         self.mc_bayesian = {}
-        self.mc_bayesian[tuple(candidate_point[0,:])] = sbo_value
+        self.mc_bayesian[index_candidate] = sbo_value
 
         return sbo_value
 
@@ -598,7 +654,8 @@ class SBO(object):
             parameters_dict = {}
 
             for i, parameter in enumerate(parameters):
-                index_cache = (parameter[0], parameter[1], tuple(parameter[2:]))
+                index_cache = self.bq.gp.cache_keys.get_key(
+                    parameter[0], parameter[1], parameter[2:])
 
                 if index_cache not in self.bq.max_mean:
                     parameters_dict[i] = parameter
@@ -611,13 +668,15 @@ class SBO(object):
                 for i in sol:
                     opt = sol.get(i)
                     par = parameters_dict[i]
-                    index_cache = (par[0], par[1], tuple(par[2:]))
+                    index_cache = self.bq.gp.cache_keys.get_key(par[0], par[1], par[2:])
                     self.bq.max_mean[index_cache] = opt['optimal_value']
 
-                    if index_cache not in self.bq.optimal_solutions:
-                        self.bq.optimal_solutions[index_cache] = []
+                    # The solutions are used as warm starts, so they're kept across data versions
+                    index_solutions = self.bq.gp.cache_keys.get_id(par[0], par[1], par[2:])
+                    if index_solutions not in self.bq.optimal_solutions:
+                        self.bq.optimal_solutions[index_solutions] = []
 
-                    self.bq.optimal_solutions[index_cache].append(opt)
+                    self.bq.optimal_solutions[index_solutions].append(opt)
 
         for l in xrange(n_candidate_points):
             gradients = []
@@ -634,7 +693,7 @@ class SBO(object):
                     optimum_values[i, :] = simulated_values[(i, k, l)]['optimum']
 
                 params = parameters[k]
-                index_cache = (params[0], params[1], tuple(params[2:]))
+                index_cache = self.bq.gp.cache_keys.get_key(params[0], params[1], params[2:])
 
                 if not compute_max_mean:
                     max_mean = 0
@@ -787,7 +846,7 @@ class SBO(object):
                     max_values.append(max_)
 
                 params = parameters[k]
-                index_cache = (params[0], params[1], tuple(params[2:]))
+                index_cache = self.bq.gp.cache_keys.get_key(params[0], params[1], params[2:])
 
                 if not compute_max_mean:
                     max_mean = 0
@@ -933,7 +992,7 @@ class SBO(object):
                     max_values.append(max_)
 
                 params = parameters[k]
-                index_cache = (params[0], params[1], tuple(params[2:]))
+                index_cache = self.bq.gp.cache_keys.get_key(params[0], params[1], params[2:])
 
                 if not compute_max_mean:
                     max_mean = 0
@@ -1068,7 +1127,7 @@ class SBO(object):
         """
 
 
-        if tuple(candidate_point[0,:]) not in self.mc_bayesian:
+        if self.bq.gp.cache_keys.get_key(candidate_point[0, :]) not in self.mc_bayesian:
             self.evaluate_mc_bayesian(candidate_point, n_samples_parameters, n_samples,
                                  n_restarts=n_restarts, n_best_restarts=n_best_restarts,
                                       n_threads=n_threads, compute_max_mean=compute_max_mean,
@@ -1079,7 +1138,8 @@ class SBO(object):
 
         samples = self.samples.reshape((n_samples, 1))
         for param in parameters:
-            index_cache_2 = (tuple(candidate_point[0, :]), tuple(param))
+            index_cache_2 = self.bq.gp.cache_keys.get_key(
+                candidate_point[0, :], param[0], param[1], param[2:])
             max_points = self.optimal_samples[index_cache_2]['optimum']
 
             points = np.zeros((n_samples, len(self.bq.x_domain)))
@@ -1234,7 +1294,7 @@ class SBO(object):
         if mean is None:
             mean = self.bq.gp.mean.value[0]
 
-        index_cache = (var_noise, mean, tuple(parameters_kernel))
+        index_cache = self.bq.gp.cache_keys.get_key(var_noise, mean, parameters_kernel)
 
         if index_cache in self.bq.max_mean:
             max_mean = self.bq.max_mean[index_cache]
@@ -1255,7 +1315,8 @@ class SBO(object):
 
         max_values = []
 
-        index_cache_2 = (tuple(candidate_point[0, :]), var_noise, mean, tuple(parameters_kernel))
+        index_cache_2 = self.bq.gp.cache_keys.get_key(
+            candidate_point[0, :], var_noise, mean, parameters_kernel)
         if index_cache_2 in self.optimal_samples:
             optimal_values = self.optimal_samples[index_cache_2]['max'].values()
             return {'value': np.mean(optimal_values) - max_mean,
@@ -1266,6 +1327,11 @@ class SBO(object):
         self.optimal_samples[index_cache_2]['max'] = {}
         self.optimal_samples[index_cache_2]['optimum'] = {}
 
+        warm_start = None
+        if self.common_random_numbers:
+            index_warm_start = self.bq.gp.cache_keys.get_id(var_noise, mean, parameters_kernel)
+            warm_start = self.warm_start_samples.get(index_warm_start)
+
         if parallel:
             # Cache this computation, so we don't have to do it over and over again
             self.bq.get_parameters_for_samples(True, candidate_point, parameters_kernel, var_noise,
@@ -1280,7 +1346,13 @@ class SBO(object):
                     point_start[(j, i)] = [deepcopy(start[j:j+1,:]), candidate_point, samples[i]]
             n_restarts_ = n_restarts
 
-            if n_best_restarts > 0 and n_best_restarts < n_restarts:
+            if warm_start is not None:
+                point_dict = {}
+                for i in xrange(n_samples):
+                    optimum = warm_start[i]
+                    point_dict[(0, i)] = [optimum.reshape((1, len(optimum))), samples[i]]
+                n_restarts_ = 1
+            elif n_best_restarts > 0 and n_best_restarts < n_restarts:
                 point_dict = {}
                 args = (False, None, True, n_threads, self, var_noise, mean, parameters_kernel,
                         True, n_threads)
@@ -1316,15 +1388,25 @@ class SBO(object):
                 max_values.append(max_)
         else:
             for i in xrange(n_samples):
+                start_sample = None
+                if warm_start is not None:
+                    start_sample = warm_start[i].reshape((1, len(warm_start[i])))
                 max_value = self.evaluate_sbo_by_sample(
-                    candidate_point, samples[i], start=None, var_noise=var_noise, mean=mean,
-                    parameters_kernel=parameters_kernel, n_restarts=n_restarts, parallel=True,
-                    method_opt=method_opt, tol=None, **opt_params_mc)
+                    candidate_point, samples[i], start=start_sample, var_noise=var_noise,
+                    mean=mean, parameters_kernel=parameters_kernel, n_restarts=n_restarts,
+                    parallel=True, method_opt=method_opt, tol=None, **opt_params_mc)
                 max_values.append(max_value['max'])
                 maximum = max_value['optimum']
                 self.optimal_samples[index_cache_2]['max'][i] = max_value['max']
                 self.optimal_samples[index_cache_2]['optimum'][i] = maximum
 
+        if self.common_random_numbers:
+            self.warm_start_samples[index_warm_start] = \
+                self.optimal_samples[index_cache_2]['optimum']
+
+        optimum = self.optimal_samples[index_cache_2]['optimum']
+        self.last_optima_samples = [optimum[i] for i in sorted(optimum)]
+
         return {'value': np.mean(max_values) - max_mean, 'std': np.std(max_values) / n_samples}
 
     def gradient_mc(self, candidate_point, var_noise=None, mean=None, parameters_kernel=None,
@@ -1361,7 +1443,8 @@ class SBO(object):
         if mean is None:
             mean = self.bq.gp.mean.value[0]
 
-        index_cache_2 = (tuple(candidate_point[0, :]), var_noise, mean, tuple(parameters_kernel))
+        index_cache_2 = self.bq.gp.cache_keys.get_key(
+            candidate_point[0, :], var_noise, mean, parameters_kernel)
 
         if index_cache_2 not in self.optimal_samples:
             self.evaluate_mc(candidate_point, n_samples, var_noise=var_noise, mean=mean,
@@ -1568,6 +1651,115 @@ class SBO(object):
 
         return np.array(start_points)
 
+    @staticmethod
+    def latin_hypercube_points(n_points, lower_bounds, upper_bounds):
+        """
+        Latin hypercube sample of the box defined by the bounds.
+
+        :param n_points: (int)
+        :param lower_bounds: np.array(k)
+        :param upper_bounds: np.array(k)
+        :return: np.array(n_points x k)
+        """
+        dimension = len(lower_bounds)
+        strata = np.argsort(np.random.uniform(0, 1, (n_points, dimension)), axis=0)
+        samples = (strata + np.random.uniform(0, 1, (n_points, dimension))) / float(n_points)
+
+        return lower_bounds + samples * (upper_bounds - lower_bounds)
+
+    def build_adaptive_discretization(self, n_points=None, n_candidates=5, n_refinement=None,
+                                      candidate=None, parallel=True):
+        """
+        Builds a discretization of the domain of x with a few hundred points instead of a full
+        grid. Its first n_points - n_refinement points are built only once, with the historical
+        points, the optimizers of the posterior mean and a latin hypercube sample, so the
+        quadratures stored by BayesianQuadrature are reused across iterations. The last
+        n_refinement points are rebuilt on every call: the historical points and the optimizers
+        added after the first call, and points around argmax{a(x) + b(x, candidate)*Z} for several
+        values of Z.
+
+        :param n_points: (int) Total number of points.
+        :param n_candidates: (int) Number of random candidate points used to refine the
+            discretization if candidate is None.
+        :param n_refinement: (int) Number of points rebuilt on every call.
+        :param candidate: np.array(1xn), current candidate point.
+        :param parallel: (boolean)
+        :return: np.array(n_points x dim_x)
+        """
+
+        if n_points is None:
+            n_points = self.n_points_adaptive_discretization
+
+        if n_refinement is None:
+            n_refinement = n_points / 4
+
+        bounds_x = [self.bq.gp.bounds[i] for i in self.bq.x_domain]
+        lower_bounds = np.array([bound[0] for bound in bounds_x], dtype=float)
+        upper_bounds = np.array([bound[-1] for bound in bounds_x], dtype=float)
+        dim_x = len(bounds_x)
+
+        seeds = [self.bq.gp.data['points'][:, self.bq.x_domain]]
+        for solutions in self.bq.optimal_solutions.values():
+            if len(solutions) > 0:
+                seeds.append(np.array(solutions[-1]['solution'])[0: dim_x].reshape((1, dim_x)))
+        seeds = np.concatenate(seeds, axis=0)
+
+        if self.fixed_discretization is None:
+            n_fixed = n_points - n_refinement
+            if seeds.shape[0] > n_fixed:
+                seeds = seeds[np.sort(np.random.choice(seeds.shape[0], n_fixed, replace=False)), :]
+            space_filling = self.latin_hypercube_points(
+                n_fixed - seeds.shape[0], lower_bounds, upper_bounds)
+            self.fixed_discretization = np.concatenate((seeds, space_filling), axis=0)
+            seeds = np.zeros((0, dim_x))
+        else:
+            # Only the seeds that aren't in the fixed points are added, at most half of the
+            # points that are rebuilt.
+            distances = np.sum(
+                (seeds[:, np.newaxis, :] - self.fixed_discretization[np.newaxis, :, :]) ** 2,
+                axis=2)
+            seeds = seeds[np.min(distances, axis=1) > 0, :]
+            n_seeds = n_refinement / 2
+            if seeds.shape[0] > n_seeds:
+                seeds = seeds[np.sort(np.random.choice(seeds.shape[0], n_seeds, replace=False)), :]
+
+        points = np.concatenate((self.fixed_discretization, seeds), axis=0)
+        n_refinement -= seeds.shape[0]
+
+        z_values = np.array([-2.0, -1.0, 0.0, 1.0, 2.0])
+        if candidate is not None:
+            candidates = np.array(candidate, ndmin=2)
+        else:
+            candidates = self.random_points_domain(n_candidates)
+
+        centers = set()
+        for i in xrange(candidates.shape[0]):
+            vectors = self.bq.compute_posterior_parameters_kg(
+                points, candidates[i:i + 1, :], parallel=parallel)
+            if not np.all(np.isfinite(vectors['b'])):
+                continue
+            values = vectors['a'].reshape((-1, 1)) + np.outer(vectors['b'], z_values)
+            centers.update(np.argmax(values, axis=0))
+
+        # The quadratures cached above correspond to the discretization before the refinement
+        self.bq.cache_quadratures = {}
+        self.bq.cache_posterior_mean = {}
+        self.bq.cache_quadrature_with_candidate = {}
+
+        if len(centers) > 0 and n_refinement > 0:
+            centers = points[sorted(centers), :]
+            n_by_center = int(np.ceil(float(n_refinement) / centers.shape[0]))
+            scale = 0.05 * (upper_bounds - lower_bounds)
+
+            local_points = np.repeat(centers, n_by_center, axis=0)
+            local_points += np.random.normal(0, 1, local_points.shape) * scale
+            local_points = np.clip(local_points, lower_bounds, upper_bounds)
+            points = np.concatenate((points, local_points[0: n_refinement, :]), axis=0)
+
+        logger.info("Adaptive discretization with %d points" % points.shape[0])
+
+        return points
+
     def optimize(self, start=None, random_seed=None, parallel=True, monte_carlo=False, n_samples=1,
                  n_restarts_mc=1, n_best_restarts_mc=0, n_restarts=1, n_best_restarts=0,
                  start_ei=True, n_samples_parameters=0, start_new_chain=True,
@@ -1622,8 +1814,19 @@ class SBO(object):
         if default_restarts_mc is None:
             default_restarts_mc = n_restarts_mc
 
-        n_jobs = min(n_restarts, mp.cpu_count())
-        n_threads = max(int((mp.cpu_count() - n_jobs) / n_jobs), 1)
+        # The workers of the budget that aren't used by the restarts are used by the threads of
+        # each restart.
+        budget = Parallel.get_budget()
+        n_jobs = min(n_restarts, budget)
+        n_threads = max(int((budget - n_jobs) / n_jobs), 1)
+
+        if self.adaptive_discretization and not monte_carlo:
+            # The discretization is refined around the best candidate known so far
+            candidate = start
+            if candidate is None and len(self.optimization_results) > 0:
+                candidate = self.optimization_results[-1]['solution']
+            self.discretization = self.build_adaptive_discretization(
+                candidate=candidate, parallel=parallel)
 
         if n_samples_parameters > 0 and start_new_chain:
             self.bq.gp.start_new_chain()
@@ -1765,7 +1968,7 @@ class SBO(object):
                 start_points = np.array(start_points)
 
             if n_restarts > 0:
-                start = np.array(start_points)
+                start = combine_start_points(self.warm_start_store['acquisition'], start_points)
                 if n_best_restarts > 0 and n_best_restarts < n_restarts:
                     candidate_points = []
                     for i in xrange(n_restarts):
@@ -1798,10 +2001,15 @@ class SBO(object):
         else:
             n_restarts = 1
 
+        if monte_carlo and self.common_random_numbers and self.samples is None:
+            # The same samples are used in all the restarts of the optimization
+            self.generate_samples_starting_points_evaluate_mc(n_samples, n_restarts_mc)
+
         bounds = [tuple(bound) for bound in self.bounds_opt]
         opt_method = None
         compute_value_function = False
-        if n_samples_parameters == 0 and not monte_carlo:
+        if n_samples_parameters == 0 and (not monte_carlo or self.common_random_numbers):
+            # With common random numbers the MC estimator is a smooth function of the candidate
             #TODO: CHECK THIS
             optimization = Optimization(
                 LBFGS_NAME,
@@ -1810,7 +2018,7 @@ class SBO(object):
                 wrapper_gradient_voi,
                 minimize=False, **{'maxiter': 10})
 
-            if n_restarts > int( mp.cpu_count() / 2):
+            if n_restarts > int(budget / 2):
                 args = (False, None, parallel, 0, optimization, self, monte_carlo, n_samples,
                         n_restarts_mc, n_best_restarts_mc, opt_params_mc, n_threads,
                         n_samples_parameters, method_opt_mc)
@@ -1860,8 +2068,16 @@ class SBO(object):
             for j in xrange(n_restarts):
                 point_dict[j] = [start[j, :], random_seeds[j]]
 
+        # The restarts may run in a pool of processes, so the optima of a_{n+1} at the samples of
+        # the last candidate evaluated by each restart are returned with its results.
+        args = args[0:4] + (self, opt_method) + args[4:]
         optimal_solutions = Parallel.run_function_different_arguments_parallel(
-            opt_method, point_dict, *args, **kwargs)
+            wrapper_optimize_sbo, point_dict, *args, **kwargs)
+
+        optima_samples = {}
+        for j in xrange(n_restarts):
+            if optimal_solutions.get(j) is not None:
+                optima_samples[j] = optimal_solutions[j].pop('optima_samples', [])
 
         if compute_value_function:
             candidate_points = []
@@ -1946,6 +2162,11 @@ class SBO(object):
             optimal_solutions.get(ind_max)['gradient'] = 'unavailable'
 
         self.optimization_results.append(optimal_solutions.get(ind_max))
+        self.last_optima_samples = optima_samples.get(ind_max, [])
+
+        self.warm_start_store['acquisition'] = add_warm_start_points(
+            self.warm_start_store['acquisition'], [optimal_solutions.get(ind_max)['solution']],
+            MAX_WARM_START_POINTS)
 
         return optimal_solutions.get(ind_max)
 
@@ -1960,15 +2181,34 @@ class SBO(object):
         else:
             return 0
 
+    def get_warm_start_points_samples(self):
+        """
+        :return: [np.array(n)] warm starts of the optimizations of a_{n+1}: the optima of a_{n+1}
+            at the samples of the previous iterations, and then the optima of the posterior mean.
+        """
+        return self.warm_start_store['samples'] + self.bq.warm_start_solutions
+
+    def update_warm_start_store(self):
+        """
+        Adds the optima of a_{n+1} at the samples of the last evaluated candidate to the warm
+        starts. After optimize, the last evaluated candidate is the one of the best restart. It's
+        called before cleaning the cache.
+        """
+        self.warm_start_store['samples'] = add_warm_start_points(
+            self.warm_start_store['samples'], self.last_optima_samples, MAX_WARM_START_POINTS)
+        self.last_optima_samples = []
+
     def clean_cache(self):
         """
-        Cleans the cache
+        Cleans the cache. The warm starts (warm_start_store) are kept.
         """
+        self.update_warm_start_store()
         self.bq.clean_cache()
         self.samples = None
         self.optimal_samples = {}
         self.starting_points_sbo = None
         self.mc_bayesian = {}
+        self.warm_start_samples = {}
         self.bq.optimal_solutions = {}
 
     def write_debug_data(self, problem_name, model_type, training_name, n_training, random_seed,
@@ -2043,47 +2283,16 @@ class SBO(object):
         kernel_name = kernel_name[0: -1]
 
 
-        f_name = self._filename_points_voi_evaluations(
-                                                model_type=model_type,
-                                                problem_name=problem_name,
-                                                type_kernel=kernel_name,
-                                                training_name=training_name,
-                                                n_training=n_training,
-                                                random_seed=random_seed)
-
-        debug_path = path.join(debug_dir, f_name)
-
-        vectors = JSONFile.read(debug_path)
-
-
-        if vectors is None:
-            bounds = self.bq.gp.bounds
-            n_points = n_points_by_dimension
-            if n_points is None:
-                n_points = (bounds[0][1] - bounds[0][0]) * 10
-
-            bounds_x = [bounds[i] for i in xrange(len(bounds)) if i in self.bq.x_domain]
-            n_points_x = [n_points[i] for i in xrange(len(n_points)) if i in self.bq.x_domain]
-
-            points = []
-            for bound, number_points in zip(bounds_x, n_points_x):
-                points.append(np.linspace(bound[0], bound[1], number_points))
-
-            vectors = []
-            for point in itertools.product(*points):
-                vectors.append(point)
-
-            JSONFile.write(vectors, debug_path)
+        bounds = self.bq.gp.bounds
+        n_points = n_points_by_dimension
+        if n_points is None:
+            n_points = (bounds[0][1] - bounds[0][0]) * 10
 
+        bounds_x = [bounds[i] for i in xrange(len(bounds)) if i in self.bq.x_domain]
+        n_points_x = [n_points[i] for i in xrange(len(n_points)) if i in self.bq.x_domain]
 
         # TODO: extend to the case where w can be continuous
-        n = len(vectors)
-        points = deepcopy(vectors)
-        vectors = np.array(vectors)
-
-        # point_dict = {}
-        # for i in xrange(n):
-        #     point_dict[i] = vectors[i:i+1, :]
+        vectors = DiscretizationGrid.from_bounds(bounds_x, n_points_x).to_array()
 
         values = {}
         if self.bq.tasks:
@@ -2107,7 +2316,7 @@ class SBO(object):
         debug_path = path.join(debug_dir, f_name)
 
 
-        JSONFile.write({'points': points, 'evaluations': values}, debug_path)
+        JSONFile.write({'points': vectors, 'evaluations': values}, debug_path)
 
         return values
 
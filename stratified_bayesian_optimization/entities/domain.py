@@ -9,10 +9,12 @@ from schematics.types import(
     IntType,
     FloatType,
     BooleanType,
+    BaseType,
 )
 from schematics.types.compound import ListType, ModelType
 
 from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
 
 
 logger = SBOLog(__name__)
@@ -56,6 +58,32 @@ class BoundsEntity(Model):
             raise ModelValidationError("Lower bound is greater than upper bound")
 
 
+class DiscretizationType(BaseType):
+    """
+    Discretization of the domain of x: a DiscretizationGrid, which is kept as it is, or a list of
+    points [[float]].
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(DiscretizationType, self).__init__(*args, **kwargs)
+        self.list_type = ListType(ListType(FloatType))
+
+    def to_native(self, value, context=None):
+        if isinstance(value, DiscretizationGrid):
+            return value
+        return self.list_type.to_native(value, context)
+
+    def to_primitive(self, value, context=None):
+        if isinstance(value, DiscretizationGrid):
+            return value.to_array().tolist()
+        return self.list_type.to_primitive(value, context)
+
+    def validate(self, value):
+        if isinstance(value, DiscretizationGrid):
+            return value
+        return self.list_type.validate(value)
+
+
 class DomainEntity(Model):
     dim_x = IntType(required=True)
     choose_noise = BooleanType(required=True)
@@ -65,7 +93,7 @@ class DomainEntity(Model):
     dim_w = IntType()
     bounds_domain_w = ListType(ModelType(BoundsEntity))
     domain_w = ListType(ListType(FloatType))
-    discretization_domain_x = ListType(ListType(FloatType))
+    discretization_domain_x = DiscretizationType()
 
     @staticmethod
     def discretize_domain(bounds_domain, number_points_each_dimension):
@@ -3,19 +3,28 @@ from __future__ import absolute_import
 from os import path
 import os
 
+import json
+import ujson
+
+import numpy as np
+
 from stratified_bayesian_optimization.services.training_data import TrainingDataService
+from stratified_bayesian_optimization.services.results_index import ResultsIndex
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.lib.constant import (
     PARTIAL_RESULTS,
     PROBLEM_DIR,
     SBO_METHOD,
     MULTI_TASK_METHOD,
+    EXPORT_RESULTS_POINTS,
 )
 
 
 class Objective(object):
     _filename = 'results_{problem_name}_{training_name}_{n_points}_{random_seed}_{method}_' \
                 'samples_params_{n_samples_parameters}.json'.format
+    _filename_log = 'results_{problem_name}_{training_name}_{n_points}_{random_seed}_{method}_' \
+                    'samples_params_{n_samples_parameters}.jsonl'.format
 
     def __init__(self, problem_name, training_name, random_seed, n_training, n_samples=None,
                  noise=False, method=SBO_METHOD, n_samples_parameters=0, objective_function=None,
@@ -47,11 +56,9 @@ class Objective(object):
         self.objective_function = objective_function
         self.training_function = training_function
 
-        if objective_function is None:
-            name_module = TrainingDataService.get_name_module(problem_name)
-            self.module = __import__(name_module, globals(), locals(), -1)
-        else:
-            self.module = None
+        # The module of the problem is imported when the objective is evaluated for the first
+        # time, because several problems load large data files when they're imported.
+        self._module = None
 
         self.method = method
         self.n_samples_parameters = n_samples_parameters
@@ -70,8 +77,41 @@ class Objective(object):
             n_samples_parameters=self.n_samples_parameters,
         )
 
+        self.file_name = file_name
         self.file_path = path.join(dir, file_name)
 
+        file_name_log = self._filename_log(
+            problem_name=self.problem_name,
+            training_name=self.training_name,
+            n_points=self.n_training,
+            random_seed=self.random_seed,
+            method=self.method,
+            n_samples_parameters=self.n_samples_parameters,
+        )
+
+        # Append-only log with one line per evaluated point. It's rewritten with the whole
+        # history the first time a point is added, because the history may come from a
+        # previous run or from the JSON file.
+        self.file_path_log = path.join(dir, file_name_log)
+        self.log_synchronized = False
+
+    @property
+    def module(self):
+        """
+        :return: module of the problem, or None if objective_function is given.
+        """
+        if self._module is None and self.objective_function is None:
+            name_module = TrainingDataService.get_name_module(self.problem_name)
+            self._module = __import__(name_module, globals(), locals(), -1)
+
+        return self._module
+
+    def __getstate__(self):
+        # Modules can't be pickled, it's imported again when it's needed.
+        state = self.__dict__.copy()
+        state['_module'] = None
+        return state
+
     def add_point(self, point, model_objective_value):
         """
 
@@ -92,12 +132,104 @@ class Objective(object):
         if self.noise:
             self.standard_deviation_evaluations.append(eval[1])
 
-        data = self.serialize()
-        JSONFile.write(data, self.file_path)
+        self.write_log()
+
+        # The JSON file is exported when the first point is added, so it exists while the run is
+        # going, and then every EXPORT_RESULTS_POINTS points.
+        if (len(self.objective_values) - 1) % EXPORT_RESULTS_POINTS == 0:
+            self.export_json()
+
+        ResultsIndex.append(self.problem_name, self.file_name, len(self.objective_values) - 1,
+                            eval[0])
 
         return eval[0]
 
 
+    def get_record(self, index):
+        """
+        :param index: int
+        :return: {'point': [float], 'objective_value': float, 'model_objective_value': float,
+            'standard_deviation_evaluation': float or None}
+        """
+        std = None
+        if index < len(self.standard_deviation_evaluations):
+            std = self.standard_deviation_evaluations[index]
+
+        # The values may be numpy scalars, which json can't serialize.
+        return {
+            'point': np.asarray(self.evaluated_points[index]).tolist(),
+            'objective_value': np.asarray(self.objective_values[index]).tolist(),
+            'model_objective_value': np.asarray(self.model_objective_values[index]).tolist(),
+            'standard_deviation_evaluation': np.asarray(std).tolist(),
+        }
+
+    def write_log(self):
+        """
+        Appends the last evaluated point to the log. The line is written with only one call to
+        os.write, so a crash can't leave a partial record in the middle of the file.
+        """
+        if not self.log_synchronized:
+            tmp_path = self.file_path_log + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for index in xrange(len(self.objective_values)):
+                    f.write(json.dumps(self.get_record(index)) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.rename(tmp_path, self.file_path_log)
+            self.log_synchronized = True
+            return
+
+        line = json.dumps(self.get_record(len(self.objective_values) - 1)) + '\n'
+
+        fd = os.open(self.file_path_log, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def read_log(self):
+        """
+        Reads the log. A truncated last line is ignored.
+
+        :return: serialized data (see serialize) or None
+        """
+        if not path.exists(self.file_path_log):
+            return None
+
+        data = {
+            'evaluated_points': [],
+            'objective_values': [],
+            'model_objective_values': [],
+            'standard_deviation_evaluations': [],
+        }
+
+        with open(self.file_path_log) as f:
+            for line in f:
+                try:
+                    record = ujson.loads(line, precise_float=True)
+                except ValueError:
+                    continue
+
+                data['evaluated_points'].append(record['point'])
+                data['objective_values'].append(record['objective_value'])
+                data['model_objective_values'].append(record['model_objective_value'])
+
+                if record.get('standard_deviation_evaluation') is not None:
+                    data['standard_deviation_evaluations'].append(
+                        record['standard_deviation_evaluation'])
+
+        return data
+
+    def export_json(self):
+        """
+        Writes the history in the JSON file with the format of serialize. The file is written
+        atomically, so a crash while it's being rewritten doesn't lose the previous export.
+        """
+        tmp_path = self.file_path + '.tmp'
+        JSONFile.write(self.serialize(), tmp_path)
+        os.rename(tmp_path, self.file_path)
+
     def serialize(self):
         return {
             'evaluated_points': self.evaluated_points,
@@ -107,7 +239,10 @@ class Objective(object):
         }
 
     def set_data_from_file(self):
-        data = JSONFile.read(self.file_path)
+        data = self.read_log()
+
+        if data is None:
+            data = JSONFile.read(self.file_path)
 
         if data is None:
             return
@@ -13,6 +13,8 @@ from stratified_bayesian_optimization.lib.constant import (
     DEFAULT_RANDOM_SEED,
     LBFGS_NAME,
     DOGLEG,
+    DEFAULT_N_POINTS_ADAPTIVE_DISCRETIZATION,
+    DEFAULT_REFIT_THRESHOLD,
 )
 from stratified_bayesian_optimization.entities.domain import (
     BoundsEntity,
@@ -107,6 +109,25 @@ class RunSpecEntity(Model):
     optimize_only_posterior_mean = BooleanType(required=False)
     start_optimize_posterior_mean = IntType(required=False)
 
+    # SBO uses an adaptive discretization of the domain of x instead of a grid
+    adaptive_discretization = BooleanType(required=False)
+    n_points_adaptive_discretization = IntType(required=False)
+
+    # The MC estimator of SBO uses common random numbers and warm-started inner optimizations
+    common_random_numbers = BooleanType(required=False)
+
+    # The GP model is refitted after each iteration starting from its previous parameters
+    warm_start_gp = BooleanType(required=False)
+    refit_threshold = FloatType(required=False)
+
+    # BGO.run_spec loads the BGO object from a prepared run instead of building it, and it logs
+    # the time spent in each step of the startup.
+    use_prepared_run = BooleanType(required=False)
+    profile_startup = BooleanType(required=False)
+
+    # BGO.optimize writes the time spent in each phase of the iterations into a trace file
+    trace = BooleanType(required=False)
+
     @classmethod
     def from_json(cls, specfile):
         """
@@ -209,6 +230,19 @@ class RunSpecEntity(Model):
 
         start_optimize_posterior_mean = spec.get('start_optimize_posterior_mean', 0)
 
+        adaptive_discretization = spec.get('adaptive_discretization', False)
+        n_points_adaptive_discretization = spec.get(
+            'n_points_adaptive_discretization', DEFAULT_N_POINTS_ADAPTIVE_DISCRETIZATION)
+
+        common_random_numbers = spec.get('common_random_numbers', False)
+
+        warm_start_gp = spec.get('warm_start_gp', False)
+        refit_threshold = spec.get('refit_threshold', DEFAULT_REFIT_THRESHOLD)
+
+        use_prepared_run = spec.get('use_prepared_run', False)
+        profile_startup = spec.get('profile_startup', False)
+        trace = spec.get('trace', False)
+
         entry.update({
             'problem_name': problem_name,
             'dim_x': dim_x,
@@ -265,6 +299,14 @@ class RunSpecEntity(Model):
             'threshold_sbo': threshold_sbo,
             'parallel_training': parallel_training,
             'start_optimize_posterior_mean': start_optimize_posterior_mean,
+            'adaptive_discretization': adaptive_discretization,
+            'n_points_adaptive_discretization': n_points_adaptive_discretization,
+            'common_random_numbers': common_random_numbers,
+            'warm_start_gp': warm_start_gp,
+            'refit_threshold': refit_threshold,
+            'use_prepared_run': use_prepared_run,
+            'profile_startup': profile_startup,
+            'trace': trace,
         })
 
 
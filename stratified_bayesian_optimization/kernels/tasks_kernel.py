@@ -3,6 +3,8 @@ from __future__ import absolute_import
 import numpy as np
 
 from copy import deepcopy
+from collections import OrderedDict
+import threading
 
 from stratified_bayesian_optimization.kernels.abstract_kernel import AbstractKernel
 from stratified_bayesian_optimization.entities.parameter import ParameterEntity
@@ -11,10 +13,10 @@ from stratified_bayesian_optimization.lib.constant import (
     LOWER_TRIANG_NAME,
     SMALLEST_POSITIVE_NUMBER,
     SAME_CORRELATION,
+    MAX_STORED_TASKS_COVARIANCES,
 )
 from stratified_bayesian_optimization.lib.util import (
     get_number_parameters_kernel,
-    convert_dictionary_gradient_to_simple_dictionary,
 )
 from stratified_bayesian_optimization.priors.gaussian import GaussianPrior
 from stratified_bayesian_optimization.priors.multivariate_normal import MultivariateNormalPrior
@@ -24,6 +26,14 @@ from stratified_bayesian_optimization.priors.uniform import UniformPrior
 
 class TasksKernel(AbstractKernel):
 
+    # Cache of the task covariance matrices shared by all the kernels of the process:
+    # (n_tasks, same_correlation, tuple(params)) => (chol_base_cov_matrix, base_cov_matrix).
+    # The cached matrices must not be modified in place. The least recently used entries are
+    # evicted, and the cache is shared by the threads of the pools, so it's only accessed while
+    # holding _lock_base_cov.
+    _cache_base_cov = OrderedDict()
+    _lock_base_cov = threading.Lock()
+
     def __init__(self, n_tasks, lower_triang, same_correlation=False, **kernel_parameters):
         """
 
@@ -204,39 +214,77 @@ class TasksKernel(AbstractKernel):
         if self.base_cov_matrix is not None:
             return
 
-        if self.n_tasks == 1:
-            covM = np.zeros((self.n_tasks, self.n_tasks))
-            covM[0, 0] = self.lower_triang.value[0]
-            L = covM
-            self.chol_base_cov_matrix = L
-            self.base_cov_matrix = covM
+        self.chol_base_cov_matrix, self.base_cov_matrix = self.get_base_cov_matrix(
+            self.lower_triang.value, self.n_tasks, self.same_correlation)
 
-        if not self.same_correlation:
-            count = 0
-            L = np.zeros((self.n_tasks, self.n_tasks))
-            for i in range(self.n_tasks):
-                for j in range(i + 1):
-                    L[i, j] = np.exp(self.lower_triang.value[count + j])
-                count += i + 1
+    @classmethod
+    def get_base_cov_matrix(cls, params, n_tasks, same_correlation=False):
+        """
+        Get the covariance matrix between tasks and its "cholesky" matrix (it's the covariance
+        matrix when same_correlation is True) from the cache, computing them if they aren't there.
 
-            covM = np.dot(L, np.transpose(L))
-        else:
-            covM = np.zeros((self.n_tasks, self.n_tasks))
+        :param params: np.array(k)
+        :param n_tasks: (int)
+        :param same_correlation: (boolean)
+        :return: (np.array(n_tasks x n_tasks), np.array(n_tasks x n_tasks)) chol_base_cov_matrix,
+            base_cov_matrix
+        """
+        index = (n_tasks, same_correlation, tuple(params))
 
-            if self.n_tasks > 1:
-                value = self.lower_triang.value[1]
-                covM.fill(np.exp(value))
+        with cls._lock_base_cov:
+            matrices = cls._cache_base_cov.pop(index, None)
+            if matrices is not None:
+                cls._cache_base_cov[index] = matrices
+                return matrices
 
-                for i in xrange(self.n_tasks):
-                    covM[i, i] = np.exp(self.lower_triang.value[0]) + np.exp(value) * \
-                                                                      (self.n_tasks - 1 )
-            else:
-                covM[0, 0] = np.exp(self.lower_triang.value[0])
-            L = covM
+        matrices = cls.compute_base_cov_matrix(params, n_tasks, same_correlation)
+
+        with cls._lock_base_cov:
+            cls._cache_base_cov[index] = matrices
+            if len(cls._cache_base_cov) > MAX_STORED_TASKS_COVARIANCES:
+                cls._cache_base_cov.popitem(last=False)
+
+        return matrices
+
+    @classmethod
+    def clean_cache(cls):
+        """
+        Cleans the cache of task covariance matrices
+        """
+        with cls._lock_base_cov:
+            cls._cache_base_cov = OrderedDict()
+
+    @staticmethod
+    def compute_base_cov_matrix(params, n_tasks, same_correlation=False):
+        """
+        Compute the covariance matrix between tasks and its "cholesky" matrix (see
+        compute_cov_matrix).
 
+        :param params: np.array(k)
+        :param n_tasks: (int)
+        :param same_correlation: (boolean)
+        :return: (np.array(n_tasks x n_tasks), np.array(n_tasks x n_tasks)) chol_base_cov_matrix,
+            base_cov_matrix
+        """
+        params = np.asarray(params, dtype=float)
 
-        self.chol_base_cov_matrix = L
-        self.base_cov_matrix = covM
+        if not same_correlation:
+            # The entries of L are given by rows in params.
+            L = np.zeros((n_tasks, n_tasks))
+            L[np.tril_indices(n_tasks)] = np.exp(params[0: n_tasks * (n_tasks + 1) / 2])
+            covM = np.dot(L, np.transpose(L))
+
+            return L, covM
+
+        if n_tasks > 1:
+            value = np.exp(params[1])
+            covM = np.empty((n_tasks, n_tasks))
+            covM.fill(value)
+            covM[np.diag_indices(n_tasks)] = np.exp(params[0]) + value * (n_tasks - 1)
+        else:
+            covM = np.array([[np.exp(params[0])]])
+
+        return covM, covM
 
     def cross_cov(self, inputs_1, inputs_2):
         """
@@ -248,13 +296,21 @@ class TasksKernel(AbstractKernel):
 
         self.compute_cov_matrix()
 
-        s, t = np.meshgrid(inputs_1, inputs_2)
-        s = s.astype(int)
-        t = t.astype(int)
+        return self.cross_cov_given_base_cov(self.base_cov_matrix, inputs_1, inputs_2)
+
+    @staticmethod
+    def cross_cov_given_base_cov(base_cov_matrix, inputs_1, inputs_2):
+        """
 
-        cov = self.base_cov_matrix[s, t].transpose()
+        :param base_cov_matrix: np.array(n_tasks x n_tasks)
+        :param inputs_1: np.array(nx1)
+        :param inputs_2: np.array(mx1)
+        :return: np.array(nxm)
+        """
+        s = np.ravel(inputs_1).astype(int)
+        t = np.ravel(inputs_2).astype(int)
 
-        return cov
+        return base_cov_matrix[np.ix_(s, t)]
 
     def gradient_respect_parameters(self, inputs):
         """
@@ -273,16 +329,9 @@ class TasksKernel(AbstractKernel):
         gradient_base_tasks = GradientTasksKernel.gradient_respect_parameters(
             self.chol_base_cov_matrix, self.n_tasks, self.same_correlation)
 
-        N = inputs.shape[0]
-
         for param_index in range(self.lower_triang.dimension):
-            der_covariance = np.zeros((N, N))
-            for i in range(N):
-                for j in range(i + 1):
-                    der_covariance[i, j] = \
-                        gradient_base_tasks[param_index][inputs[i, 0], inputs[j, 0]]
-                    der_covariance[j, i] = der_covariance[i, j]
-            gradient[self.lower_triang.name][param_index] = der_covariance
+            gradient[self.lower_triang.name][param_index] = self.cross_cov_given_base_cov(
+                gradient_base_tasks[param_index], inputs, inputs)
 
         return gradient
 
@@ -338,10 +387,8 @@ class TasksKernel(AbstractKernel):
 
         :return: cov(inputs) where the kernel is defined with params
         """
-        same_correlation = kwargs.get(SAME_CORRELATION, False)
-        task_kernels = cls.define_kernel_from_array(dimension, params,
-                                                    same_correlation=same_correlation)
-        return task_kernels.cov(inputs)
+        return cls.evaluate_cross_cov_defined_by_params(params, inputs, inputs, dimension,
+                                                        **kwargs)
 
     @classmethod
     def evaluate_cross_cov_defined_by_params(cls, params, inputs_1, inputs_2, dimension, **kwargs):
@@ -357,10 +404,9 @@ class TasksKernel(AbstractKernel):
         :return: (np.array(nxk)) cov(inputs_1, inputs_2) where the kernel is defined with params
         """
         same_correlation = kwargs.get(SAME_CORRELATION, False)
-        task_kernels = cls.define_kernel_from_array(dimension, params,
-                                                    same_correlation=same_correlation)
+        chol, base_cov_matrix = cls.get_base_cov_matrix(params, dimension, same_correlation)
 
-        return task_kernels.cross_cov(inputs_1, inputs_2)
+        return cls.cross_cov_given_base_cov(base_cov_matrix, inputs_1, inputs_2)
 
     @classmethod
     def evaluate_hessian_respect_point(cls, params, point, inputs, dimension):
@@ -390,13 +436,15 @@ class TasksKernel(AbstractKernel):
         }
         """
         same_correlation = kwargs.get(SAME_CORRELATION, False)
-        task_kernels = cls.define_kernel_from_array(dimension, params,
-                                                    same_correlation=same_correlation)
-        gradient = task_kernels.gradient_respect_parameters(inputs)
+        chol, base_cov_matrix = cls.get_base_cov_matrix(params, dimension, same_correlation)
 
-        names = task_kernels.name_parameters_as_list
+        gradient_base_tasks = GradientTasksKernel.gradient_respect_parameters(
+            chol, dimension, same_correlation)
 
-        gradient = convert_dictionary_gradient_to_simple_dictionary(gradient, names)
+        gradient = {}
+        for param_index in xrange(len(gradient_base_tasks)):
+            gradient[param_index] = cls.cross_cov_given_base_cov(
+                gradient_base_tasks[param_index], inputs, inputs)
 
         return gradient
 
@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+
+import threading
+
+import numpy as np
+
+from stratified_bayesian_optimization.lib.constant import MAX_STORED_CACHE_KEYS
+
+
+class CacheKeys(object):
+    """
+    Keys of the caches of a model. A key is (data version, values id):
+
+    - the data version changes each time that the training data of the model change, so entries
+      computed with old data are never hit even if the caches weren't cleaned.
+    - the values id is an int assigned to each set of values (e.g. hyperparameters, or the
+      hyperparameters and a point), so the caches are indexed by two ints instead of tuples of
+      floats.
+    """
+
+    def __init__(self):
+        self.data_version = 0
+        self._ids = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def new_data_version(self):
+        self.data_version += 1
+
+    def get_id(self, *values):
+        """
+        Two sets of values have the same id only if all their entries are equal.
+
+        :param values: floats or np.arrays
+        :return: int
+        """
+        key = tuple(np.asarray(value, dtype=float).tostring() for value in values)
+
+        values_id = self._ids.get(key)
+        if values_id is not None:
+            return values_id
+
+        # The ids are never reused, so forgetting the old ids only causes cache misses.
+        with self._lock:
+            values_id = self._ids.get(key)
+            if values_id is None:
+                if len(self._ids) >= MAX_STORED_CACHE_KEYS:
+                    self._ids = {}
+                values_id = self._next_id
+                self._next_id += 1
+                self._ids[key] = values_id
+
+        return values_id
+
+    def get_key(self, *values):
+        """
+        :param values: floats or np.arrays
+        :return: (int, int)
+        """
+        return (self.data_version, self.get_id(*values))
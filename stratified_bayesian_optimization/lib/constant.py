@@ -21,6 +21,15 @@ GP_DIR = 'data/gp_models'
 # Directory of log messages
 LOG_DIR = 'data/log'
 
+# Directory of the prepared runs (BGO objects built by BGO.from_spec)
+PREPARED_RUNS_DIR = 'data/prepared_runs'
+
+# Directory of the traces written by BGO.optimize (see Instrumentation)
+TRACES_DIR = 'data/traces'
+
+# Directory of the baseline of the benchmarks (see BenchmarkService)
+BENCHMARKS_DIR = 'data/benchmarks'
+
 # Directory of problems
 PROBLEM_DIR = 'problems'
 
@@ -80,6 +89,24 @@ QUADRATURES = 'quadrature'
 POSTERIOR_MEAN = 'posterior_mean'
 B_NEW = 'quadratures_with_candidate'
 
+# Maximum number of sets of parameters of the kernel kept in the store of quadratures of the
+# discretization
+MAX_STORED_QUADRATURES = 20
+
+# Maximum number of sets of parameters kept in the cache of task covariance matrices of
+# TasksKernel
+MAX_STORED_TASKS_COVARIANCES = 1000
+
+# Default number of points of the adaptive discretization of the domain of x used by SBO
+DEFAULT_N_POINTS_ADAPTIVE_DISCRETIZATION = 200
+
+# Warm-started refits of the GP model: a full refit (or a full burning of the MCMC chain) is done
+# only if the log-likelihood per training point of the previous parameters changes more than
+# this threshold after adding the new points.
+DEFAULT_REFIT_THRESHOLD = 0.1
+# Fraction of n_burning used to continue the MCMC chain when the refit is warm-started.
+WARM_START_BURNING_FRACTION = 0.1
+
 #BGO methods
 SBO_METHOD = 'sbo'
 MULTI_TASK_METHOD = 'multi_task'
@@ -88,6 +115,9 @@ SDE_METHOD = 'sde'
 
 #Directory of solutions of BGO in the different iterations
 PARTIAL_RESULTS = 'partial_results'
+# The results of a run are appended to a log after each point, and the JSON file of the results,
+# which is read by other scripts while the run is going, is exported every this number of points.
+EXPORT_RESULTS_POINTS = 10
 AGGREGATED_RESULTS = 'aggregated_results'
 
 #Directory of debugging
@@ -98,4 +128,32 @@ BAYESIAN_QUADRATURE = 'bayesian_quadrature'
 # Default number of sampled parameters
 DEFAULT_N_PARAMETERS = 20
 
-DEFAULT_N_SAMPLES = 100
\ No newline at end of file
+DEFAULT_N_SAMPLES = 100
+
+# Names of the counters of Instrumentation
+CHOLESKY_COUNTER = 'cholesky'
+CACHE_HITS_COUNTER = 'cache_hits'
+CACHE_MISSES_COUNTER = 'cache_misses'
+KERNEL_EVALUATIONS_COUNTER = 'kernel_evaluations'
+POOLS_COUNTER = 'pools'
+POOL_JOBS_COUNTER = 'pool_jobs'
+SEQUENTIAL_FALLBACKS_COUNTER = 'sequential_fallbacks'
+
+# Environment variables and functions of the shared libraries that set the number of threads of
+# BLAS (OpenBLAS and MKL).
+BLAS_THREADS_VARIABLES = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+BLAS_SET_THREADS_FUNCTIONS = ['openblas_set_num_threads', 'MKL_Set_Num_Threads']
+
+# Methods used by SampleFunctions.sample_from_gp
+MULTIVARIATE_NORMAL_SAMPLING = 'multivariate_normal'
+CHOLESKY_SAMPLING = 'cholesky'
+FOURIER_FEATURES_SAMPLING = 'fourier_features'
+
+# Maximum number of Cholesky decompositions kept in the cache of SampleFunctions
+MAX_STORED_CHOLESKY_SAMPLING = 10
+
+# Maximum number of sets of values with an id in CacheKeys
+MAX_STORED_CACHE_KEYS = 100000
+
+# Maximum number of warm starts of each kind kept across iterations by SBO and BayesianQuadrature
+MAX_WARM_START_POINTS = 10
@@ -0,0 +1,168 @@
+from __future__ import absolute_import
+
+import os
+
+import numpy as np
+
+
+class DiscretizationGrid(object):
+    """
+    Uniform discretization of a box, defined by the linspace of each axis. The points of the grid
+    are the ones of itertools.product(*axes), i.e. the last axis changes fastest.
+
+    The points are computed from their indexes when they are requested, and the contiguous array
+    with all the points is built only once, the first time that it's needed (e.g. by np.array).
+    The quadratures of BayesianQuadrature are computed over all the points, so a grid used by SBO
+    is materialized in its first evaluation. The grid can also be read with memory mapping from a
+    .npy file.
+    """
+
+    def __init__(self, axes=None, array=None):
+        """
+
+        :param axes: [np.array], points of each axis.
+        :param array: np.array(nxd), all the points of the grid. It's required if axes is None.
+        """
+        if axes is None and array is None:
+            raise ValueError("Either axes or array is required")
+
+        if axes is not None:
+            axes = [np.asarray(axis, dtype=float) for axis in axes]
+
+        self.axes = axes
+        self._array = array
+
+    @classmethod
+    def from_bounds(cls, bounds, number_points_each_dimension):
+        """
+        :param bounds: [[float, float]], lower and upper bound of each dimension.
+        :param number_points_each_dimension: [int]
+        :return: DiscretizationGrid
+        """
+        if len(number_points_each_dimension) != len(bounds):
+            raise ValueError("Dimensions are wrong!")
+
+        axes = [np.linspace(bound[0], bound[1], number_points) for bound, number_points in
+                zip(bounds, number_points_each_dimension)]
+
+        return cls(axes=axes)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Open a grid with memory mapping (read only), or return None if it doesn't exist.
+
+        :param filename: (str) .npy file
+        :return: DiscretizationGrid or None
+        """
+        if not os.path.exists(filename):
+            return None
+
+        return cls(array=np.load(filename, mmap_mode='r'))
+
+    def save(self, filename):
+        """
+        Write all the points of the grid into a .npy file.
+
+        :param filename: str
+        """
+        # Several processes may build the same grid, so the file is written atomically.
+        tmp_filename = filename + '.%d.tmp' % os.getpid()
+        with open(tmp_filename, 'wb') as f:
+            np.save(f, self.to_array())
+        os.rename(tmp_filename, filename)
+
+    @property
+    def shape(self):
+        """
+        :return: (int, int)
+        """
+        if self._array is not None:
+            return self._array.shape
+
+        return (int(np.prod([len(axis) for axis in self.axes])), len(self.axes))
+
+    @property
+    def ndim(self):
+        return 2
+
+    def __len__(self):
+        return self.shape[0]
+
+    def get_points(self, indexes):
+        """
+        Computes the points of the grid given by indexes, without building the whole grid.
+
+        :param indexes: (int) or [int]
+        :return: np.array(d) if indexes is an int, np.array(kxd) otherwise.
+        """
+        if self._array is not None:
+            return np.array(self._array[indexes])
+
+        entries = np.unravel_index(indexes, [len(axis) for axis in self.axes])
+
+        if np.ndim(indexes) == 0:
+            return np.array([axis[entry] for axis, entry in zip(self.axes, entries)])
+
+        return np.column_stack([axis[entry] for axis, entry in zip(self.axes, entries)])
+
+    def iter_chunks(self, chunk_size):
+        """
+        Iterates over the points of the grid in chunks.
+
+        :param chunk_size: int
+        :return: generator of np.array(kxd), k <= chunk_size
+        """
+        n_points = len(self)
+        for start in xrange(0, n_points, chunk_size):
+            yield self.get_points(np.arange(start, min(start + chunk_size, n_points)))
+
+    def to_array(self):
+        """
+        :return: np.array(nxd), all the points of the grid.
+        """
+        if self._array is None:
+            mesh = np.meshgrid(*self.axes, indexing='ij')
+            self._array = np.ascontiguousarray(
+                np.column_stack([entries.ravel() for entries in mesh]), dtype=float)
+
+        return self._array
+
+    def __array__(self, dtype=None):
+        array = self.to_array()
+
+        if dtype is not None:
+            return array.astype(dtype)
+
+        return array
+
+    def __getitem__(self, key):
+        """
+        Supports the indexing used on np.array(nxd): grid[i], grid[indexes], grid[start:end],
+        grid[indexes, :], ...
+        """
+        columns = None
+        if isinstance(key, tuple):
+            columns = key[1:]
+            key = key[0]
+
+        if isinstance(key, slice):
+            indexes = np.arange(*key.indices(len(self)))
+        else:
+            indexes = np.asarray(key)
+            if indexes.dtype == bool:
+                indexes = np.nonzero(indexes)[0]
+            elif indexes.ndim == 0:
+                indexes = int(indexes)
+
+        points = self.get_points(indexes)
+
+        if columns is not None:
+            points = points[(Ellipsis, ) + columns]
+
+        return points
+
+    def __iter__(self):
+        for chunk in self.iter_chunks(1000):
+            for point in chunk:
+                yield point
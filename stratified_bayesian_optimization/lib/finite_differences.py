@@ -2,21 +2,50 @@ from __future__ import absolute_import
 
 from collections import defaultdict
 
-from copy import deepcopy
-
 import numpy as np
 
+from stratified_bayesian_optimization.lib.parallel import Parallel
+
 
 class FiniteDifferences(object):
 
     @staticmethod
-    def forward_difference(f, x, dh):
+    def evaluate_stencil(f, points, vectorized=False, parallel=False):
+        """
+        Evaluates f on all the points of a stencil.
+
+        :param f: function of np.array(n) if vectorized is False. Otherwise, it's a function of
+            np.array(kxn) whose output has the evaluation of each point in its first axis.
+        :param points: np.array(kxn)
+        :param vectorized: (boolean) If True, f is called only once with all the points.
+        :param parallel: (boolean) If True and f isn't vectorized, the points are evaluated in
+            parallel. f has to be picklable, e.g. a function defined at module level.
+        :return: [output of f], the evaluation of each point.
+        """
+
+        if vectorized:
+            values = f(points)
+            return [values[i] for i in xrange(points.shape[0])]
+
+        if parallel:
+            arguments = {i: points[i, :] for i in xrange(points.shape[0])}
+            values = Parallel.run_function_different_arguments_parallel(
+                f, arguments, all_success=True)
+            return [values[i] for i in xrange(points.shape[0])]
+
+        return [f(points[i, :]) for i in xrange(points.shape[0])]
+
+    @classmethod
+    def forward_difference(cls, f, x, dh, vectorized=False, parallel=False):
         """
-        Computes the gradient using forward differences.
+        Computes the gradient using forward differences. The perturbed points are built as one
+        array, see evaluate_stencil.
 
         :param f: scalar or vectorial function (output as np.array(mxk))
         :param x: np.array(n)
         :param dh: np.array(n) or np.array(1)
+        :param vectorized: (boolean) If True, f is evaluated on all the points at once.
+        :param parallel: (boolean) If True and f isn't vectorized, f is evaluated in parallel.
         :return: {(int) i: np.array(mxk)}, each entry of the dictionary are the finite differences
             of f respect to the ith entry of x.
         """
@@ -25,26 +54,33 @@ class FiniteDifferences(object):
         if n != len(dh):
             dh = np.zeros(n) + dh[0]
 
+        # The first point is x, and the (i+1)th point is x + dh[i] * e_i.
+        points = np.tile(x, (n + 1, 1))
+        for i in xrange(n):
+            points[i + 1, i] = x[i] + dh[i]
+
+        values = cls.evaluate_stencil(f, points, vectorized=vectorized, parallel=parallel)
+
         finite_differences = defaultdict()
 
-        base_value = f(x)
+        base_value = values[0]
 
         for i in xrange(n):
-            new_x = deepcopy(x)
-            new_x[i] = x[i] + dh[i]
-            new_evaluation = f(new_x)
-            finite_differences[i] = (new_evaluation - base_value) / dh[i]
+            finite_differences[i] = (values[i + 1] - base_value) / dh[i]
 
         return finite_differences
 
-    @staticmethod
-    def second_order_central(f, x, dh):
+    @classmethod
+    def second_order_central(cls, f, x, dh, vectorized=False, parallel=False):
         """
-        Computes the Hessian using second order central differences.
+        Computes the Hessian using second order central differences. The perturbed points are
+        built as one array, see evaluate_stencil.
 
         :param f: scalar or vectorial function (output as np.array(mxk))
         :param x: np.array(n)
         :param dh: np.array(n) or np.array(1)
+        :param vectorized: (boolean) If True, f is evaluated on all the points at once.
+        :param parallel: (boolean) If True and f isn't vectorized, f is evaluated in parallel.
         :return: {(i, j): np.array(mxk)}, each entry of the dictionary are the finite differences
             of f respect to the ith and jth entry of x.
         """
@@ -53,52 +89,50 @@ class FiniteDifferences(object):
         if n != len(dh):
             dh = np.zeros(n) + dh[0]
 
-        finite_differences = defaultdict()
-
-        base_value = f(x)
-
+        # Index of the point x + sign_i * dh[i] * e_i + sign_j * dh[j] * e_j in the stencil.
+        # The key (i, sign_i, None, 0) is used for the points where only the ith entry changes.
+        indexes = {}
+        perturbations = [[]]
         for i in xrange(n):
-            forward_x = deepcopy(x)
-            forward_x[i] = x[i] + dh[i]
-            value_f = f(forward_x)
-
-            backward_x = deepcopy(x)
-            backward_x[i] = x[i] - dh[i]
-            value_b = f(backward_x)
-
-            val = (value_f + value_b - 2.0 * base_value) / (dh[i] ** 2)
-
-            finite_differences[(i, i)] = val
+            for sign in [1, -1]:
+                indexes[(i, sign, None, 0)] = len(perturbations)
+                perturbations.append([(i, sign)])
 
             for j in xrange(i + 1, n):
-                forward = deepcopy(forward_x)
-                forward[j] = forward_x[j] + dh[j]
+                for sign_i, sign_j in [(1, 1), (1, -1), (-1, -1), (-1, 1)]:
+                    indexes[(i, sign_i, j, sign_j)] = len(perturbations)
+                    perturbations.append([(i, sign_i), (j, sign_j)])
+
+        points = np.tile(x, (len(perturbations), 1))
+        for index, perturbation in enumerate(perturbations):
+            for i, sign in perturbation:
+                points[index, i] = x[i] + sign * dh[i]
 
-                val_0 = f(forward)
+        values = cls.evaluate_stencil(f, points, vectorized=vectorized, parallel=parallel)
 
-                forward_2 = deepcopy(forward_x)
-                forward_2[j] = forward_x[j] - dh[j]
+        finite_differences = defaultdict()
 
-                val_1 = f(forward_2)
+        base_value = values[0]
 
-                backward = deepcopy(backward_x)
-                backward[j] = backward_x[j] - dh[j]
+        for i in xrange(n):
+            value_f = values[indexes[(i, 1, None, 0)]]
+            value_b = values[indexes[(i, -1, None, 0)]]
 
-                val_2 = f(backward)
+            val = (value_f + value_b - 2.0 * base_value) / (dh[i] ** 2)
 
-                backward_2 = deepcopy(backward_x)
-                backward_2[j] = backward_x[j] + dh[j]
+            finite_differences[(i, i)] = val
 
-                val_3 = f(backward_2)
+            for j in xrange(i + 1, n):
+                val_0 = values[indexes[(i, 1, j, 1)]]
+                val_1 = values[indexes[(i, 1, j, -1)]]
+                val_2 = values[indexes[(i, -1, j, -1)]]
+                val_3 = values[indexes[(i, -1, j, 1)]]
 
                 val = val_0 + val_2 - val_1 - val_3
 
-
                 val /= 4.0 * dh[j] * dh[i]
 
                 finite_differences[(i, j)] = val
                 finite_differences[(j, i)] = val
 
         return finite_differences
-
-
@@ -0,0 +1,203 @@
+from __future__ import absolute_import
+
+from contextlib import contextmanager
+from collections import OrderedDict
+import os
+import resource
+import time
+
+import ujson
+
+
+class Instrumentation(object):
+    """
+    Timers and counters of a run. BGO.optimize times each phase of an iteration, and the hot
+    paths (Cholesky factorizations, look-ups in the caches of the models, evaluations of the
+    kernels and jobs sent to the pools) increment counters. At the end of each iteration, the
+    timers, the counters and the memory used are appended as one JSON line to the trace file, and
+    they are reset.
+
+    Nothing is recorded while it's disabled, which is the default. The counters are kept per
+    process, so the work done by the workers of a pool isn't counted.
+    """
+
+    _enabled = False
+    _trace_file = None
+
+    _timers = OrderedDict()
+    _counters = OrderedDict()
+
+    @classmethod
+    def enable(cls, trace_file=None):
+        """
+        :param trace_file: (str) JSON-lines file where the iterations are written, or None to
+            only keep the timers and counters in memory.
+        """
+        cls._enabled = True
+        cls._trace_file = trace_file
+        cls.reset()
+
+    @classmethod
+    def disable(cls):
+        cls._enabled = False
+        cls._trace_file = None
+        cls.reset()
+
+    @classmethod
+    def is_enabled(cls):
+        return cls._enabled
+
+    @classmethod
+    def reset(cls):
+        cls._timers = OrderedDict()
+        cls._counters = OrderedDict()
+
+    @classmethod
+    def count(cls, name, n=1):
+        """
+        :param name: str
+        :param n: int
+        """
+        if not cls._enabled:
+            return
+        cls._counters[name] = cls._counters.get(name, 0) + n
+
+    @classmethod
+    def add_time(cls, name, seconds):
+        """
+        :param name: str
+        :param seconds: float
+        """
+        if not cls._enabled:
+            return
+        cls._timers[name] = cls._timers.get(name, 0.0) + seconds
+
+    @classmethod
+    @contextmanager
+    def timer(cls, name):
+        """
+        Adds the time spent in the block to the timer name, e.g.
+
+            with Instrumentation.timer('write_gp_model'):
+                ...
+
+        :param name: str
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            cls.add_time(name, time.time() - start)
+
+    @staticmethod
+    def get_memory():
+        """
+        :return: {'max_rss': float, 'max_rss_children': float} peak resident memory in MB of this
+            process and of its terminated children (e.g. the workers of the pools).
+        """
+        # ru_maxrss is in KB on Linux.
+        return {
+            'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+            'max_rss_children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024.0,
+        }
+
+    @staticmethod
+    def get_resident_memory():
+        """
+        :return: {'rss': float, 'peak_rss': float} current and peak resident memory in MB of this
+            process, or None if /proc/self/status doesn't exist (i.e. not on Linux).
+        """
+        if not os.path.exists('/proc/self/status'):
+            return None
+
+        memory = {}
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    memory['rss'] = float(line.split()[1]) / 1024.0
+                elif line.startswith('VmHWM:'):
+                    memory['peak_rss'] = float(line.split()[1]) / 1024.0
+
+        if len(memory) < 2:
+            return None
+
+        return memory
+
+    @staticmethod
+    def reset_peak_memory():
+        """
+        Resets the peak resident memory of this process to its current resident memory (Linux
+        >= 4.0), so that the peak of an operation can be read after it runs.
+
+        :return: (boolean) True if the peak was reset.
+        """
+        try:
+            with open('/proc/self/clear_refs', 'w') as f:
+                f.write('5')
+        except (IOError, OSError):
+            return False
+
+        return True
+
+    @classmethod
+    def get_record(cls, iteration, **extra):
+        """
+        :param iteration: (int) or str, e.g. 'startup'
+        :param extra: additional entries of the record
+        :return: dict
+        """
+        record = OrderedDict()
+        record['iteration'] = iteration
+        record['time'] = time.time()
+        record['timers'] = cls._timers
+        record['counters'] = cls._counters
+        record['memory'] = cls.get_memory()
+        record.update(extra)
+        return record
+
+    @classmethod
+    def write_iteration(cls, iteration, **extra):
+        """
+        Appends the record of the iteration to the trace file, and resets the timers and
+        counters.
+
+        :param iteration: (int) or str, e.g. 'startup'
+        :param extra: additional entries of the record
+        :return: dict, the record or None if it's disabled.
+        """
+        if not cls._enabled:
+            return None
+
+        record = cls.get_record(iteration, **extra)
+
+        if cls._trace_file is not None:
+            directory = os.path.dirname(cls._trace_file)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            with open(cls._trace_file, 'a') as f:
+                f.write(ujson.dumps(record) + '\n')
+
+        cls.reset()
+
+        return record
+
+    @staticmethod
+    def read_trace(trace_file):
+        """
+        :param trace_file: str
+        :return: [dict]
+        """
+        records = []
+
+        if not os.path.exists(trace_file):
+            return records
+
+        with open(trace_file) as f:
+            for line in f:
+                try:
+                    records.append(ujson.loads(line))
+                except ValueError:
+                    continue
+
+        return records
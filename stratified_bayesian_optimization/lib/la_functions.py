@@ -4,6 +4,9 @@ import numpy as np
 from scipy.linalg import lapack
 from scipy import linalg
 
+from stratified_bayesian_optimization.lib.constant import CHOLESKY_COUNTER
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
+
 
 def cholesky(cov, max_tries=5):
     """
@@ -13,6 +16,8 @@ def cholesky(cov, max_tries=5):
     :return: L
     """
 
+    Instrumentation.count(CHOLESKY_COUNTER)
+
     cov = np.ascontiguousarray(cov)
     L, info = lapack.dpotrf(cov, lower=1)
 
@@ -1,16 +1,209 @@
 from __future__ import absolute_import
 
+import ctypes
 import multiprocessing as mp
 import multiprocessing.pool
 from multiprocessing.pool import ThreadPool
+import os
+import threading
 
 
 from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.lib.constant import (
+    POOLS_COUNTER,
+    POOL_JOBS_COUNTER,
+    SEQUENTIAL_FALLBACKS_COUNTER,
+    BLAS_THREADS_VARIABLES,
+    BLAS_SET_THREADS_FUNCTIONS,
+)
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
 
 logger = SBOLog(__name__)
 
 
 class Parallel(object):
+    """
+    Runs a function on several arguments in a pool of processes or threads.
+
+    The pools share a budget of workers: the top-level pool may use get_max_processes() workers,
+    and the budget of each worker is the budget of its pool divided by its number of workers.
+    Nested calls inside a worker run sequentially when the budget of the worker is exhausted. The
+    BLAS threads of the workers of the process pools are pinned to their budget, and while a
+    thread pool runs they're pinned to the budget of its threads, so the machine isn't
+    oversubscribed.
+    """
+
+    # Maximum number of processes used by a pool, it's mp.cpu_count() if it's None. It's set
+    # when several specs run at the same time on the same machine.
+    _max_processes = None
+
+    # If True, the BLAS threads of the workers of the process pools, and of the thread pools while
+    # they run, are pinned to their budget.
+    _pin_blas_threads = True
+
+    # Budget of the current process if it's a worker of a pool, and None otherwise.
+    _budget = None
+
+    # Budget of the current thread if it's a worker of a thread pool.
+    _thread_budget = threading.local()
+
+    @classmethod
+    def set_max_processes(cls, max_processes):
+        """
+        Cap the number of processes used by each pool.
+
+        :param max_processes: (int) or None to use all the cpus.
+        """
+        cls._max_processes = max_processes
+
+    @classmethod
+    def get_max_processes(cls):
+        """
+        :return: int
+        """
+        if cls._max_processes is None:
+            return mp.cpu_count()
+        return max(1, min(cls._max_processes, mp.cpu_count()))
+
+    @classmethod
+    def set_pin_blas_threads(cls, pin_blas_threads):
+        """
+        :param pin_blas_threads: (boolean) If True, the BLAS threads of the workers of the process
+            pools, and of the thread pools while they run, are pinned to their budget.
+        """
+        cls._pin_blas_threads = pin_blas_threads
+
+    @classmethod
+    def is_worker(cls):
+        """
+        :return: (boolean) True if it's called from a worker of a pool.
+        """
+        return cls._budget is not None or \
+            getattr(cls._thread_budget, 'budget', None) is not None
+
+    @classmethod
+    def get_budget(cls):
+        """
+        :return: (int) number of workers that the current process or thread can use.
+        """
+        budget = getattr(cls._thread_budget, 'budget', None)
+        if budget is not None:
+            return budget
+        if cls._budget is not None:
+            return cls._budget
+        return cls.get_max_processes()
+
+    @classmethod
+    def _init_process_worker(cls, budget):
+        """
+        Initializer of the workers of the process pools.
+
+        :param budget: int
+        """
+        cls._budget = budget
+        if cls._pin_blas_threads:
+            cls.set_blas_threads(budget)
+
+    @classmethod
+    def _init_thread_worker(cls, budget):
+        """
+        Initializer of the workers of the thread pools.
+
+        :param budget: int
+        """
+        cls._thread_budget.budget = budget
+
+    @classmethod
+    def get_process_pool(cls, n_jobs):
+        """
+        Creates a pool of processes whose workers share the budget of the current process. The
+        workers are initialized as the ones of run_function_different_arguments_parallel, so the
+        nested calls inside them run sequentially when their budget is exhausted.
+
+        :param n_jobs: (int) number of jobs that will be run in the pool
+        :return: mp.Pool
+        """
+        budget = cls.get_budget()
+        n_workers = max(1, min(n_jobs, budget))
+        return mp.Pool(processes=n_workers, initializer=cls._init_process_worker,
+                       initargs=(max(1, budget / n_workers), ))
+
+    @staticmethod
+    def get_blas_libraries():
+        """
+        :return: [str] paths of the BLAS libraries loaded by this process. It's empty if
+            /proc/self/maps doesn't exist (i.e. not on Linux).
+        """
+        if not os.path.exists('/proc/self/maps'):
+            return []
+
+        libraries = []
+        with open('/proc/self/maps') as f:
+            for line in f:
+                library = line.split()[-1]
+                name = os.path.basename(library).lower()
+                if ('blas' in name or 'mkl_rt' in name) and '.so' in name and \
+                        library not in libraries:
+                    libraries.append(library)
+
+        return libraries
+
+    @classmethod
+    def set_blas_threads(cls, n_threads):
+        """
+        Sets the number of threads used by BLAS in this process, and in the processes that it
+        starts later.
+
+        :param n_threads: int
+        :return: (boolean) True if the number of threads of a loaded BLAS library was set.
+        """
+        for variable in BLAS_THREADS_VARIABLES:
+            os.environ[variable] = str(n_threads)
+
+        success = False
+        for library in cls.get_blas_libraries():
+            try:
+                library = ctypes.CDLL(library)
+            except OSError:
+                continue
+
+            for name in BLAS_SET_THREADS_FUNCTIONS:
+                function = getattr(library, name, None)
+                if function is not None:
+                    function(ctypes.c_int(n_threads))
+                    success = True
+
+        return success
+
+    @staticmethod
+    def get_blas_threads_variables():
+        """
+        :return: {str: str or None} values of the environment variables of the number of BLAS
+            threads.
+        """
+        return dict((variable, os.environ.get(variable)) for variable in BLAS_THREADS_VARIABLES)
+
+    @classmethod
+    def restore_blas_threads(cls, variables):
+        """
+        Restores the number of BLAS threads set by the environment variables given by
+        get_blas_threads_variables. If they weren't set, BLAS uses all the cpus.
+
+        :param variables: {str: str or None}
+        """
+        n_threads = mp.cpu_count()
+        for variable in BLAS_THREADS_VARIABLES:
+            if variables.get(variable) is not None:
+                n_threads = int(variables[variable])
+                break
+
+        cls.set_blas_threads(n_threads)
+
+        for variable, value in variables.iteritems():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
 
     @classmethod
     def run_function_different_arguments_parallel(cls, function, arguments, all_success=False,
@@ -25,26 +218,46 @@ class Parallel(object):
         :param signal: (function) calls this function after generating the jobs. It's used to test
             KeyboardInterrupt, and the signal is a mock of KeyboardInterrupt.
         :param parallel: (boolean) The code is run in parallel only if it's True.
-        :param threads: (int) Uses threads instead of processes if threads > 0
+        :param threads: (int) Uses a pool of (at most) threads threads instead of processes if
+            threads > 0. The arguments aren't pickled, and the models are shared by the threads,
+            so it's worth it when most of the time is spent in numpy/scipy routines that release
+            the GIL (e.g. Cholesky decompositions, solves, matrix products, cdist).
         :param args: additional arguments of function
         :param kwargs: additional arguments of function
         :return: {int: output of f(arguments[i])}
         """
-        # Maybe later we enable this feature.
-        #thread = False
-
         jobs = {}
 
         if not parallel:
             return cls.run_function_different_arguments_sequentially(function, arguments, *args,
                                                                      **kwargs)
 
-        n_jobs = min(len(arguments), mp.cpu_count())
+        budget = cls.get_budget()
+
+        # The workers of the process pools are daemonic, so they can only start threads.
+        if cls.is_worker() and (budget <= 1 or threads == 0):
+            Instrumentation.count(SEQUENTIAL_FALLBACKS_COUNTER)
+            return cls._run_function_different_arguments_fallback(
+                function, arguments, all_success, *args, **kwargs)
+
+        Instrumentation.count(POOLS_COUNTER)
+        Instrumentation.count(POOL_JOBS_COUNTER, len(arguments))
 
+        blas_threads_variables = None
         if threads > 0:
-            pool = ThreadPool(threads)
+            n_jobs = max(1, min(threads, len(arguments), budget))
+            pool = ThreadPool(n_jobs, initializer=cls._init_thread_worker,
+                              initargs=(max(1, budget / n_jobs), ))
+
+            # The BLAS threads are shared by the threads of the pool, so they're pinned to the
+            # budget of each thread while the pool runs. The threads of a thread pool don't pin
+            # them again, since the number of BLAS threads is global to the process.
+            if cls._pin_blas_threads and n_jobs > 1 and \
+                    getattr(cls._thread_budget, 'budget', None) is None:
+                blas_threads_variables = cls.get_blas_threads_variables()
+                cls.set_blas_threads(max(1, budget / n_jobs))
         else:
-            pool = mp.Pool(processes=n_jobs)
+            pool = cls.get_process_pool(len(arguments))
 
         try:
             for key, argument in arguments.iteritems():
@@ -59,6 +272,9 @@ class Parallel(object):
             pool.terminate()
             pool.join()
             return -1
+        finally:
+            if blas_threads_variables is not None:
+                cls.restore_blas_threads(blas_threads_variables)
 
         results = {}
         for key in arguments.keys():
@@ -75,6 +291,32 @@ class Parallel(object):
                     logger.info(kwargs)
         return results
 
+    @staticmethod
+    def _run_function_different_arguments_fallback(function, arguments, all_success, *args,
+                                                   **kwargs):
+        """
+        Runs the jobs of a pool sequentially. As in the pools, the failed jobs are skipped if
+        all_success is False.
+
+        :param function: f(argument, **kwargs)
+        :param arguments: {i: argument}
+        :param all_success: boolean
+        :param args: additional arguments of function
+        :param kwargs: additional arguments of function
+        :return: {int: output of f(arguments[i])}
+        """
+        results = {}
+
+        for key, argument in arguments.iteritems():
+            try:
+                results[key] = function(argument, *args, **kwargs)
+            except Exception as e:
+                if all_success:
+                    raise e
+                logger.info("job failed")
+                logger.info(key)
+        return results
+
     @staticmethod
     def run_function_different_arguments_sequentially(function, arguments, *args, **kwargs):
         """
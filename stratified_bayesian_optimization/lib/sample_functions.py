@@ -1,12 +1,33 @@
 from __future__ import absolute_import
 
+from collections import OrderedDict
+import hashlib
+import threading
+
 import numpy as np
 
+from stratified_bayesian_optimization.kernels.matern52 import Matern52
+from stratified_bayesian_optimization.kernels.scaled_kernel import ScaledKernel
+from stratified_bayesian_optimization.lib.la_functions import cholesky
+from stratified_bayesian_optimization.lib.constant import (
+    MULTIVARIATE_NORMAL_SAMPLING,
+    CHOLESKY_SAMPLING,
+    FOURIER_FEATURES_SAMPLING,
+    MAX_STORED_CHOLESKY_SAMPLING,
+)
+
 
 class SampleFunctions(object):
 
+    # Cholesky factors of the covariance matrices used by sample_from_gp, the key is given by
+    # _get_key_cholesky. The least recently used entries are evicted, and the cache is shared by
+    # the threads of the pools, so it's only accessed while holding _lock_cholesky.
+    _cache_cholesky = OrderedDict()
+    _lock_cholesky = threading.Lock()
+
     @classmethod
-    def sample_from_gp(cls, x, kernel, random_seed=None, n_samples=1):
+    def sample_from_gp(cls, x, kernel, random_seed=None, n_samples=1,
+                       method=MULTIVARIATE_NORMAL_SAMPLING, n_features=1000):
         """
         Sample function f from GP defined by the kernel.
 
@@ -14,14 +35,150 @@ class SampleFunctions(object):
         :param kernel: instance of AbstractKernel
         :param random_seed: int
         :param n_samples: int
+        :param method: (str) MULTIVARIATE_NORMAL_SAMPLING uses the SVD of the covariance matrix,
+            CHOLESKY_SAMPLING uses its Cholesky decomposition, which is cached, and
+            FOURIER_FEATURES_SAMPLING approximates the GP with random Fourier features (only
+            for Matern52 kernels).
+        :param n_features: (int) number of features if method is FOURIER_FEATURES_SAMPLING
 
         :return: np.array(n_samples x n)
         """
         if random_seed is not None:
             np.random.seed(random_seed)
 
+        if method == CHOLESKY_SAMPLING:
+            chol = cls.get_cholesky(x, kernel)
+            z = np.random.normal(0, 1, (n_samples, x.shape[0]))
+            return np.dot(z, chol.transpose())
+
+        if method == FOURIER_FEATURES_SAMPLING:
+            function = FourierFeaturesSample(kernel, x.shape[1], n_features=n_features,
+                                             n_samples=n_samples)
+            return function(x)
+
         cov = kernel.cov(x)
         mean = np.zeros(x.shape[0])
         f = np.random.multivariate_normal(mean, cov, size=n_samples)
 
         return f
+
+    @staticmethod
+    def _get_key_cholesky(x, kernel):
+        """
+        :param x: np.array(nxm)
+        :param kernel: instance of AbstractKernel
+        :return: tuple
+        """
+        x = np.ascontiguousarray(x, dtype=float)
+        return (kernel.name, tuple(kernel.hypers_values_as_array), x.shape,
+                hashlib.md5(x.tostring()).hexdigest())
+
+    @classmethod
+    def get_cholesky(cls, x, kernel):
+        """
+        Cholesky decomposition of kernel.cov(x), it's read from the cache if it was computed
+        before.
+
+        :param x: np.array(nxm)
+        :param kernel: instance of AbstractKernel
+        :return: np.array(nxn)
+        """
+        key = cls._get_key_cholesky(x, kernel)
+
+        with cls._lock_cholesky:
+            chol = cls._cache_cholesky.pop(key, None)
+            if chol is not None:
+                cls._cache_cholesky[key] = chol
+                return chol
+
+        chol = cholesky(kernel.cov(x))
+
+        with cls._lock_cholesky:
+            cls._cache_cholesky[key] = chol
+            if len(cls._cache_cholesky) > MAX_STORED_CHOLESKY_SAMPLING:
+                cls._cache_cholesky.popitem(last=False)
+
+        return chol
+
+    @classmethod
+    def clean_cache(cls):
+        with cls._lock_cholesky:
+            cls._cache_cholesky = OrderedDict()
+
+    @classmethod
+    def sample_from_gp_kronecker(cls, inputs, kernels, random_seed=None, n_samples=1):
+        """
+        Sample function f from the GP defined by the product of the kernels on the grid
+        inputs[0] x inputs[1] x ..., e.g. a Matern52 kernel on x and a task kernel on w. The
+        covariance matrix is the Kronecker product of the covariance matrices of the kernels, so
+        only the Cholesky decompositions of the small matrices are computed.
+
+        :param inputs: [np.array(n_i x d_i)], points of the grid of each kernel.
+        :param kernels: [AbstractKernel], e.g. [kernel.kernels[name] for name in kernel.names]
+            if kernel is ProductKernels.
+        :param random_seed: int
+        :param n_samples: int
+
+        :return: np.array(n_samples x (n_1 * n_2 * ...)), the points are ordered as in
+            itertools.product(inputs[0], inputs[1], ...).
+        """
+        if random_seed is not None:
+            np.random.seed(random_seed)
+
+        chols = [cls.get_cholesky(x, kernel) for x, kernel in zip(inputs, kernels)]
+        shape = [chol.shape[0] for chol in chols]
+
+        z = np.random.normal(0, 1, [n_samples] + shape)
+
+        # (L_1 x L_2 x ...) vec(z) is computed multiplying each axis of z by its factor.
+        for axis, chol in enumerate(chols):
+            z = np.moveaxis(np.tensordot(chol, z, axes=([1], [axis + 1])), 0, axis + 1)
+
+        return z.reshape((n_samples, int(np.prod(shape))))
+
+
+class FourierFeaturesSample(object):
+    """
+    Approximated sample path of a GP with a stationary kernel given by random Fourier features:
+
+        f(x) = sqrt(2 * sigma2 / n_features) * sum_i weights_i * cos(omegas_i * x + phases_i),
+
+    where the omegas are sampled from the spectral density of the kernel. The function can be
+    evaluated anywhere, and consistently, without building any covariance matrix.
+    """
+
+    def __init__(self, kernel, dimension, n_features=1000, n_samples=1):
+        """
+        :param kernel: Matern52 or ScaledKernel of a Matern52 kernel
+        :param dimension: (int) dimension of the domain of the kernel
+        :param n_features: int
+        :param n_samples: (int) number of sample paths
+        """
+        sigma2 = 1.0
+        if isinstance(kernel, ScaledKernel):
+            sigma2 = kernel.sigma2.value[0]
+            kernel = kernel.kernel
+
+        if not isinstance(kernel, Matern52):
+            raise ValueError("Random Fourier features are only defined for Matern52 kernels")
+
+        length_scale = np.asarray(kernel.length_scale.value, dtype=float)
+
+        # The spectral density of the Matern kernel with nu = 5/2 is a multivariate Student's t
+        # distribution with 2 * nu degrees of freedom.
+        nu = 2.5
+        z = np.random.normal(0, 1, (n_features, dimension))
+        u = np.random.chisquare(2.0 * nu, (n_features, 1))
+
+        self.omegas = z * np.sqrt(2.0 * nu / u) / length_scale
+        self.phases = np.random.uniform(0, 2.0 * np.pi, n_features)
+        self.weights = np.random.normal(0, 1, (n_features, n_samples))
+        self.scale = np.sqrt(2.0 * sigma2 / n_features)
+
+    def __call__(self, x):
+        """
+        :param x: np.array(nxd)
+        :return: np.array(n_samples x n)
+        """
+        features = np.cos(np.dot(x, self.omegas.transpose()) + self.phases)
+        return self.scale * np.dot(features, self.weights).transpose()
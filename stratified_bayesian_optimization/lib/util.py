@@ -89,6 +89,52 @@ def separate_numpy_arrays_in_lists(array, division):
         return [array[0: division], array[division: len(array)]]
 
 
+def add_warm_start_points(warm_start_points, new_points, max_points):
+    """
+    Adds the new points at the beginning of the list of warm starts, skipping the points that are
+    already in the list.
+
+    :param warm_start_points: [np.array(n)]
+    :param new_points: [np.array(n)], the first points have the highest priority.
+    :param max_points: (int) maximum number of points kept
+    :return: [np.array(n)]
+    """
+    points = []
+    for point in list(new_points) + list(warm_start_points):
+        point = np.array(point, dtype=float).reshape(-1)
+        if not np.all(np.isfinite(point)):
+            continue
+        if any(len(point) == len(p) and np.allclose(point, p) for p in points):
+            continue
+        points.append(point)
+        if len(points) == max_points:
+            break
+    return points
+
+
+def combine_start_points(warm_start_points, start_points):
+    """
+    Replaces the first starting points by the warm starts. At least one of the starting points is
+    kept if there are several of them, so the optimization doesn't depend only on the warm starts.
+
+    :param warm_start_points: [np.array(n)]
+    :param start_points: np.array(mxn) or [np.array(n)]
+    :return: np.array(mxn)
+    """
+    start_points = np.array(start_points)
+    m = start_points.shape[0]
+
+    warm_start_points = [point for point in warm_start_points if
+                         len(point) == start_points.shape[1]]
+    n_warm = min(len(warm_start_points), max(m - 1, 1))
+
+    if n_warm == 0:
+        return start_points
+
+    return np.concatenate(
+        (np.array(warm_start_points[0: n_warm]), start_points[0: m - n_warm, :]), axis=0)
+
+
 def wrapper_fit_gp_regression(self, **kwargs):
     """
     Wrapper of fit_gp_regression
@@ -779,6 +825,22 @@ def wrapper_sgd(point_rs, self, *args, **kwargs):
 
     return self.SGD(point, *args, **kwargs)
 
+def wrapper_optimize_sbo(point, sbo, method, *args, **kwargs):
+    """
+    Wrapper of a restart of SBO.optimize. It adds to the results of the restart the optima of
+    a_{n+1} at the samples of the last candidate evaluated by the restart, which are only known by
+    the worker when the restarts run in a pool of processes.
+    :param point: argument of method
+    :param sbo: sbo instance
+    :param method: wrapper_optimize or wrapper_sgd
+    :param args: additional arguments of method
+    :param kwargs: additional arguments of method
+    :return: results of method, with the key 'optima_samples': [np.array(n)]
+    """
+    results = method(point, *args, **kwargs)
+    results['optima_samples'] = list(sbo.last_optima_samples)
+    return results
+
 def wrapper_objective_posterior_mean_bq(point, self, var_noise=None, mean=None,
                                         parameters_kernel=None, n_samples_parameters=0):
     """
@@ -848,14 +910,11 @@ def wrapper_objective_acquisition_function(point, self, n_samples_parameters=0,
 
     if n_samples_parameters == 0:
         value = self.evaluate(point, *params)
+    elif self.gp.name_model == BAYESIAN_QUADRATURE:
+        value = BayesianEvaluations.evaluate(self.evaluate, point, self.gp.gp,
+                                             n_samples_parameters, None, *params)[0]
     else:
-        if self.gp.name_model == BAYESIAN_QUADRATURE:
-            gp_model = self.gp.gp
-        else:
-            gp_model = self.gp
-
-        value = BayesianEvaluations.evaluate(self.evaluate, point, gp_model, n_samples_parameters,
-                                             None, *params)[0]
+        value = self.evaluate_samples_parameters(point, n_samples_parameters)['value']
 
     return value
 
@@ -898,14 +957,12 @@ def wrapper_gradient_acquisition_function(point, self, n_samples_parameters=0, *
 
     if n_samples_parameters == 0:
         value = self.evaluate_gradient(point, *params)
-    else:
-        if self.gp.name_model == BAYESIAN_QUADRATURE:
-            gp_model = self.gp.gp
-        else:
-            gp_model = self.gp
-
-        value = BayesianEvaluations.evaluate(self.evaluate_gradient, point, gp_model,
+    elif self.gp.name_model == BAYESIAN_QUADRATURE:
+        value = BayesianEvaluations.evaluate(self.evaluate_gradient, point, self.gp.gp,
                                              n_samples_parameters, None, *params)[0]
+    else:
+        value = self.evaluate_samples_parameters(
+            point, n_samples_parameters, compute_gradient=True)['gradient'][0, :]
 
     return value
 
@@ -29,6 +29,11 @@ from stratified_bayesian_optimization.lib.constant import (
     SGD_NAME,
     DEBUGGING_DIR,
     DEFAULT_N_PARAMETERS,
+    DEFAULT_REFIT_THRESHOLD,
+    WARM_START_BURNING_FRACTION,
+    CACHE_HITS_COUNTER,
+    CACHE_MISSES_COUNTER,
+    KERNEL_EVALUATIONS_COUNTER,
 )
 from stratified_bayesian_optimization.lib.util_gp_fitting import (
     get_kernel_default,
@@ -58,6 +63,8 @@ from stratified_bayesian_optimization.services.domain import (
 from stratified_bayesian_optimization.lib.optimization import Optimization
 from stratified_bayesian_optimization.initializers.log import SBOLog
 from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
+from stratified_bayesian_optimization.lib.cache_keys import CacheKeys
 from stratified_bayesian_optimization.entities.parameter import ParameterEntity
 from stratified_bayesian_optimization.priors.non_negative import NonNegativePrior
 from stratified_bayesian_optimization.priors.horseshoe import HorseShoePrior
@@ -83,7 +90,8 @@ class GPFittingGaussian(object):
                  start_point_sampler=None, max_steps_out=1, data=None, random_seed=None,
                  type_bounds=None, training_name=None, problem_name=None,
                  name_model='gp_fitting_gaussian', samples_parameters=None, noise=False,
-                 simplex_domain=None, define_samplers=True, **kernel_parameters):
+                 simplex_domain=None, define_samplers=True, warm_start=False,
+                 refit_threshold=None, **kernel_parameters):
         """
         :param type_kernel: [str] Must be in possible_kernels. If it's a product of kernels it
             should be a list as: [PRODUCT_KERNELS_SEPARABLE, NAME_1_KERNEL, NAME_2_KERNEL].
@@ -120,6 +128,10 @@ class GPFittingGaussian(object):
         :param samples_parameters: [[float]]
         :param define_samplers: (boolean) If False, samplers for the hyperparameters are not
             defined.
+        :param warm_start: (boolean) If True, refit_gp_regression and start_new_chain start from
+            the previous parameters, and a full refit is done only if the log-likelihood changed
+            more than refit_threshold.
+        :param refit_threshold: (float) change of the log-likelihood per training point.
 
         """
 
@@ -193,12 +205,25 @@ class GPFittingGaussian(object):
 
         self.cache_chol_cov = {}
         self.cache_sol_chol_y_unbiased = {}
+        self.cache_inv_cov = {}
+
+        # Keys of the caches of the model and of the models built on it (e.g. quadratures)
+        self.cache_keys = CacheKeys()
 
         self.best_solution = {} # Historical best solution for EI.
         self.cache_cov_n = {} # Cache computations of the cov_n
 
         self.optimization_results = []
 
+        self.warm_start = warm_start
+        if refit_threshold is None:
+            refit_threshold = DEFAULT_REFIT_THRESHOLD
+        self.refit_threshold = refit_threshold
+
+        # {name: (parameters, log-likelihood per training point)}, log-likelihood of the
+        # parameters of the last fit ('mle') and of the last start of the chain ('chain').
+        self.llh_reference = {}
+
         self.set_parameters_kernel()
 
         if define_samplers:
@@ -268,6 +293,9 @@ class GPFittingGaussian(object):
             else:
                 self.start_point_sampler = self.get_value_parameters_model
 
+        if self.warm_start and self.data['points'] is not None:
+            self.set_llh_reference(self.samples_parameters[-1], 'chain')
+
     def start_new_chain(self, random_seed=None):
         """
         Starts a new chain of sampled parameters.
@@ -277,8 +305,15 @@ class GPFittingGaussian(object):
         if random_seed is not None:
             np.random.seed(random_seed)
 
-        if self.n_burning > 0:
-            parameters = self.sample_parameters(float(self.n_burning) / (self.thinning + 1))
+        n_burning = self.n_burning
+
+        if self.warm_start and n_burning > 0 and \
+                self.llh_change('chain') <= self.refit_threshold:
+            # The chain is continued from its last sample, so a short burning is enough.
+            n_burning = int(np.ceil(WARM_START_BURNING_FRACTION * n_burning))
+
+        if n_burning > 0:
+            parameters = self.sample_parameters(float(n_burning) / (self.thinning + 1))
         else:
             parameters = [self.samples_parameters[-1]]
 
@@ -286,6 +321,9 @@ class GPFittingGaussian(object):
         self.samples_parameters.append(parameters[-1])
         self.start_point_sampler = parameters[-1]
 
+        if self.warm_start:
+            self.set_llh_reference(parameters[-1], 'chain')
+
     def sample_parameters(self, n_samples, start_point=None, random_seed=None):
         """
         Sample parameters of the model from the posterior without considering burning.
@@ -507,8 +545,11 @@ class GPFittingGaussian(object):
         # https://math.stackexchange.com/questions/955874/cholesky-factor-when-adding-a-row-and-
         # column-to-already-factorized-matrix
 
+        self.cache_keys.new_data_version()
+
         self.cache_chol_cov = {}
         self.cache_sol_chol_y_unbiased = {}
+        self.cache_inv_cov = {}
 
     @staticmethod
     def convert_from_list_to_numpy(data_as_list):
@@ -632,6 +673,7 @@ class GPFittingGaussian(object):
         model = cls(**s)
         if use_only_training_points:
             model.data = model.convert_from_list_to_numpy(model.training_data)
+            model.cache_keys.new_data_version()
         return model
 
     @property
@@ -657,9 +699,10 @@ class GPFittingGaussian(object):
     def _get_cached_data(self, index, name, cache=True):
         """
 
-        :param index: tuple associated to the type.
-            -(var_noise, parameters_kernel) if name is CHOL_COV
-            -(var_noise, parameters_kernel, mean) if name is SOL_CHOL_Y_UNBIASED
+        :param index: (int, int) key given by cache_keys.
+            -cache_keys.get_key(var_noise, parameters_kernel) if name is CHOL_COV
+            -cache_keys.get_key(var_noise, parameters_kernel, mean) if name is
+                SOL_CHOL_Y_UNBIASED
         :param name: (str) SOL_CHOL_Y_UNBIASED or CHOL_COV
         :param cache : (boolean) get cached data only if cache is True
         :return: cached data if it's cached, otherwise False
@@ -670,33 +713,43 @@ class GPFittingGaussian(object):
         if cache is False:
             return False
 
+        # The caches are replaced (not cleared) when they are updated, so they are read only once
+        # to be safe when the model is shared by several threads.
+        value = None
         if name == CHOL_COV:
-            if index in self.cache_chol_cov:
-                return self.cache_chol_cov[index]
+            value = self.cache_chol_cov.get(index)
         if name == SOL_CHOL_Y_UNBIASED:
-            if index in self.cache_sol_chol_y_unbiased:
-                return self.cache_sol_chol_y_unbiased[index]
-        return False
+            value = self.cache_sol_chol_y_unbiased.get(index)
+
+        if value is None:
+            Instrumentation.count(CACHE_MISSES_COUNTER)
+            return False
+
+        Instrumentation.count(CACHE_HITS_COUNTER)
+        return value
 
     def _updated_cached_data(self, index, value, name, clear_cache=True):
         """
 
-        :param index: tuple associated to the type.
-            -(var_noise, parameters_kernel) if CHOL_COV
-            -(var_noise, parameters_kernel, mean) if SOL_CHOL_Y_UNBIASED
+        :param index: (int, int) key given by cache_keys.
+            -cache_keys.get_key(var_noise, parameters_kernel) if CHOL_COV
+            -cache_keys.get_key(var_noise, parameters_kernel, mean) if SOL_CHOL_Y_UNBIASED
         :param value: value to be cached
         :param name: (str) SOL_CHOL_Y_UNBIASED or CHOL_COV
 
         """
         if name == CHOL_COV:
             if clear_cache:
-                self.cache_chol_cov = {}
                 self.cache_sol_chol_y_unbiased = {}
-            self.cache_chol_cov[index] = value
+                self.cache_inv_cov = {}
+                self.cache_chol_cov = {index: value}
+            else:
+                self.cache_chol_cov[index] = value
         if name == SOL_CHOL_Y_UNBIASED:
             if clear_cache:
-                self.cache_sol_chol_y_unbiased = {}
-            self.cache_sol_chol_y_unbiased[index] = value
+                self.cache_sol_chol_y_unbiased = {index: value}
+            else:
+                self.cache_sol_chol_y_unbiased[index] = value
 
     def evaluate_cov(self, points, parameters_kernel):
         """
@@ -707,6 +760,7 @@ class GPFittingGaussian(object):
 
         :return: np.array(nxn)
         """
+        Instrumentation.count(KERNEL_EVALUATIONS_COUNTER)
 
         if self.type_kernel[0] == PRODUCT_KERNELS_SEPARABLE:
             inputs = separate_numpy_arrays_in_lists(points, self.kernel_dimensions[1])
@@ -746,7 +800,12 @@ class GPFittingGaussian(object):
         if historical_points is None:
             historical_points = self.data['points']
 
-        cached = self._get_cached_data((var_noise, tuple(parameters_kernel)), CHOL_COV, cache=cache)
+        if historical_points is self.data['points']:
+            index = self.cache_keys.get_key(var_noise, parameters_kernel)
+        else:
+            index = self.cache_keys.get_key(var_noise, parameters_kernel, historical_points)
+
+        cached = self._get_cached_data(index, CHOL_COV, cache=cache)
         if cached is not False:
             return cached
 
@@ -764,8 +823,7 @@ class GPFittingGaussian(object):
         chol = cholesky(cov,  max_tries=7)
 
         if cache:
-            self._updated_cached_data((var_noise, tuple(parameters_kernel)), (chol, cov), CHOL_COV,
-                                      clear_cache=clear_cache)
+            self._updated_cached_data(index, (chol, cov), CHOL_COV, clear_cache=clear_cache)
 
         return chol, cov
 
@@ -785,13 +843,12 @@ class GPFittingGaussian(object):
 
         y_unbiased = self.data['evaluations'] - mean
 
-        cached_solve = self._get_cached_data((var_noise, tuple(parameters_kernel), mean),
-                                             SOL_CHOL_Y_UNBIASED)
+        index = self.cache_keys.get_key(var_noise, parameters_kernel, mean)
+        cached_solve = self._get_cached_data(index, SOL_CHOL_Y_UNBIASED)
 
         if cached_solve is False:
             solve = cho_solve(chol, y_unbiased)
-            self._updated_cached_data((var_noise, tuple(parameters_kernel), mean), solve,
-                                      SOL_CHOL_Y_UNBIASED)
+            self._updated_cached_data(index, solve, SOL_CHOL_Y_UNBIASED)
         else:
             solve = cached_solve
 
@@ -829,48 +886,70 @@ class GPFittingGaussian(object):
         return grad_cov
 
 
-    def grad_log_likelihood_dict(self, var_noise, mean, parameters_kernel):
+    def log_likelihood_and_gradient(self, var_noise, mean, parameters_kernel):
         """
-        Computes the gradient of the log likelihood
+        Computes the log likelihood and its gradient using only one factorization of the
+        covariance matrix (shared with log_likelihood through the cache). The inverse of the
+        covariance is computed once, and the derivative respect to each parameter is
+        0.5 * tr((alpha * alpha^T - cov^-1) * grad_cov), where alpha = cov^-1 (y - mean), which is
+        computed as the sum of an elementwise product because all the matrices are symmetric.
 
         :param var_noise: (float) variance of the noise
         :param mean: (float)
         :param parameters_kernel: np.array(k), The order of the parameters is given in the
             definition of the class kernel.
-        :return: {'var_noise': float, 'mean': float, 'kernel_params': np.array(n)}
+        :return: {'log_likelihood': float, 'var_noise': float, 'mean': float,
+            'kernel_params': np.array(k)}
         """
 
-        grad_cov = self.evaluate_grad_cov(parameters_kernel, self.data['points'])
-
         chol, cov = self._chol_cov_including_noise(var_noise, parameters_kernel)
 
         y_unbiased = self.data['evaluations'] - mean
 
-        cached_solve = self._get_cached_data((var_noise, tuple(parameters_kernel), mean),
-                                             SOL_CHOL_Y_UNBIASED)
+        index = self.cache_keys.get_key(var_noise, parameters_kernel, mean)
+        cached_solve = self._get_cached_data(index, SOL_CHOL_Y_UNBIASED)
         if cached_solve is False:
             solve = cho_solve(chol, y_unbiased)
-            self._updated_cached_data((var_noise, tuple(parameters_kernel), mean), solve,
-                                      SOL_CHOL_Y_UNBIASED)
+            self._updated_cached_data(index, solve, SOL_CHOL_Y_UNBIASED)
         else:
             solve = cached_solve
 
+        index = self.cache_keys.get_key(var_noise, parameters_kernel)
+        inv_cov = self.cache_inv_cov.get(index)
+        if inv_cov is None:
+            inv_cov = cho_solve(chol, np.identity(chol.shape[0]))
+            self.cache_inv_cov = {index: inv_cov}
+
+        weights = np.outer(solve, solve) - inv_cov
+
+        grad_cov = self.evaluate_grad_cov(parameters_kernel, self.data['points'])
+
         gradient_kernel_params = np.zeros(len(parameters_kernel))
         for i in xrange(len(parameters_kernel)):
-            gradient_kernel_params[i] = GradientGPFittingGaussian.\
-                compute_gradient_llh_given_grad_cov(grad_cov[i], chol, solve)
-
-        n_training_points = self.data['points'].shape[0]
+            gradient_kernel_params[i] = 0.5 * np.sum(weights * grad_cov[i])
 
         gradient = {}
+        gradient['log_likelihood'] = \
+            -np.sum(np.log(np.diag(chol))) - 0.5 * np.dot(y_unbiased, solve)
         gradient['kernel_params'] = gradient_kernel_params
-        gradient['mean'] = GradientGPFittingGaussian.compute_gradient_mean(
-            chol, y_unbiased, n_training_points)
+        gradient['mean'] = np.sum(solve)
+        gradient['var_noise'] = 0.5 * np.trace(weights)
 
-        grad_var_noise = GradientGPFittingGaussian.compute_gradient_kernel_respect_to_noise(
-            n_training_points)
-        gradient['var_noise'] = GradientGPFittingGaussian.compute_gradient_llh_given_grad_cov(
-            grad_var_noise, chol, solve)
+        return gradient
+
+    def grad_log_likelihood_dict(self, var_noise, mean, parameters_kernel):
+        """
+        Computes the gradient of the log likelihood
+
+        :param var_noise: (float) variance of the noise
+        :param mean: (float)
+        :param parameters_kernel: np.array(k), The order of the parameters is given in the
+            definition of the class kernel.
+        :return: {'var_noise': float, 'mean': float, 'kernel_params': np.array(n)}
+        """
+
+        gradient = self.log_likelihood_and_gradient(var_noise, mean, parameters_kernel)
+        del gradient['log_likelihood']
 
         return gradient
 
@@ -1032,6 +1111,85 @@ class GPFittingGaussian(object):
 
         self.update_value_parameters(sol)
 
+        if self.warm_start:
+            self.set_llh_reference(sol, 'mle')
+
+        return self
+
+    def llh_per_point(self, parameters):
+        """
+        Log-likelihood divided by the number of training points.
+
+        :param parameters: np.array(n)
+        :return: float
+        """
+        return self.objective_llh(parameters) / float(self.data['points'].shape[0])
+
+    def set_llh_reference(self, parameters, name):
+        """
+        Stores the log-likelihood of the parameters, it's used to decide if the model has to be
+        refitted after adding new points.
+
+        :param parameters: np.array(n)
+        :param name: (str) 'mle' or 'chain'
+        """
+        self.llh_reference[name] = (np.array(parameters), self.llh_per_point(parameters))
+
+    def llh_change(self, name):
+        """
+        Change of the log-likelihood per training point of the reference parameters since the
+        reference was set (e.g. because new points were added). It's infinity if there isn't a
+        reference.
+
+        :param name: (str) 'mle' or 'chain'
+        :return: float
+        """
+        if name not in self.llh_reference:
+            return np.inf
+
+        reference = self.llh_reference[name]
+
+        return np.abs(self.llh_per_point(reference[0]) - reference[1])
+
+    def refit_gp_regression(self, random_seed=None):
+        """
+        Refit the GP regression model after adding new points. If warm_start is True, the model
+        is refitted only if the log-likelihood of the current parameters changed more than
+        refit_threshold since the last fit. In that case, the MLE starts from the current
+        parameters and from a random point, and the best solution is kept.
+
+        :param random_seed: int
+        :return: self
+        """
+
+        if random_seed is not None:
+            np.random.seed(random_seed)
+
+        if not self.warm_start:
+            self.fit_gp_regression()
+            return self
+
+        change = self.llh_change('mle')
+
+        if change <= self.refit_threshold:
+            logger.info("Log-likelihood changed %f, the parameters are kept" % change)
+            return self
+
+        logger.info("Log-likelihood changed %f, refitting the model" % change)
+
+        parameters = self.get_value_parameters_model
+        results = self.mle_parameters(start=parameters)
+
+        results_full = self.mle_parameters()
+        if results_full['optimal_value'] > results['optimal_value']:
+            results = results_full
+
+        logger.info("Results of the GP fitting: ")
+        logger.info(results)
+
+        self.update_value_parameters(results['solution'])
+        self.set_llh_reference(results['solution'], 'mle')
+
         return self
 
     def update_value_parameters(self, vector):
@@ -1053,7 +1211,8 @@ class GPFittingGaussian(object):
     def train(cls, type_kernel, dimensions, mle, training_data, bounds_domain, thinning=0,
               n_burning=0, max_steps_out=1, random_seed=None, type_bounds=None, training_name=None,
               problem_name=None, kernel_values=None, mean_value=None, var_noise_value=None,
-              same_correlation=False, simplex_domain=None, define_samplers=True):
+              same_correlation=False, simplex_domain=None, define_samplers=True,
+              warm_start=False, refit_threshold=None):
         """
         :param type_kernel: [(str)] Must be in possible_kernels. If it's a product of kernels it
             should be a list as: [PRODUCT_KERNELS_SEPARABLE, NAME_1_KERNEL, NAME_2_KERNEL]
@@ -1080,6 +1239,9 @@ class GPFittingGaussian(object):
             kernel.
         :param define_samplers: (boolean) If False, samplers for the hyperparameters are not
             defined.
+        :param warm_start: (boolean) If True, the model is refitted after adding new points only
+            if the log-likelihood changed more than refit_threshold.
+        :param refit_threshold: (float) change of the log-likelihood per training point.
 
         :return: GPFittingGaussian
         """
@@ -1093,7 +1255,8 @@ class GPFittingGaussian(object):
                      type_bounds=type_bounds, random_seed=random_seed, training_name=training_name,
                      problem_name=problem_name, kernel_values=kernel_values, mean_value=mean_value,
                      var_noise_value=var_noise_value, simplex_domain=simplex_domain,
-                     define_samplers=define_samplers, **{SAME_CORRELATION: same_correlation})
+                     define_samplers=define_samplers, warm_start=warm_start,
+                     refit_threshold=refit_threshold, **{SAME_CORRELATION: same_correlation})
 
             return gp.fit_gp_regression()
 
@@ -1102,7 +1265,8 @@ class GPFittingGaussian(object):
                    type_bounds=type_bounds, random_seed=random_seed, training_name=training_name,
                    problem_name=problem_name, kernel_values=kernel_values, mean_value=mean_value,
                    var_noise_value=var_noise_value, simplex_domain=simplex_domain,
-                   define_samplers=define_samplers, **{SAME_CORRELATION: same_correlation})
+                   define_samplers=define_samplers, warm_start=warm_start,
+                   refit_threshold=refit_threshold, **{SAME_CORRELATION: same_correlation})
 
     def evaluate_cross_cov(self, points_1, points_2, parameters_kernel):
         """
@@ -1113,6 +1277,7 @@ class GPFittingGaussian(object):
         :param parameters_kernel: np.array(l)
         :return: np.array(nxm)
         """
+        Instrumentation.count(KERNEL_EVALUATIONS_COUNTER)
 
         if self.type_kernel[0] == PRODUCT_KERNELS_SEPARABLE:
             inputs_1 = separate_numpy_arrays_in_lists(points_1, self.kernel_dimensions[1])
@@ -1231,8 +1396,8 @@ class GPFittingGaussian(object):
 
 
         if cache:
-            cached_solve = self._get_cached_data((var_noise, tuple(parameters_kernel), mean),
-                                                 SOL_CHOL_Y_UNBIASED, cache=cache)
+            index = self.cache_keys.get_key(var_noise, parameters_kernel, mean)
+            cached_solve = self._get_cached_data(index, SOL_CHOL_Y_UNBIASED, cache=cache)
         else:
             cached_solve = False
 
@@ -1240,8 +1405,8 @@ class GPFittingGaussian(object):
             y_unbiased = historical_evaluations - mean
             solve = cho_solve(chol, y_unbiased)
             if cache:
-                self._updated_cached_data((var_noise, tuple(parameters_kernel), mean), solve,
-                                          SOL_CHOL_Y_UNBIASED, clear_cache=clear_cache)
+                self._updated_cached_data(index, solve, SOL_CHOL_Y_UNBIASED,
+                                          clear_cache=clear_cache)
         else:
             solve = cached_solve
 
@@ -1293,17 +1458,18 @@ class GPFittingGaussian(object):
             }
 
         if points.shape[0] == 1:
-            index = (tuple(points[0, :]), tuple(parameters_kernel))
+            index = self.cache_keys.get_key(points[0, :], parameters_kernel)
 
-        if points.shape[0] == 1 and index in self.cache_cov_n:
-            cov_n = self.cache_cov_n[index]
-        else:
+        cov_n = None
+        if points.shape[0] == 1:
+            cov_n = self.cache_cov_n.get(index)
+
+        if cov_n is None:
             solve_2 = cho_solve(chol, vec_cov.transpose())
             cov_n = self.evaluate_cov(points, parameters_kernel) - np.dot(vec_cov, solve_2)
 
             if points.shape[0] == 1:
-                self.cache_cov_n = {}
-                self.cache_cov_n[index] = cov_n
+                self.cache_cov_n = {index: cov_n}
 
         return {
             'mean': mu_n,
@@ -1352,6 +1518,83 @@ class GPFittingGaussian(object):
 
         return {'mean': grad_mu, 'cov': grad_cov}
 
+    def compute_posterior_parameters_and_gradient(self, points, var_noise=None, mean=None,
+                                                  parameters_kernel=None, compute_gradient=True,
+                                                  chol_solve=None):
+        """
+        Computes the posterior mean and variance of the GP at each point, and their gradients
+        respect to the point. The cross covariance with the historical points is evaluated once,
+        and only one triangular solve is done for all the points.
+
+        :param points: np.array(kxn)
+        :param var_noise: float
+        :param mean: float
+        :param parameters_kernel: np.array(l)
+        :param compute_gradient: (boolean) If False, the gradients are None.
+        :param chol_solve: {'chol': np.array(mxm), 'solve': np.array(m)}, output of
+            _cholesky_solve_vectors_for_posterior for these parameters, if it's already computed.
+        :return: {
+            'mean': np.array(k),
+            'var': np.array(k),
+            'grad_mean': np.array(kxn),
+            'grad_var': np.array(kxn),
+        }
+        """
+
+        if var_noise is None:
+            var_noise = self.var_noise.value[0]
+
+        if parameters_kernel is None:
+            parameters_kernel = self.kernel.hypers_values_as_array
+
+        if mean is None:
+            mean = self.mean.value[0]
+
+        if chol_solve is None:
+            chol_solve = self._cholesky_solve_vectors_for_posterior(
+                var_noise, mean, parameters_kernel)
+        chol = chol_solve['chol']
+        solve = chol_solve['solve']
+
+        historical_points = self.data['points']
+        vec_cov = self.evaluate_cross_cov(points, historical_points, parameters_kernel)
+
+        mu_n = mean + np.dot(vec_cov, solve)
+
+        # K^-1 * cov(historical_points, point) for each point
+        solve_2 = cho_solve(chol, vec_cov.transpose())
+
+        n_points = points.shape[0]
+        prior_var = np.zeros(n_points)
+        grad_mu = None
+        grad_var = None
+
+        if compute_gradient:
+            grad_mu = np.zeros((n_points, points.shape[1]))
+            grad_var = np.zeros((n_points, points.shape[1]))
+
+        for i in xrange(n_points):
+            point = points[i:i + 1, :]
+            prior_var[i] = self.evaluate_cross_cov(point, point, parameters_kernel)[0, 0]
+
+            if not compute_gradient:
+                continue
+
+            # We assume that cov(x, x) is constant respect to x (it's a radial kernel)
+            grad_cross_cov = self.evaluate_grad_cross_cov_respect_point(
+                point, historical_points, parameters_kernel)
+            grad_mu[i, :] = np.dot(grad_cross_cov.transpose(), solve)
+            grad_var[i, :] = -2.0 * np.dot(grad_cross_cov.transpose(), solve_2[:, i])
+
+        var_n = prior_var - np.sum(vec_cov * solve_2.transpose(), axis=1)
+
+        return {
+            'mean': mu_n,
+            'var': var_n,
+            'grad_mean': grad_mu,
+            'grad_var': grad_var,
+        }
+
     def evaluate_gradient_sample_params(self, point, random_seed=None):
         """
         Computes the gradient of EI taking a random sample of the parameters of the model.
@@ -1607,9 +1850,9 @@ class GPFittingGaussian(object):
         if mean is None:
             mean = self.mean.value[0]
 
-        index = (var_noise, mean, tuple(parameters_kernel))
-        if index in self.best_solution:
-            best = self.best_solution[index]
+        index = self.cache_keys.get_key(var_noise, mean, parameters_kernel)
+        best = self.best_solution.get(index)
+        if best is not None:
             return best
 
         if not noisy_evaluations:
@@ -1629,8 +1872,11 @@ class GPFittingGaussian(object):
         """
         Cleans the cache
         """
+        self.cache_keys.new_data_version()
+
         self.cache_chol_cov = {}
         self.cache_sol_chol_y_unbiased = {}
+        self.cache_inv_cov = {}
         self.best_solution = {}
         self.cache_cov_n = {}
 
@@ -4,10 +4,13 @@ import numpy as np
 
 import itertools
 
+from collections import OrderedDict
+
 from os import path
 import os
 
 import sys
+import threading
 
 from copy import deepcopy
 
@@ -31,6 +34,10 @@ from stratified_bayesian_optimization.lib.constant import (
     DEFAULT_N_SAMPLES,
     DEFAULT_N_PARAMETERS,
     MULTINOMIAL_DISTRIBUTION,
+    MAX_STORED_QUADRATURES,
+    MAX_WARM_START_POINTS,
+    CACHE_HITS_COUNTER,
+    CACHE_MISSES_COUNTER,
 )
 from stratified_bayesian_optimization.lib.la_functions import (
     cho_solve,
@@ -52,6 +59,8 @@ from stratified_bayesian_optimization.lib.expectations import (
 from stratified_bayesian_optimization.lib.optimization import Optimization
 from stratified_bayesian_optimization.util.json_file import JSONFile
 from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
 from stratified_bayesian_optimization.lib.util import (
     wrapper_evaluate_quadrature_cross_cov,
     wrapper_compute_vector_b,
@@ -61,6 +70,8 @@ from stratified_bayesian_optimization.lib.util import (
     wrapper_hessian_posterior_mean_bq,
     wrapper_sgd,
     wrapper_evaluate_gradient_sample_params_bq,
+    add_warm_start_points,
+    combine_start_points,
 )
 
 logger = SBOLog(__name__)
@@ -76,10 +87,6 @@ class BayesianQuadrature(object):
                                 'json'.format
 
 
-    _filename_points_mu_evaluations = 'points_for_post_mean_gp_{model_type}_{problem_name}_' \
-                                '{type_kernel}_{training_name}_{n_training}_{random_seed}.' \
-                                'json'.format
-
     _expectations_map = {
         UNIFORM_FINITE: {
             'expectation': uniform_finite,
@@ -186,10 +193,24 @@ class BayesianQuadrature(object):
         self.cache_quadrature_with_candidate = {}
         self.optimal_solutions = {} # The optimal solutions are written here
 
+        # Optima of the posterior mean found in the previous iterations, the most recent first.
+        # They aren't cleaned with the cache, and they are the first starting points of
+        # optimize_posterior_mean when there isn't an optimal solution for the parameters.
+        self.warm_start_solutions = []
+
+        # Quadratures B(x, i) of the discretization of the domain of x against the historical
+        # points, indexed by the parameters of the kernel. It isn't cleaned with the cache, so
+        # only the columns of the new historical points are computed after each iteration.
+        self.quadratures_store = OrderedDict()
+
         # Cached data for the MC estimation of the SBO.
         self.cache_sample = {}
         self.max_mean = {}
 
+        # Caches of the vectors b of the MC estimation of the SBO. Each thread has its own
+        # caches, so the restarts run in a thread pool don't clear the entries of each other.
+        self._thread_caches = threading.local()
+
 
         self.separate_tasks = False
 
@@ -237,47 +258,87 @@ class BayesianQuadrature(object):
         logger.add_file_to_log(model_type, problem_name, kernel_name, training_name, n_training,
                                random_seed, n_samples_parameters)
 
-    def _get_cached_data(self, index, name):
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_thread_caches']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._thread_caches = threading.local()
+
+    def _get_thread_caches(self):
         """
-        :param index: tuple. (parameters_kernel, )
+        :return: {name: {index: value}}, caches of the current thread.
+        """
+        caches = getattr(self._thread_caches, 'caches', None)
+        if caches is None:
+            caches = {QUADRATURES: {}, B_NEW: {}}
+            self._thread_caches.caches = caches
+        return caches
+
+    def _get_cached_data(self, index, name, thread=False):
+        """
+        :param index: (int, int) key given by gp.cache_keys
         :param name: (str) QUADRATURES or POSTERIOR_MEAN or B_NEW
+        :param thread: (boolean) If True, the caches of the current thread are used (only for
+            QUADRATURES and B_NEW).
 
-        :return: cached data if it's cached, otherwise False
+        :return: cached data if it's cached, otherwise None
         """
 
-        if name == QUADRATURES:
-            if index in self.cache_quadratures:
-                return self.cache_quadratures[index]
-        if name == POSTERIOR_MEAN:
-            if index in self.cache_posterior_mean:
-                return self.cache_posterior_mean[index]
-        if name == B_NEW:
-            if index in self.cache_quadrature_with_candidate:
-                return self.cache_quadrature_with_candidate[index]
-        return None
+        # The caches are replaced (not cleared) when they are updated, so they are read only once
+        # to be safe when the model is shared by several threads.
+        value = None
+        if thread:
+            value = self._get_thread_caches()[name].get(index)
+        elif name == QUADRATURES:
+            value = self.cache_quadratures.get(index)
+        elif name == POSTERIOR_MEAN:
+            value = self.cache_posterior_mean.get(index)
+        elif name == B_NEW:
+            value = self.cache_quadrature_with_candidate.get(index)
+
+        if value is None:
+            Instrumentation.count(CACHE_MISSES_COUNTER)
+        else:
+            Instrumentation.count(CACHE_HITS_COUNTER)
+        return value
 
     def _updated_cached_data(self, index, value, name, thread=False, clear_cache=True):
         """
 
-        :param index: tuple. (parameters_kernel, )
+        :param index: (int, int) key given by gp.cache_keys
         :param value: value to be cached
         :param name: (str) QUADRATURES or POSTERIOR_MEAN or B_NEW
-        :param thread: (boolean) True if memory is shared between threads.
+        :param thread: (boolean) If True, the caches of the current thread are used (only for
+            QUADRATURES and B_NEW).
 
         """
 
+        if thread:
+            caches = self._get_thread_caches()
+            if clear_cache:
+                caches[name] = {index: value}
+            else:
+                caches[name][index] = value
+            return
+
         if name == QUADRATURES:
-            if not thread and clear_cache:
-                 self.cache_quadratures = {}
-            self.cache_quadratures[index] = value
+            if clear_cache:
+                self.cache_quadratures = {index: value}
+            else:
+                self.cache_quadratures[index] = value
         if name == POSTERIOR_MEAN:
-            if not thread and clear_cache:
-                 self.cache_posterior_mean = {}
-            self.cache_posterior_mean[index] = value
+            if clear_cache:
+                self.cache_posterior_mean = {index: value}
+            else:
+                self.cache_posterior_mean[index] = value
         if name == B_NEW:
-            if not thread and clear_cache:
-                 self.cache_quadrature_with_candidate = {}
-            self.cache_quadrature_with_candidate[index] = value
+            if clear_cache:
+                self.cache_quadrature_with_candidate = {index: value}
+            else:
+                self.cache_quadrature_with_candidate[index] = value
 
     def evaluate_quadrate_cov(self, point, parameters_kernel):
         """
@@ -499,8 +560,8 @@ class BayesianQuadrature(object):
 
         compute_vec_covs = False
         if cache and points.shape[0] == 1:
-            vec_covs = self._get_cached_data(
-                (tuple(parameters_kernel), tuple(points[0, :])), QUADRATURES)
+            index_cache = self.gp.cache_keys.get_key(parameters_kernel, points[0, :])
+            vec_covs = self._get_cached_data(index_cache, QUADRATURES)
         else:
             vec_covs = None
 
@@ -516,8 +577,7 @@ class BayesianQuadrature(object):
             vec_covs = computations['vec_covs']
 
         if cache and compute_vec_covs and points.shape[0] == 1:
-            self._updated_cached_data(
-                (tuple(parameters_kernel), tuple(points[0, :])), vec_covs, QUADRATURES)
+            self._updated_cached_data(index_cache, vec_covs, QUADRATURES)
 
         mu_n = mean + np.dot(vec_covs, solve)
 
@@ -613,8 +673,8 @@ class BayesianQuadrature(object):
 
         compute_vec_covs = False
         if cache:
-            vec_covs = self._get_cached_data(
-                (tuple(parameters_kernel), tuple(point[0, :])), QUADRATURES)
+            index_cache = self.gp.cache_keys.get_key(parameters_kernel, point[0, :])
+            vec_covs = self._get_cached_data(index_cache, QUADRATURES)
         else:
             vec_covs = None
 
@@ -630,8 +690,7 @@ class BayesianQuadrature(object):
                 vec_covs = computations['vec_covs']
 
         if cache and compute_vec_covs:
-            self._updated_cached_data(
-                (tuple(parameters_kernel), tuple(point[0, :])), vec_covs, QUADRATURES)
+            self._updated_cached_data(index_cache, vec_covs, QUADRATURES)
 
         solve = chol_solve['solve']
         chol = chol_solve['chol']
@@ -756,22 +815,26 @@ class BayesianQuadrature(object):
             if mean is None:
                 mean = self.gp.mean.value[0]
 
-            index_cache = (var_noise, mean, tuple(parameters_kernel))
+            # The optimal solutions are used as warm starts, so they're kept across data versions,
+            # while max_mean depends on the data.
+            index_cache = self.gp.cache_keys.get_key(var_noise, mean, parameters_kernel)
+            index_solutions = self.gp.cache_keys.get_id(var_noise, mean, parameters_kernel)
         else:
             index_cache = 'mc_mean'
+            index_solutions = 'mc_mean'
 
         if start is None:
             start_points = DomainService.get_points_domain(
                 n_restarts + 1, bounds_x, type_bounds=len(self.x_domain) * [0],
                 simplex_domain=None)
-            if index_cache in self.optimal_solutions and \
-                            len(self.optimal_solutions[index_cache]) > 0:
-                start = self.optimal_solutions[index_cache][-1]['solution']
+            if index_solutions in self.optimal_solutions and \
+                            len(self.optimal_solutions[index_solutions]) > 0:
+                start = self.optimal_solutions[index_solutions][-1]['solution']
 
                 start = [start] + start_points[0: -1]
                 start = np.array(start)
             else:
-                start = np.array(start_points)
+                start = combine_start_points(self.warm_start_solutions, start_points)
             n_restart_ = start.shape[0]
 
             if n_restart_ > n_best_restarts and n_best_restarts > 0:
@@ -902,11 +965,16 @@ class BayesianQuadrature(object):
         logger.info("Results of the optimization of the posterior mean: ", *self.args_handler)
         logger.info(optimal_solutions.get(ind_max), *self.args_handler)
 
-        if index_cache not in self.optimal_solutions:
-            self.optimal_solutions[index_cache] = []
+        if index_solutions not in self.optimal_solutions:
+            self.optimal_solutions[index_solutions] = []
 
-        self.optimal_solutions[index_cache].append(optimal_solutions.get(ind_max))
+        self.optimal_solutions[index_solutions].append(optimal_solutions.get(ind_max))
         self.max_mean[index_cache] = max_
+
+        self.warm_start_solutions = add_warm_start_points(
+            self.warm_start_solutions, [optimal_solutions.get(ind_max)['solution']],
+            MAX_WARM_START_POINTS)
+
         return optimal_solutions.get(ind_max)
 
     def compute_vectors_b(self, points, candidate_points, historical_points, parameters_kernel,
@@ -975,6 +1043,81 @@ class BayesianQuadrature(object):
         return {'b_new': b_new, 'vec_covs': vec_covs}
 
 
+    def get_quadratures_discretization(self, points, parameters_kernel, parallel=True,
+                                       n_threads=0):
+        """
+        Computes B(x, i) for every x in points and every historical point i. The results are
+        stored by parameters of the kernel. If historical points were added after the last call
+        (e.g. by add_points_evaluations), only their columns are computed, and if the points of
+        the last call are a prefix of points (e.g. an adaptive discretization), only the rows of
+        the new points are computed.
+
+        :param points: np.array(nxk), discretization of the domain of x
+        :param parameters_kernel: np.array(l)
+        :param parallel: boolean
+        :param n_threads: (int)
+
+        :return: np.array(nxm)
+        """
+
+        historical_points = self.gp.data['points']
+        m = historical_points.shape[0]
+        index = self.gp.cache_keys.get_id(parameters_kernel)
+
+        stored = self.quadratures_store.pop(index, None)
+
+        n_rows = 0
+        if stored is not None:
+            n_stored = stored['historical_points'].shape[0]
+            if n_stored <= m and np.array_equal(stored['historical_points'],
+                                                historical_points[0: n_stored, :]):
+                n_rows = self.get_length_common_prefix(stored['points'], points)
+
+        if n_rows > 0:
+            vec_covs = stored['vec_covs'][0: n_rows, :]
+            if n_stored < m:
+                computations = self.compute_vectors_b(
+                    points[0: n_rows, :], None, historical_points[n_stored:, :],
+                    parameters_kernel, True, False, parallel, n_threads=n_threads)
+                vec_covs = np.concatenate((vec_covs, computations['vec_covs']), axis=1)
+        else:
+            vec_covs = np.zeros((0, m))
+
+        if n_rows < points.shape[0]:
+            computations = self.compute_vectors_b(points[n_rows:, :], None, historical_points,
+                                                  parameters_kernel, True, False, parallel,
+                                                  n_threads=n_threads)
+            vec_covs = np.concatenate((vec_covs, computations['vec_covs']), axis=0)
+
+        self.quadratures_store[index] = {
+            'points': points,
+            'historical_points': np.array(historical_points),
+            'vec_covs': vec_covs,
+        }
+
+        if len(self.quadratures_store) > MAX_STORED_QUADRATURES:
+            self.quadratures_store.popitem(last=False)
+
+        return vec_covs
+
+    @staticmethod
+    def get_length_common_prefix(points, other_points):
+        """
+        :param points: np.array(nxk)
+        :param other_points: np.array(n'xk)
+        :return: (int) number of first rows that are equal in both arrays.
+        """
+        if points is other_points:
+            return points.shape[0]
+
+        n = min(points.shape[0], other_points.shape[0])
+        equal = np.all(points[0: n, :] == other_points[0: n, :], axis=1)
+
+        if np.all(equal):
+            return n
+
+        return int(np.argmin(equal))
+
     def compute_posterior_parameters_kg_many_cp(self, points, candidate_points, cache=True,
                                                 parallel=True):
         """
@@ -1013,7 +1156,12 @@ class BayesianQuadrature(object):
 
         compute_vec_covs = False
         if cache:
-            vec_covs = self._get_cached_data((tuple(parameters_kernel, )), QUADRATURES)
+            index_cache = self.gp.cache_keys.get_key(parameters_kernel)
+            vec_covs = self._get_cached_data(index_cache, QUADRATURES)
+            if vec_covs is None:
+                vec_covs = self.get_quadratures_discretization(points, parameters_kernel,
+                                                               parallel)
+                self._updated_cached_data(index_cache, vec_covs, QUADRATURES)
         else:
             vec_covs = None
 
@@ -1034,17 +1182,18 @@ class BayesianQuadrature(object):
 
         if cache:
             if compute_vec_covs:
-                self._updated_cached_data((tuple(parameters_kernel), ), vec_covs, QUADRATURES)
+                self._updated_cached_data(index_cache, vec_covs, QUADRATURES)
 
         if cache:
-            mu_n = self._get_cached_data((tuple(parameters_kernel),), POSTERIOR_MEAN)
+            index_mean = self.gp.cache_keys.get_key(parameters_kernel, mean)
+            mu_n = self._get_cached_data(index_mean, POSTERIOR_MEAN)
         else:
             mu_n = None
 
         if mu_n is None:
             mu_n = mean + np.dot(vec_covs, solve)
             if cache:
-                self._updated_cached_data((tuple(parameters_kernel),), mu_n, POSTERIOR_MEAN)
+                self._updated_cached_data(index_mean, mu_n, POSTERIOR_MEAN)
 
         # TODO: CACHE SO WE DON'T COMPUTE MU_N ALL THE TIME
         cross_cov = self.gp.evaluate_cross_cov(self.gp.data['points'], candidate_points,
@@ -1105,11 +1254,16 @@ class BayesianQuadrature(object):
         chol = chol_solve['chol']
         solve = chol_solve['solve']
 
-        index_cache = (tuple(candidate_point[0, :]), tuple(parameters_kernel))
-        if cache and index_cache in self.cache_sample:
-            solve_2 = self.cache_sample[index_cache]['solve_2']
-            denominator = self.cache_sample[index_cache]['denominator']
-            cross_cov = self.cache_sample[index_cache]['gamma']
+        index_cache = self.gp.cache_keys.get_key(candidate_point[0, :], parameters_kernel)
+
+        cached_sample = None
+        if cache:
+            cached_sample = self.cache_sample.get(index_cache)
+
+        if cached_sample is not None:
+            solve_2 = cached_sample['solve_2']
+            denominator = cached_sample['denominator']
+            cross_cov = cached_sample['gamma']
         else:
 
             cross_cov = self.gp.evaluate_cross_cov(self.gp.data['points'], candidate_point,
@@ -1126,12 +1280,15 @@ class BayesianQuadrature(object):
             denominator = np.clip(denominator, 0, None)
             denominator = np.sqrt(denominator)
             if cache:
+                cached_sample = {
+                    'denominator': denominator,
+                    'solve_2': solve_2,
+                    'gamma': cross_cov,
+                }
                 if clear_cache:
-                    self.cache_sample = {}
-                self.cache_sample[index_cache] = {}
-                self.cache_sample[index_cache]['denominator'] = denominator
-                self.cache_sample[index_cache]['solve_2'] = solve_2
-                self.cache_sample[index_cache]['gamma'] = cross_cov
+                    self.cache_sample = {index_cache: cached_sample}
+                else:
+                    self.cache_sample[index_cache] = cached_sample
 
         return {
             'gamma': cross_cov,
@@ -1298,8 +1455,8 @@ class BayesianQuadrature(object):
         :param keep_indexes: [int], indexes of the points saved of the discretization.
             They are used to get the useful elements of the cached data. Monte_carlo is False.
         :param monte_carlo: If True, we cache the data using the indexes to cache the data of the
-            monte carlo samples.
-        :param n_threads: (int) If n_threads > 0, memory is shared between threads
+            monte carlo samples. These data are cached in the caches of the current thread.
+        :param n_threads: (int) Threads are used if n_threads > 0
 
         :return: (vec_covs, b_new)
         """
@@ -1312,12 +1469,12 @@ class BayesianQuadrature(object):
 
         if cache:
             if not monte_carlo:
-                index_b_new = (tuple(parameters_kernel), tuple(candidate_point[0, :]))
+                index_b_new = self.gp.cache_keys.get_key(parameters_kernel, candidate_point[0, :])
             else:
-                index_b_new = (tuple(parameters_kernel), tuple(candidate_point[0, :]),
-                               tuple(points[0, :]))
+                index_b_new = self.gp.cache_keys.get_key(parameters_kernel, candidate_point[0, :],
+                                                         points[0, :])
 
-            b_new = self._get_cached_data(index_b_new, B_NEW)
+            b_new = self._get_cached_data(index_b_new, B_NEW, thread=monte_carlo)
         else:
             b_new = None
 
@@ -1331,14 +1488,20 @@ class BayesianQuadrature(object):
         compute_vec_covs = False
         if cache:
             if not monte_carlo:
-                index_vec_covs = (tuple(parameters_kernel), )
+                index_vec_covs = self.gp.cache_keys.get_key(parameters_kernel)
             else:
-                index_vec_covs = (tuple(parameters_kernel), tuple(points[0, :]))
+                index_vec_covs = self.gp.cache_keys.get_key(parameters_kernel, points[0, :])
 
-            vec_covs = self._get_cached_data(index_vec_covs, QUADRATURES)
+            vec_covs = self._get_cached_data(index_vec_covs, QUADRATURES, thread=monte_carlo)
         else:
             vec_covs = None
 
+        if vec_covs is None and cache and not monte_carlo and keep_indexes is None:
+            vec_covs = self.get_quadratures_discretization(points, parameters_kernel, parallel,
+                                                           n_threads=n_threads)
+            self._updated_cached_data(index_vec_covs, vec_covs, QUADRATURES,
+                                      clear_cache=clear_cache)
+
         if vec_covs is None:
             compute_vec_covs = True
             vec_covs = np.zeros((n, m))
@@ -1357,17 +1520,12 @@ class BayesianQuadrature(object):
                 b_new = computations['b_new']
 
         if cache:
-            if n_threads > 0 and monte_carlo:
-                thread = True
-            else:
-                thread = False
-
             if compute_vec_covs:
-                self._updated_cached_data(index_vec_covs, vec_covs, QUADRATURES, thread=thread,
-                                          clear_cache=clear_cache)
+                self._updated_cached_data(index_vec_covs, vec_covs, QUADRATURES,
+                                          thread=monte_carlo, clear_cache=clear_cache)
 
             if compute_b_new:
-                self._updated_cached_data(index_b_new, b_new, B_NEW, thread=thread,
+                self._updated_cached_data(index_b_new, b_new, B_NEW, thread=monte_carlo,
                                           clear_cache=clear_cache)
 
         return vec_covs, b_new
@@ -1404,6 +1562,11 @@ class BayesianQuadrature(object):
         if mean is None:
             mean = self.gp.mean.value[0]
 
+        # The quadratures are computed for every point, so the whole grid is needed. to_array
+        # builds it only once.
+        if isinstance(points, DiscretizationGrid):
+            points = points.to_array()
+
         chol_solve = self.gp._cholesky_solve_vectors_for_posterior(
             var_noise, mean, parameters_kernel, cache=cache)
         chol = chol_solve['chol']
@@ -1413,14 +1576,15 @@ class BayesianQuadrature(object):
                                             parallel, n_threads=n_threads)
 
         if cache:
-            mu_n = self._get_cached_data((tuple(parameters_kernel), mean), POSTERIOR_MEAN)
+            index_mean = self.gp.cache_keys.get_key(parameters_kernel, mean)
+            mu_n = self._get_cached_data(index_mean, POSTERIOR_MEAN)
         else:
             mu_n = None
 
         if mu_n is None:
             mu_n = mean + np.dot(vec_covs, solve)
             if cache:
-                self._updated_cached_data((tuple(parameters_kernel), mean), mu_n, POSTERIOR_MEAN)
+                self._updated_cached_data(index_mean, mu_n, POSTERIOR_MEAN)
 
         # TODO: CACHE SO WE DON'T COMPUTE MU_N ALL THE TIME
         cross_cov = self.gp.evaluate_cross_cov(candidate_point, self.gp.data['points'],
@@ -1560,10 +1724,10 @@ class BayesianQuadrature(object):
         if mean is None:
             mean = self.gp.mean.value[0]
 
-        index = (var_noise, mean, tuple(parameters_kernel))
+        index = self.gp.cache_keys.get_key(var_noise, mean, parameters_kernel)
 
-        if index in self.best_solution:
-            best = self.best_solution[index]
+        best = self.best_solution.get(index)
+        if best is not None:
             return best
 
         points = self.gp.data['points'][:, self.x_domain]
@@ -1628,6 +1792,7 @@ class BayesianQuadrature(object):
         # (a solution for every set of parameters of the model)
         self.best_solution = {}
         self.cache_sample = {}
+        self._thread_caches = threading.local()
 
         self.var_noise = None
         if self.gp.noise and self.gp.data.get('var_noise') is not None:
@@ -1663,37 +1828,14 @@ class BayesianQuadrature(object):
             kernel_name += kernel + '_'
         kernel_name = kernel_name[0: -1]
 
-        f_name = self._filename_points_mu_evaluations(
-                                                model_type=model_type,
-                                                problem_name=problem_name,
-                                                type_kernel=kernel_name,
-                                                training_name=training_name,
-                                                n_training=n_training,
-                                                random_seed=random_seed)
-
-        debug_path = path.join(debug_dir, f_name)
-
-        vectors = JSONFile.read(debug_path)
-
-        if vectors is None:
-            bounds = self.gp.bounds
-            bounds = [bounds[i] for i in xrange(len(bounds)) if i in self.x_domain]
-
-            n_points = n_points_by_dimension
-            if n_points is None:
-                n_points = (bounds[0][1] - bounds[0][0]) * 10
-
-            points = []
-            for bound, number_points in zip(bounds, n_points):
-                points.append(np.linspace(bound[0], bound[1], number_points))
-
-            vectors = []
-            for point in itertools.product(*points):
-                vectors.append(point)
+        bounds = self.gp.bounds
+        bounds = [bounds[i] for i in xrange(len(bounds)) if i in self.x_domain]
 
-            JSONFile.write(vectors, debug_path)
+        n_points = n_points_by_dimension
+        if n_points is None:
+            n_points = (bounds[0][1] - bounds[0][0]) * 10
 
-        vectors = np.array(vectors)
+        vectors = DiscretizationGrid.from_bounds(bounds, n_points).to_array()
 
         values = self.compute_posterior_parameters(vectors, only_mean=True, parallel=True)['mean']
 
@@ -2,7 +2,13 @@ from __future__ import absolute_import
 
 import numpy as np
 
-from collections import Counter
+from collections import Counter, OrderedDict
+from os import path
+import os
+import time
+import hashlib
+import cPickle
+import ujson
 
 from stratified_bayesian_optimization.services.domain import (
     DomainService
@@ -19,8 +25,15 @@ from stratified_bayesian_optimization.lib.constant import (
     SGD_NAME,
     EI_METHOD,
     SDE_METHOD,
+    PREPARED_RUNS_DIR,
+    TRACES_DIR,
+    GP_DIR,
+    PROBLEM_DIR,
+    DEFAULT_RANDOM_SEED,
 )
 from stratified_bayesian_optimization.lib.distances import Distances
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
 from stratified_bayesian_optimization.entities.objective import Objective
 from stratified_bayesian_optimization.acquisition_functions.sbo import SBO
 from stratified_bayesian_optimization.acquisition_functions.ei import EI
@@ -35,6 +48,11 @@ logger = SBOLog(__name__)
 class BGO(object):
     _possible_optimization_methods = [SBO_METHOD, MULTI_TASK_METHOD, EI_METHOD, SDE_METHOD]
 
+    _filename_prepared_run = 'prepared_run_{problem_name}_{key}.pkl'.format
+
+    _filename_trace = 'trace_{problem_name}_{model_type}_{training_name}_{n_training}_' \
+                      '{random_seed}_{method}_samples_params_{n_samples_parameters}.jsonl'.format
+
     @classmethod
     def from_spec(cls, spec):
         """
@@ -53,6 +71,9 @@ class BGO(object):
         logger.info("Algorithm used is:")
         logger.info(method_optimization)
 
+        startup_profile = OrderedDict()
+        start = time.time()
+
         gp_model = GPFittingService.from_dict(spec)
 
         simplex_domain = spec.get('simplex_domain', None)
@@ -61,8 +82,14 @@ class BGO(object):
         quadrature = None
         acquisition_function = None
 
+        startup_profile['gp_model'] = time.time() - start
+        start = time.time()
+
         domain = DomainService.from_dict(spec)
 
+        startup_profile['domain'] = time.time() - start
+        start = time.time()
+
         if method_optimization not in cls._possible_optimization_methods:
             raise Exception("Incorrect BGO method")
 
@@ -73,7 +100,14 @@ class BGO(object):
             quadrature = BayesianQuadrature(gp_model, x_domain, distribution,
                                             parameters_distribution=parameters_distribution)
 
-            acquisition_function = SBO(quadrature, np.array(domain.discretization_domain_x))
+            discretization = domain.discretization_domain_x
+            if discretization is not None and not isinstance(discretization, DiscretizationGrid):
+                discretization = np.array(discretization)
+            acquisition_function = SBO(
+                quadrature, discretization,
+                adaptive_discretization=spec.get('adaptive_discretization', False),
+                n_points_adaptive_discretization=spec.get('n_points_adaptive_discretization'),
+                common_random_numbers=spec.get('common_random_numbers', False))
         elif method_optimization == MULTI_TASK_METHOD:
             x_domain = spec.get('x_domain')
             distribution = spec.get('distribution')
@@ -92,6 +126,9 @@ class BGO(object):
             weights = np.array(parameters_distribution['weights'])
             acquisition_function = SDE(gp_model, domain_random, x_domain, weights)
 
+        startup_profile['acquisition_function'] = time.time() - start
+        start = time.time()
+
         problem_name = spec.get('problem_name')
         training_name = spec.get('training_name')
         n_samples = spec.get('n_samples')
@@ -114,16 +151,185 @@ class BGO(object):
                   n_samples_parameters=n_samples_parameters,
                   use_only_training_points=use_only_training_points)
 
+        startup_profile['bgo'] = time.time() - start
+        start = time.time()
+
         if n_training < len(bgo.gp_model.training_data['evaluations']):
             extra_iterations = len(bgo.gp_model.training_data['evaluations']) - n_training
-            data = JSONFile.read(bgo.objective.file_path)
+            data = bgo.objective.read_log()
+            if data is None:
+                data = JSONFile.read(bgo.objective.file_path)
             bgo.objective.evaluated_points = data['evaluated_points'][0:extra_iterations]
             bgo.objective.objective_values = data['objective_values'][0:extra_iterations]
             bgo.objective.model_objective_values = \
                 data['model_objective_values'][0:extra_iterations]
             bgo.objective.standard_deviation_evaluations = data['standard_deviation_evaluations']
 
+        startup_profile['history'] = time.time() - start
+        bgo.startup_profile = startup_profile
+
+        return bgo
+
+    @classmethod
+    def get_prepared_run_path(cls, spec):
+        """
+        The prepared run is identified by a hash of the spec. The state of the files read by
+        from_spec is stored in the prepared run, and checked when it's loaded (see
+        get_input_files).
+
+        :param spec: RunSpecEntity
+        :return: str
+        """
+        key = hashlib.md5(ujson.dumps(spec.to_primitive(), sort_keys=True)).hexdigest()
+
+        filename = cls._filename_prepared_run(problem_name=spec.get('problem_name'), key=key)
+
+        return path.join(PREPARED_RUNS_DIR, filename)
+
+    @classmethod
+    def get_input_files(cls, spec):
+        """
+        Gets the files read by from_spec that can be regenerated under the same name: the stored
+        GP model of the run, whose data are used as training data, and the training data and
+        training points of the problem. The discretization is built from the bounds of the spec,
+        so it doesn't depend on a file.
+
+        The prepared runs must be deleted by hand (they're in PREPARED_RUNS_DIR) if any other
+        input changes, e.g. the module of the problem or the code of the models.
+
+        :param spec: RunSpecEntity
+        :return: {str: [float, int] or None}, the modification time and the size of each file,
+            or None if the file doesn't exist.
+        """
+        problem_name = spec.get('problem_name')
+        n_training = spec.get('n_training', 0)
+        random_seed = spec.get('random_seed', DEFAULT_RANDOM_SEED)
+        points = spec.get('points')
+
+        training_name = spec.get('training_name')
+        if training_name is None:
+            training_name = 'default_training_data_%d_points_rs_%d' % (n_training, random_seed)
+
+        model_type = GPFittingService._model_map[spec.get('name_model')]
+        gp_filename = GPFittingService._get_filename_modified(
+            model_type, problem_name, spec.get('type_kernel'), training_name,
+            spec.get('method_optimization'), spec.get('n_samples_parameters', 0))
+
+        n_points = n_training
+        rs = random_seed
+        if points is not None and len(points) > 0:
+            n_points = len(points)
+            rs = 0
+
+        training_dir = path.join(PROBLEM_DIR, problem_name, 'data')
+
+        files = [
+            path.join(GP_DIR, problem_name, gp_filename),
+            path.join(training_dir, TrainingDataService._filename(
+                problem_name=problem_name, training_name=training_name, n_points=n_points,
+                random_seed=rs)),
+            path.join(training_dir, TrainingDataService._filename_domain(
+                problem_name=problem_name, training_name=training_name, n_points=n_training,
+                random_seed=random_seed)),
+        ]
+
+        input_files = {}
+        for filename in files:
+            input_files[filename] = None
+            if os.path.exists(filename):
+                input_files[filename] = [os.path.getmtime(filename), os.path.getsize(filename)]
+
+        return input_files
+
+    @classmethod
+    def write_prepared_run(cls, bgo, spec):
+        """
+        Writes the BGO object built from the spec (GP model with its fitted parameters and
+        samplers, training data, discretization and acquisition function) and the state of the
+        random generator into one binary file.
+
+        :param bgo: BGO
+        :param spec: RunSpecEntity
+        """
+        if not os.path.exists(PREPARED_RUNS_DIR):
+            os.makedirs(PREPARED_RUNS_DIR)
+
+        filename = cls.get_prepared_run_path(spec)
+
+        data = {
+            'spec': spec.to_primitive(),
+            'input_files': cls.get_input_files(spec),
+            'bgo': bgo,
+            'random_state': np.random.get_state(),
+        }
+
+        # Several runs of a sweep may prepare the same spec, so the file is written atomically.
+        tmp_filename = filename + '.%d.tmp' % os.getpid()
+        with open(tmp_filename, 'wb') as f:
+            cPickle.dump(data, f, cPickle.HIGHEST_PROTOCOL)
+        os.rename(tmp_filename, filename)
+
+    @classmethod
+    def load_prepared_run(cls, spec):
+        """
+        Loads the BGO object of the spec written by write_prepared_run, and restores the state of
+        the random generator, so the run continues as if it was built by from_spec.
+
+        :param spec: RunSpecEntity
+        :return: BGO or None if the run wasn't prepared, or if a file read by from_spec changed
+            after the run was prepared.
+        """
+        filename = cls.get_prepared_run_path(spec)
+
+        if not os.path.exists(filename):
+            return None
 
+        with open(filename, 'rb') as f:
+            data = cPickle.load(f)
+
+        if data['spec'] != spec.to_primitive():
+            return None
+
+        if data.get('input_files') != cls.get_input_files(spec):
+            logger.info("The input files of the prepared run %s changed" % filename)
+            return None
+
+        np.random.set_state(data['random_state'])
+
+        return data['bgo']
+
+    @classmethod
+    def prepare_run(cls, spec):
+        """
+        Builds the BGO object of the spec, or loads it if the run was prepared before. Runs that
+        read the results of a previous run (use_only_training_points is False) are never
+        prepared, because the files that they read change between runs.
+
+        :param spec: RunSpecEntity
+        :return: BGO
+        """
+        use_prepared_run = spec.get('use_prepared_run', False) and \
+            spec.get('use_only_training_points', True)
+
+        start = time.time()
+
+        bgo = None
+        if use_prepared_run:
+            bgo = cls.load_prepared_run(spec)
+
+        if bgo is not None:
+            bgo.startup_profile = OrderedDict([('prepared_run', time.time() - start)])
+        else:
+            bgo = cls.from_spec(spec)
+            if use_prepared_run:
+                cls.write_prepared_run(bgo, spec)
+
+        if spec.get('profile_startup', False):
+            total = np.sum(bgo.startup_profile.values())
+            logger.info("Startup time: %f seconds" % total)
+            for name, value in bgo.startup_profile.iteritems():
+                logger.info("  %s: %f seconds (%.1f%%)" % (name, value,
+                                                           100.0 * value / max(total, 1e-10)))
 
         return bgo
 
@@ -172,6 +378,22 @@ class BGO(object):
         self.n_samples = n_samples
         self.number_points_each_dimension_debug = number_points_each_dimension_debug
 
+        # Seconds spent in each step of the startup (see from_spec and prepare_run)
+        self.startup_profile = OrderedDict()
+
+    def get_trace_path(self, n_samples_parameters=0):
+        """
+        :param n_samples_parameters: int
+        :return: (str) path of the trace file of the run
+        """
+        filename = self._filename_trace(
+            problem_name=self.problem_name, model_type=self.name_model,
+            training_name=self.training_name, n_training=self.n_training,
+            random_seed=self.random_seed, method=self.method_optimization,
+            n_samples_parameters=n_samples_parameters)
+
+        return path.join(TRACES_DIR, filename)
+
     def optimize(self, random_seed=None, start=None, debug=False, monte_carlo_sbo=False,
                  n_samples_mc=1, n_restarts_mc=1, n_best_restarts_mc=0,
                  n_restarts=10, n_best_restarts=0, n_samples_parameters=0, n_restarts_mean=1000,
@@ -179,7 +401,7 @@ class BGO(object):
                  n_samples_parameters_mean=0, maxepoch_mean=20, threshold_sbo=None,
                  optimize_only_posterior_mean=False, start_optimize_posterior_mean=0,
                  optimize_mean_each_iteration=True, default_n_samples_parameters=None,
-                 default_n_samples=None, **opt_params_mc):
+                 default_n_samples=None, trace_file=None, **opt_params_mc):
         """
         Optimize objective over the domain.
         :param random_seed: int
@@ -203,6 +425,9 @@ class BGO(object):
         :param maxepoch_mean: (int)
         :param threshold_sbo: (float) If VOI < threshold_sbo, then we choose randomly a point
             instead.
+        :param trace_file: (str) If it's not None, the time spent in each phase of each
+            iteration, the counters of Instrumentation and the memory used are written into this
+            JSON-lines file.
         :param opt_params_mc:
             -'factr': int
             -'maxiter': int
@@ -213,6 +438,44 @@ class BGO(object):
         }
         """
 
+        # Tracing is enabled for the whole process, so it is disabled even if the run fails.
+        try:
+            if trace_file is not None:
+                Instrumentation.enable(trace_file)
+                for name, value in self.startup_profile.iteritems():
+                    Instrumentation.add_time(name, value)
+                Instrumentation.write_iteration('startup')
+
+            return self._optimize(
+                random_seed=random_seed, start=start, debug=debug,
+                monte_carlo_sbo=monte_carlo_sbo, n_samples_mc=n_samples_mc,
+                n_restarts_mc=n_restarts_mc, n_best_restarts_mc=n_best_restarts_mc,
+                n_restarts=n_restarts, n_best_restarts=n_best_restarts,
+                n_samples_parameters=n_samples_parameters, n_restarts_mean=n_restarts_mean,
+                n_best_restarts_mean=n_best_restarts_mean, method_opt_mc=method_opt_mc,
+                maxepoch=maxepoch, n_samples_parameters_mean=n_samples_parameters_mean,
+                maxepoch_mean=maxepoch_mean, threshold_sbo=threshold_sbo,
+                optimize_only_posterior_mean=optimize_only_posterior_mean,
+                start_optimize_posterior_mean=start_optimize_posterior_mean,
+                optimize_mean_each_iteration=optimize_mean_each_iteration,
+                default_n_samples_parameters=default_n_samples_parameters,
+                default_n_samples=default_n_samples, **opt_params_mc)
+        finally:
+            if trace_file is not None:
+                Instrumentation.disable()
+
+    def _optimize(self, random_seed=None, start=None, debug=False, monte_carlo_sbo=False,
+                  n_samples_mc=1, n_restarts_mc=1, n_best_restarts_mc=0,
+                  n_restarts=10, n_best_restarts=0, n_samples_parameters=0, n_restarts_mean=1000,
+                  n_best_restarts_mean=100, method_opt_mc=None, maxepoch=10,
+                  n_samples_parameters_mean=0, maxepoch_mean=20, threshold_sbo=None,
+                  optimize_only_posterior_mean=False, start_optimize_posterior_mean=0,
+                  optimize_mean_each_iteration=True, default_n_samples_parameters=None,
+                  default_n_samples=None, **opt_params_mc):
+        """
+        Optimizes the objective, see optimize.
+        """
+
         if optimize_only_posterior_mean:
             # only for noisless problems
             chosen_points = self.gp_model.data.copy()
@@ -264,126 +527,160 @@ class BGO(object):
             method_opt_mu = DOGLEG
 
         if optimize_mean_each_iteration or 0 == self.n_iterations:
-            if self.method_optimization == SDE_METHOD:
-                optimize_mean = self.acquisition_function.optimize_mean(
-                    n_restarts=n_restarts_mean,
-                    candidate_solutions=self.objective.evaluated_points,
-                    candidate_values=self.objective.objective_values)
-            else:
-                optimize_mean = model.optimize_posterior_mean(
-                    minimize=self.minimize, n_restarts=n_restarts_mean,
-                    n_best_restarts=n_best_restarts_mean,
-                    n_samples_parameters=n_samples_parameters_mean,
-                    start_new_chain=True, method_opt=method_opt_mu, maxepoch=maxepoch_mean,
-                    candidate_solutions=self.objective.evaluated_points,
-                    candidate_values=self.objective.objective_values)
-
-            optimal_value = \
-                self.objective.add_point(
-                    optimize_mean['solution'], optimize_mean['optimal_value'][0])
-
-            model.write_debug_data(self.problem_name, self.name_model, self.training_name,
-                                   self.n_training, self.random_seed, self.method_optimization,
-                                   n_samples_parameters)
+            with Instrumentation.timer('optimize_posterior_mean'):
+                if self.method_optimization == SDE_METHOD:
+                    optimize_mean = self.acquisition_function.optimize_mean(
+                        n_restarts=n_restarts_mean,
+                        candidate_solutions=self.objective.evaluated_points,
+                        candidate_values=self.objective.objective_values)
+                else:
+                    optimize_mean = model.optimize_posterior_mean(
+                        minimize=self.minimize, n_restarts=n_restarts_mean,
+                        n_best_restarts=n_best_restarts_mean,
+                        n_samples_parameters=n_samples_parameters_mean,
+                        start_new_chain=True, method_opt=method_opt_mu, maxepoch=maxepoch_mean,
+                        candidate_solutions=self.objective.evaluated_points,
+                        candidate_values=self.objective.objective_values)
+
+            with Instrumentation.timer('evaluate_solution'):
+                optimal_value = \
+                    self.objective.add_point(
+                        optimize_mean['solution'], optimize_mean['optimal_value'][0])
+
+            with Instrumentation.timer('write_debug_data'):
+                model.write_debug_data(self.problem_name, self.name_model, self.training_name,
+                                       self.n_training, self.random_seed,
+                                       self.method_optimization, n_samples_parameters)
 
         if debug:
-            model.generate_evaluations(
-                self.problem_name, self.name_model, self.training_name, self.n_training,
-                self.random_seed, 0, n_points_by_dimension=self.number_points_each_dimension_debug)
+            with Instrumentation.timer('debug_evaluations'):
+                model.generate_evaluations(
+                    self.problem_name, self.name_model, self.training_name, self.n_training,
+                    self.random_seed, 0,
+                    n_points_by_dimension=self.number_points_each_dimension_debug)
+
+        Instrumentation.write_iteration('initial',
+                                        n_points=len(self.gp_model.data['evaluations']))
 
         start_new_chain_acquisition_function = False
         if optimize_mean_each_iteration:
             start_new_chain_acquisition_function = True
 
         for iteration in range(self.n_iterations):
+            start_iteration = time.time()
             evaluation = None
             if not optimize_only_posterior_mean or iteration >= total_points:
-                new_point_sol = self.acquisition_function.optimize(
-                    parallel=self.parallel, start=start, monte_carlo=monte_carlo_sbo,
-                    n_samples=n_samples_mc, n_restarts_mc=n_restarts_mc,
-                    n_best_restarts_mc=n_best_restarts_mc, n_restarts=n_restarts,
-                    n_best_restarts=n_best_restarts, n_samples_parameters=n_samples_parameters,
-                    start_new_chain=start_new_chain_acquisition_function,
-                    method_opt_mc=method_opt_mc, maxepoch=maxepoch, start_ei=start_ei,
-                    default_n_samples_parameters=default_n_samples_parameters,
-                    default_n_samples=default_n_samples, **opt_params_mc)
+                with Instrumentation.timer('optimize_acquisition_function'):
+                    new_point_sol = self.acquisition_function.optimize(
+                        parallel=self.parallel, start=start, monte_carlo=monte_carlo_sbo,
+                        n_samples=n_samples_mc, n_restarts_mc=n_restarts_mc,
+                        n_best_restarts_mc=n_best_restarts_mc, n_restarts=n_restarts,
+                        n_best_restarts=n_best_restarts,
+                        n_samples_parameters=n_samples_parameters,
+                        start_new_chain=start_new_chain_acquisition_function,
+                        method_opt_mc=method_opt_mc, maxepoch=maxepoch, start_ei=start_ei,
+                        default_n_samples_parameters=default_n_samples_parameters,
+                        default_n_samples=default_n_samples, **opt_params_mc)
             else:
-                point = \
-                    chosen_points['points'][n_training + start_optimize_posterior_mean + iteration, :]
+                index = n_training + start_optimize_posterior_mean + iteration
+                point = chosen_points['points'][index, :]
                 new_point_sol = {'optimal_value': 0.0, 'solution': point}
-                evaluation = \
-                    chosen_points['evaluations'][n_training + start_optimize_posterior_mean + iteration]
+                evaluation = chosen_points['evaluations'][index]
                 evaluation = [evaluation]
 
             value_sbo = new_point_sol['optimal_value']
             new_point = new_point_sol['solution']
 
-            self.acquisition_function.write_debug_data(self.problem_name, self.name_model,
-                                                       self.training_name, self.n_training,
-                                                       self.random_seed,
-                                                       n_samples_parameters=n_samples_parameters,
-                                                       monte_carlo=monte_carlo_sbo)
+            with Instrumentation.timer('write_debug_data'):
+                self.acquisition_function.write_debug_data(
+                    self.problem_name, self.name_model, self.training_name, self.n_training,
+                    self.random_seed, n_samples_parameters=n_samples_parameters,
+                    monte_carlo=monte_carlo_sbo)
 
             if debug:
-                self.acquisition_function.generate_evaluations(
-                    self.problem_name, self.name_model, self.training_name, self.n_training,
-                    self.random_seed, iteration,
-                    n_points_by_dimension=self.number_points_each_dimension_debug,
-                    monte_carlo=monte_carlo_sbo, n_samples=n_samples_mc,
-                    n_restarts_mc=n_restarts_mc)
+                with Instrumentation.timer('debug_evaluations'):
+                    self.acquisition_function.generate_evaluations(
+                        self.problem_name, self.name_model, self.training_name, self.n_training,
+                        self.random_seed, iteration,
+                        n_points_by_dimension=self.number_points_each_dimension_debug,
+                        monte_carlo=monte_carlo_sbo, n_samples=n_samples_mc,
+                        n_restarts_mc=n_restarts_mc)
 
 
             self.acquisition_function.clean_cache()
 
             if evaluation is None:
-                if self.objective.module is not None:
-                    evaluation = TrainingDataService.evaluate_function(
-                        self.objective.module, new_point, self.n_samples)
-                else:
-                    if self.n_samples == 0 or self.n_samples is None:
-                        evaluation = self.objective.training_function(new_point)
+                with Instrumentation.timer('evaluate_objective'):
+                    if self.objective.module is not None:
+                        evaluation = TrainingDataService.evaluate_function(
+                            self.objective.module, new_point, self.n_samples)
                     else:
-                        evaluation = self.objective.training_function(new_point, self.n_samples)
+                        if self.n_samples == 0 or self.n_samples is None:
+                            evaluation = self.objective.training_function(new_point)
+                        else:
+                            evaluation = self.objective.training_function(new_point,
+                                                                          self.n_samples)
 
             if self.objective.noise:
                 noise = np.array([evaluation[1]])
 
-            self.gp_model.add_points_evaluations(new_point.reshape((1, len(new_point))),
-                                                 np.array([evaluation[0]]),
-                                                 var_noise_eval=noise)
+            with Instrumentation.timer('add_points_evaluations'):
+                self.gp_model.add_points_evaluations(new_point.reshape((1, len(new_point))),
+                                                     np.array([evaluation[0]]),
+                                                     var_noise_eval=noise)
+
+            if self.gp_model.warm_start and n_samples_parameters == 0:
+                # Refits by MLE only if the log-likelihood changed more than refit_threshold,
+                # the chain of samples of the parameters is continued by start_new_chain when
+                # n_samples_parameters > 0.
+                with Instrumentation.timer('refit_gp'):
+                    self.gp_model.refit_gp_regression()
 
-            GPFittingService.write_gp_model(self.gp_model, method=self.method_optimization,
-                                            n_samples_parameters=n_samples_parameters)
+            with Instrumentation.timer('write_gp_model'):
+                GPFittingService.write_gp_model(self.gp_model, method=self.method_optimization,
+                                                n_samples_parameters=n_samples_parameters)
 
             if optimize_mean_each_iteration or iteration == self.n_iterations - 1:
-                if self.method_optimization == SDE_METHOD:
-                    optimize_mean = self.acquisition_function.optimize_mean(
-                        n_restarts=n_restarts_mean,
-                        candidate_solutions=self.objective.evaluated_points,
-                        candidate_values=self.objective.objective_values)
-                else:
-                    optimize_mean = model.optimize_posterior_mean(
-                        minimize=self.minimize, n_restarts=n_restarts_mean,
-                        n_best_restarts=n_best_restarts_mean,
-                        n_samples_parameters=n_samples_parameters_mean,
-                        start_new_chain=True, method_opt=method_opt_mu, maxepoch=maxepoch_mean,
-                        candidate_solutions=self.objective.evaluated_points,
-                        candidate_values=self.objective.objective_values
-                    )
+                with Instrumentation.timer('optimize_posterior_mean'):
+                    if self.method_optimization == SDE_METHOD:
+                        optimize_mean = self.acquisition_function.optimize_mean(
+                            n_restarts=n_restarts_mean,
+                            candidate_solutions=self.objective.evaluated_points,
+                            candidate_values=self.objective.objective_values)
+                    else:
+                        optimize_mean = model.optimize_posterior_mean(
+                            minimize=self.minimize, n_restarts=n_restarts_mean,
+                            n_best_restarts=n_best_restarts_mean,
+                            n_samples_parameters=n_samples_parameters_mean,
+                            start_new_chain=True, method_opt=method_opt_mu,
+                            maxepoch=maxepoch_mean,
+                            candidate_solutions=self.objective.evaluated_points,
+                            candidate_values=self.objective.objective_values
+                        )
+
+                with Instrumentation.timer('evaluate_solution'):
+                    optimal_value = \
+                        self.objective.add_point(optimize_mean['solution'],
+                                                 optimize_mean['optimal_value'][0])
+
+                with Instrumentation.timer('write_debug_data'):
+                    model.write_debug_data(self.problem_name, self.name_model,
+                                           self.training_name, self.n_training,
+                                           self.random_seed, self.method_optimization,
+                                           n_samples_parameters)
 
-                optimal_value = \
-                    self.objective.add_point(optimize_mean['solution'],
-                                             optimize_mean['optimal_value'][0])
+            if debug:
+                with Instrumentation.timer('debug_evaluations'):
+                    model.generate_evaluations(
+                        self.problem_name, self.name_model, self.training_name, self.n_training,
+                        self.random_seed, iteration + 1,
+                        n_points_by_dimension=self.number_points_each_dimension_debug)
 
-                model.write_debug_data(self.problem_name, self.name_model, self.training_name,
-                                       self.n_training, self.random_seed, self.method_optimization,
-                                       n_samples_parameters)
+            Instrumentation.add_time('iteration', time.time() - start_iteration)
+            Instrumentation.write_iteration(iteration,
+                                            n_points=len(self.gp_model.data['evaluations']))
 
-            if debug:
-                model.generate_evaluations(
-                    self.problem_name, self.name_model, self.training_name, self.n_training,
-                    self.random_seed, iteration + 1,
-                    n_points_by_dimension=self.number_points_each_dimension_debug)
+        self.objective.export_json()
 
         return {
             'optimal_solution': optimize_mean['solution'],
@@ -402,7 +699,7 @@ class BGO(object):
         }
         """
       #  spec.simplex_domain = None
-        bgo = cls.from_spec(spec)
+        bgo = cls.prepare_run(spec)
 
         debug = spec.get('debug')
         monte_carlo_sbo = spec.get('monte_carlo_sbo')
@@ -437,6 +734,10 @@ class BGO(object):
         optimize_only_posterior_mean = spec.get('optimize_only_posterior_mean', False)
         start_optimize_posterior_mean = spec.get('start_optimize_posterior_mean', 0)
 
+        trace_file = None
+        if spec.get('trace', False):
+            trace_file = bgo.get_trace_path(n_samples_parameters)
+
         # WE CAN STILL ADD THE DOMAIN IF NEEDED FOR THE KG
         result = bgo.optimize(debug=debug, n_samples_mc=n_samples_mc, n_restarts_mc=n_restarts_mc,
                               n_best_restarts_mc=n_best_restarts_mc,
@@ -451,5 +752,5 @@ class BGO(object):
                               maxepoch=maxepoch, threshold_sbo=threshold_sbo,
                               optimize_only_posterior_mean=optimize_only_posterior_mean,
                               start_optimize_posterior_mean=start_optimize_posterior_mean,
-                              **opt_params_mc)
+                              trace_file=trace_file, **opt_params_mc)
         return result
@@ -0,0 +1,306 @@
+from __future__ import absolute_import
+
+from collections import OrderedDict
+from os import path
+import os
+import time
+
+import numpy as np
+
+from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.kernels.matern52 import Matern52
+from stratified_bayesian_optimization.kernels.product_kernels import ProductKernels
+from stratified_bayesian_optimization.models.gp_fitting_gaussian import GPFittingGaussian
+from stratified_bayesian_optimization.numerical_tools.bayesian_quadrature import BayesianQuadrature
+from stratified_bayesian_optimization.acquisition_functions.sbo import SBO
+from stratified_bayesian_optimization.acquisition_functions.ei import EI
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
+from stratified_bayesian_optimization.lib.util import separate_numpy_arrays_in_lists
+from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.lib.constant import (
+    PRODUCT_KERNELS_SEPARABLE,
+    MATERN52_NAME,
+    TASKS_KERNEL_NAME,
+    UNIFORM_FINITE,
+    TASKS,
+    BENCHMARKS_DIR,
+)
+
+logger = SBOLog(__name__)
+
+
+class BenchmarkService(object):
+    """
+    Offline benchmarks of the numerical core. Each benchmark builds a problem with n training
+    points, x in [0, 1]^d and |W| tasks (the models are not fitted, so nothing is read from disk),
+    and times one operation and measures the memory that it uses. The results are compared against
+    a stored baseline to catch performance regressions.
+    """
+
+    _filename_baseline = 'baseline.json'
+
+    # Default sweep of (n, d, |W|)
+    _sizes = [(50, 1, 2), (50, 3, 2), (200, 1, 2), (200, 3, 5)]
+
+    _benchmarks = ['matern52_cov', 'product_kernels_cov', 'log_likelihood',
+                   'grad_log_likelihood', 'compute_posterior_parameters_kg', 'sbo_evaluate',
+                   'ei_optimize', 'sample_parameters']
+
+    # Number of points of the discretization used by the quadrature and SBO
+    _n_discretization = 50
+
+    @classmethod
+    def get_baseline_path(cls):
+        return path.join(BENCHMARKS_DIR, cls._filename_baseline)
+
+    @staticmethod
+    def get_key(name, n, d, w):
+        """
+        :param name: (str) name of the benchmark
+        :param n: (int) number of training points
+        :param d: (int) dimension of x
+        :param w: (int) number of tasks
+        :return: str
+        """
+        return '%s_n_%d_d_%d_w_%d' % (name, n, d, w)
+
+    @staticmethod
+    def get_training_data(n, d, w, random_seed=1):
+        """
+        :param n: (int) number of training points
+        :param d: (int) dimension of x
+        :param w: (int) number of tasks
+        :param random_seed: int
+        :return: {'points': np.array(nx(d+1)), 'evaluations': [float], 'var_noise': []}, the last
+            column of the points is the task.
+        """
+        random = np.random.RandomState(random_seed)
+        x = random.uniform(0, 1, (n, d))
+        tasks = random.randint(w, size=(n, 1))
+        evaluations = np.sum(np.sin(4.0 * x), axis=1) + tasks[:, 0] + \
+            random.normal(0, 0.1, n)
+
+        return {
+            'points': np.concatenate((x, tasks), axis=1),
+            'evaluations': list(evaluations),
+            'var_noise': [],
+        }
+
+    @staticmethod
+    def get_gp_model(training_data, d, w):
+        """
+        Product of a Matern52 kernel on x and a task kernel on w. The parameters are the default
+        ones, except for the noise and the mean.
+
+        :param training_data: {'points': np.array(nx(d+1)), 'evaluations': [float]}
+        :param d: (int) dimension of x
+        :param w: (int) number of tasks
+        :return: GPFittingGaussian
+        """
+        gp_model = GPFittingGaussian(
+            [PRODUCT_KERNELS_SEPARABLE, MATERN52_NAME, TASKS_KERNEL_NAME], training_data,
+            [d + 1, d, w], bounds_domain=[[0, 1]] * d + [range(w)], type_bounds=[0] * d + [1])
+
+        parameters = gp_model.get_value_parameters_model
+        parameters[0] = 0.01
+        parameters[1] = np.mean(training_data['evaluations'])
+        gp_model.update_value_parameters(parameters)
+
+        return gp_model
+
+    @classmethod
+    def get_function(cls, name, n, d, w):
+        """
+        Builds the problem of the benchmark, and returns the function that is timed.
+
+        :param name: (str) name of the benchmark
+        :param n: (int) number of training points
+        :param d: (int) dimension of x
+        :param w: (int) number of tasks
+        :return: function without arguments
+        """
+        training_data = cls.get_training_data(n, d, w)
+        points = training_data['points']
+
+        if name == 'matern52_cov':
+            parameters = np.ones(d + 1)
+            return lambda: Matern52.evaluate_cov_defined_by_params(parameters, points[:, 0: d], d)
+
+        gp_model = cls.get_gp_model(training_data, d, w)
+        var_noise = gp_model.var_noise.value[0]
+        mean = gp_model.mean.value[0]
+        parameters_kernel = gp_model.kernel.hypers_values_as_array
+
+        if name == 'product_kernels_cov':
+            parameters = separate_numpy_arrays_in_lists(parameters_kernel,
+                                                        gp_model.number_parameters[1])
+            inputs = {MATERN52_NAME: points[:, 0: d], TASKS_KERNEL_NAME: points[:, d: d + 1]}
+            return lambda: ProductKernels.evaluate_cov_defined_by_params(
+                parameters, inputs, [d, w], [MATERN52_NAME, TASKS_KERNEL_NAME])
+
+        if name == 'log_likelihood':
+            def function():
+                gp_model.clean_cache()
+                return gp_model.log_likelihood(var_noise, mean, parameters_kernel)
+            return function
+
+        if name == 'grad_log_likelihood':
+            def function():
+                gp_model.clean_cache()
+                return gp_model.grad_log_likelihood(var_noise, mean, parameters_kernel)
+            return function
+
+        if name == 'sample_parameters':
+            return lambda: gp_model.sample_parameters(5, random_seed=1)
+
+        random = np.random.RandomState(2)
+        candidate_point = np.concatenate((random.uniform(0, 1, (1, d)), [[0]]), axis=1)
+
+        if name == 'ei_optimize':
+            ei = EI(gp_model)
+            return lambda: ei.optimize(random_seed=1, parallel=False, n_restarts=5)
+
+        quadrature = BayesianQuadrature(gp_model, range(d), UNIFORM_FINITE, {TASKS: w})
+        discretization = random.uniform(0, 1, (cls._n_discretization, d))
+
+        if name == 'compute_posterior_parameters_kg':
+            return lambda: quadrature.compute_posterior_parameters_kg(
+                discretization, candidate_point, cache=False, parallel=False)
+
+        if name == 'sbo_evaluate':
+            sbo = SBO(quadrature, discretization)
+            return lambda: sbo.evaluate(candidate_point, cache=False)
+
+        raise ValueError("Unknown benchmark %s" % name)
+
+    @staticmethod
+    def time_function(function, n_repeats=3):
+        """
+        :param function: function without arguments
+        :param n_repeats: int
+        :return: {'time': float, 'memory': float or None}, the time is the minimum over the
+            repeats in seconds, and memory is the peak resident memory of the process during the
+            repeats minus its resident memory before them (MB). The peak is reset before the
+            repeats, so that it doesn't depend on the previous benchmarks; memory is None if it
+            can't be reset (i.e. not on Linux).
+        """
+        memory = None
+        if Instrumentation.reset_peak_memory():
+            memory = Instrumentation.get_resident_memory()
+
+        times = []
+        for i in xrange(n_repeats):
+            start = time.time()
+            function()
+            times.append(time.time() - start)
+
+        if memory is not None:
+            memory = max(Instrumentation.get_resident_memory()['peak_rss'] - memory['rss'], 0.0)
+
+        return {
+            'time': min(times),
+            'memory': memory,
+        }
+
+    @classmethod
+    def run(cls, names=None, sizes=None, n_repeats=3):
+        """
+        Runs the benchmarks over the sweep of sizes.
+
+        :param names: [str] names of the benchmarks, all of them if it's None.
+        :param sizes: [(int, int, int)] list of (n, d, |W|)
+        :param n_repeats: int
+        :return: {str: {'name': str, 'n': int, 'd': int, 'w': int, 'time': float,
+            'memory': float or None}}, the keys are given by get_key.
+        """
+        if names is None:
+            names = cls._benchmarks
+
+        if sizes is None:
+            sizes = cls._sizes
+
+        results = OrderedDict()
+        for name in names:
+            for n, d, w in sizes:
+                function = cls.get_function(name, n, d, w)
+                result = cls.time_function(function, n_repeats=n_repeats)
+                result.update({'name': name, 'n': n, 'd': d, 'w': w})
+
+                key = cls.get_key(name, n, d, w)
+                results[key] = result
+                logger.info("%s: %f seconds" % (key, result['time']))
+
+        return results
+
+    @classmethod
+    def write_baseline(cls, results, filename=None):
+        """
+        :param results: output of run
+        :param filename: str
+        """
+        if filename is None:
+            filename = cls.get_baseline_path()
+
+        directory = path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        JSONFile.write(results, filename)
+
+    @classmethod
+    def read_baseline(cls, filename=None):
+        """
+        :param filename: str
+        :return: output of run or None
+        """
+        if filename is None:
+            filename = cls.get_baseline_path()
+
+        return JSONFile.read(filename)
+
+    @staticmethod
+    def compare(results, baseline, tolerance=0.5, min_time=1e-3, memory_tolerance=0.5,
+                min_memory=1.0):
+        """
+        Finds the benchmarks that are slower, or use more memory, than in the baseline.
+
+        :param results: output of run
+        :param baseline: output of run
+        :param tolerance: (float) a benchmark regressed if its time is larger than
+            (1 + tolerance) * baseline time.
+        :param min_time: (float) differences smaller than min_time seconds are ignored, because
+            they are dominated by noise.
+        :param memory_tolerance: (float) a benchmark regressed if its memory is larger than
+            (1 + memory_tolerance) * baseline memory.
+        :param min_memory: (float) differences smaller than min_memory MB are ignored, because
+            the resident memory is counted in pages and depends on the allocator.
+        :return: {str: {str: {'value': float, 'baseline': float, 'ratio': float}}}, the regressed
+            benchmarks and, for each of them, the regressed metrics ('time' or 'memory').
+        """
+        regressions = OrderedDict()
+
+        metrics = [('time', tolerance, min_time), ('memory', memory_tolerance, min_memory)]
+
+        for key, result in results.iteritems():
+            if key not in baseline:
+                continue
+
+            for metric, tolerance_metric, min_difference in metrics:
+                value = result.get(metric)
+                baseline_value = baseline[key].get(metric)
+
+                # The memory isn't measured on all the platforms.
+                if value is None or baseline_value is None:
+                    continue
+
+                if value - baseline_value < min_difference:
+                    continue
+
+                if value > (1.0 + tolerance_metric) * baseline_value:
+                    regressions.setdefault(key, OrderedDict())[metric] = {
+                        'value': value,
+                        'baseline': baseline_value,
+                        'ratio': value / max(baseline_value, 1e-10),
+                    }
+
+        return regressions
@@ -12,6 +12,7 @@ from stratified_bayesian_optimization.lib.constant import (
     DOMAIN_DIR,
     PROBLEM_DIR,
 )
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
 from stratified_bayesian_optimization.util.json_file import JSONFile
 
 logger = SBOLog(__name__)
@@ -22,7 +23,8 @@ class DomainService(object):
                        '{number_points_each_dimension}.json'.format
 
     @classmethod
-    def load_discretization(cls, problem_name, bounds_domain_x, number_points_each_dimension_x):
+    def load_discretization(cls, problem_name, bounds_domain_x, number_points_each_dimension_x,
+                            as_grid=False):
         """
         Try to load discretization for problem_name from file. If the file doesn't exist, will
         generate the discretization and store it.
@@ -30,12 +32,20 @@ class DomainService(object):
         :param problem_name: (str)
         :param bounds_domain_x: ([BoundsEntity])
         :param number_points_each_dimension_x: ([int])
+        :param as_grid: (boolean) If True, returns a DiscretizationGrid whose points are computed
+            when they're needed. The file isn't read or written, since building the grid is
+            cheaper than parsing it. The gain is limited to the construction of the domain: the
+            quadratures of SBO need all the points, so BayesianQuadrature builds the whole array
+            the first time that it uses the grid.
 
-        :return: [[float]]
+        :return: [[float]] or DiscretizationGrid
         """
 
         bounds_str = BoundsEntity.get_bounds_as_lists(bounds_domain_x)
 
+        if as_grid:
+            return DiscretizationGrid.from_bounds(bounds_str, number_points_each_dimension_x)
+
         filename = cls._disc_x_filename(
             name=problem_name,
             bounds=bounds_str,
@@ -85,7 +95,7 @@ class DomainService(object):
         if 'number_points_each_dimension' in spec:
             entry['discretization_domain_x'] = \
                 cls.load_discretization(spec['problem_name'], entry['bounds_domain_x'],
-                                        spec['number_points_each_dimension'])
+                                        spec['number_points_each_dimension'], as_grid=True)
 
         return DomainEntity(entry)
 
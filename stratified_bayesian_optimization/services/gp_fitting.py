@@ -61,6 +61,8 @@ class GPFittingService(object):
             'simplex_domain': spec.get('simplex_domain', None),
             'objective_function': spec.get('objective_function', None),
             'define_samplers':  spec.get('define_samplers', True),
+            'warm_start': spec.get('warm_start_gp', False),
+            'refit_threshold': spec.get('refit_threshold'),
         }
 
         return cls.get_gp(**entry)
@@ -126,7 +128,7 @@ class GPFittingService(object):
                var_noise_value=None, cache=True, same_correlation=False,
                use_only_training_points=True, optimization_method=None, n_samples_parameters=0,
                parallel_training=True, simplex_domain=None, objective_function=None,
-               define_samplers=True):
+               define_samplers=True, warm_start=False, refit_threshold=None):
         """
         Fetch a GP model from file if it exists, otherwise train a new model and save it locally.
 
@@ -170,6 +172,9 @@ class GPFittingService(object):
         :param parallel_training: (boolean)
         :param define_samplers: (boolean) If False, samplers for the hyperparameters are not
             defined.
+        :param warm_start: (boolean) If True, the model is refitted after adding new points only
+            if the log-likelihood changed more than refit_threshold.
+        :param refit_threshold: (float) change of the log-likelihood per training point.
 
         :return: (GPFittingGaussian) - An instance of GPFittingGaussian
         """
@@ -210,7 +215,12 @@ class GPFittingService(object):
             data = None
 
         if data is not None:
-            return model_type.deserialize(data, use_only_training_points=use_only_training_points)
+            gp_model = model_type.deserialize(
+                data, use_only_training_points=use_only_training_points)
+            gp_model.warm_start = warm_start
+            if refit_threshold is not None:
+                gp_model.refit_threshold = refit_threshold
+            return gp_model
 
         if training_data is None or training_data == {}:
             training_data = TrainingDataService.get_training_data(
@@ -228,7 +238,8 @@ class GPFittingService(object):
                                     problem_name=problem_name, kernel_values=kernel_values,
                                     mean_value=mean_value, var_noise_value=var_noise_value,
                                     same_correlation=same_correlation,
-                                    simplex_domain=simplex_domain, define_samplers=define_samplers)
+                                    simplex_domain=simplex_domain, define_samplers=define_samplers,
+                                    warm_start=warm_start, refit_threshold=refit_threshold)
 
         JSONFile.write(gp_model.serialize(), gp_path)
 
@@ -0,0 +1,177 @@
+from __future__ import absolute_import
+
+from os import path
+import os
+
+import numpy as np
+import ujson
+
+from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.lib.constant import (
+    PROBLEM_DIR,
+    PARTIAL_RESULTS,
+)
+
+logger = SBOLog(__name__)
+
+
+class ResultsIndex(object):
+    """
+    Index of the objective values of all the runs of a problem. It's a JSON-lines file in the
+    partial results directory of the problem, where each line is written by Objective.add_point:
+
+        {"file": name of the results file, "iteration": int, "value": float}
+
+    so that the results of all the runs are collected reading only one file.
+    """
+
+    _filename = 'results_index.jsonl'
+
+    @classmethod
+    def get_path(cls, problem_name):
+        """
+        :param problem_name: str
+        :return: str
+        """
+        return path.join(PROBLEM_DIR, problem_name, PARTIAL_RESULTS, cls._filename)
+
+    @classmethod
+    def append(cls, problem_name, file_name, iteration, value):
+        """
+        Appends the objective value of a run at one iteration to the index. The line is written
+        with a single call to os.write on a file opened with O_APPEND, so that several runs can
+        write in the index at the same time.
+
+        :param problem_name: str
+        :param file_name: (str) name of the results file of the run
+        :param iteration: int
+        :param value: float
+        """
+        cls.append_lines(problem_name, [(file_name, iteration, value)])
+
+    @classmethod
+    def append_lines(cls, problem_name, records):
+        """
+        :param problem_name: str
+        :param records: [(str, int, float)]
+        """
+        lines = ''.join(
+            [ujson.dumps({'file': file_name, 'iteration': iteration, 'value': float(value)}) +
+             '\n' for file_name, iteration, value in records])
+
+        fd = os.open(cls.get_path(problem_name), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0644)
+        try:
+            os.write(fd, lines)
+        finally:
+            os.close(fd)
+
+    @classmethod
+    def read_index(cls, problem_name):
+        """
+        Reads the index. Since the runs write their values in order, a value of iteration i
+        replaces the values of the iterations >= i of that run (e.g. the run was restarted).
+        The runs whose values have a gap (e.g. the run had already started when the index was
+        created) aren't returned, so that their results files are read.
+
+        :param problem_name: str
+        :return: {str: [float]}
+        """
+        file_path = cls.get_path(problem_name)
+
+        results = {}
+
+        if not path.exists(file_path):
+            return results
+
+        with open(file_path) as f:
+            for line in f:
+                try:
+                    record = ujson.loads(line)
+                except ValueError:
+                    continue
+
+                values = results.setdefault(record['file'], [])
+                del values[record['iteration']:]
+
+                # The missing iterations are None until a record of an earlier iteration
+                # replaces them.
+                values += [None] * (record['iteration'] - len(values))
+                values.append(record['value'])
+
+        return {key: values for key, values in results.iteritems() if None not in values}
+
+    @staticmethod
+    def read_values(file_path):
+        """
+        Reads the objective values of a results file, or of the log of the results written by
+        Objective (a .jsonl file). A truncated last line of the log is ignored.
+
+        :param file_path: str
+        :return: [float] or None
+        """
+        if not file_path.endswith('.jsonl'):
+            data = JSONFile.read(file_path)
+            if data is None or 'objective_values' not in data:
+                return None
+            return data['objective_values']
+
+        values = []
+        with open(file_path) as f:
+            for line in f:
+                try:
+                    record = ujson.loads(line)
+                except ValueError:
+                    continue
+                values.append(record['objective_value'])
+
+        return values
+
+    @classmethod
+    def load(cls, problem_name):
+        """
+        Loads the objective values of all the runs of the problem. Results files that aren't in
+        the index, or whose values in the index have a gap (e.g. they were written before the index
+        existed), are read and added to it. The log of the results of a run is read instead of
+        its results file if it exists, because the results file is only exported every
+        EXPORT_RESULTS_POINTS points.
+
+        :param problem_name: str
+        :return: {str: np.array(n)}, the key is the name of the results file.
+        """
+        dir = path.join(PROBLEM_DIR, problem_name, PARTIAL_RESULTS)
+
+        if not os.path.exists(dir):
+            return {}
+
+        results = cls.read_index(problem_name)
+
+        # {name of the results file: name of the file that is read}
+        files = {}
+        for file_name in os.listdir(dir):
+            if not file_name.startswith('results_') or file_name == cls._filename:
+                continue
+
+            if file_name.endswith('.jsonl'):
+                files[file_name[0: -1]] = file_name
+            elif file_name.endswith('.json'):
+                files.setdefault(file_name, file_name)
+
+        missing = []
+        for key in sorted(files):
+            if key in results:
+                continue
+
+            values = cls.read_values(path.join(dir, files[key]))
+            if values is None:
+                continue
+
+            results[key] = values
+            missing += [(key, iteration, value) for iteration, value in enumerate(values)]
+
+        if len(missing) > 0:
+            logger.info("Adding %d values to the results index of %s" % (len(missing),
+                                                                        problem_name))
+            cls.append_lines(problem_name, missing)
+
+        return {key: np.array(value, dtype=float) for key, value in results.iteritems()}
@@ -0,0 +1,187 @@
+from __future__ import absolute_import
+
+import multiprocessing as mp
+from os import path
+import time
+
+import ujson
+
+from stratified_bayesian_optimization.initializers.log import SBOLog
+from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.services.spec import SpecService
+from stratified_bayesian_optimization.services.bayesian_global_optimization import BGO
+
+logger = SBOLog(__name__)
+
+
+DONE = 'done'
+FAILED = 'failed'
+RUNNING = 'running'
+PREEMPTED = 'preempted'
+
+
+def run_spec_process(n_spec, multiple_spec, n_processes, output_file):
+    """
+    Runs the n_spec-th spec of multiple_spec, and writes its result as scripts.run does. It's the
+    target of the processes created by SchedulerService.
+
+    :param n_spec: int
+    :param multiple_spec: MultipleSpecEntity
+    :param n_processes: (int) maximum number of processes used by Parallel, and of BLAS threads
+        of the spec.
+    :param output_file: (str) file where the output of BGO.run_spec is written.
+    """
+    Parallel.set_max_processes(n_processes)
+    Parallel.set_blas_threads(n_processes)
+    spec = SpecService.generate_specs(n_spec, multiple_spec)
+    result = BGO.run_spec(spec)
+
+    with open(output_file, 'w') as f:
+        ujson.dump(result, f)
+
+
+class SchedulerService(object):
+
+    @classmethod
+    def get_budget(cls, n_specs_parallel=None, n_processes_spec=None):
+        """
+        Splits the cpus of the machine between the specs that run at the same time.
+
+        :param n_specs_parallel: (int) number of specs run at the same time
+        :param n_processes_spec: (int) maximum number of processes used by each spec
+        :return: (int, int) n_specs_parallel, n_processes_spec
+        """
+        n_cpus = mp.cpu_count()
+
+        if n_specs_parallel is None and n_processes_spec is None:
+            n_processes_spec = 1
+
+        if n_specs_parallel is None:
+            n_specs_parallel = max(1, n_cpus / n_processes_spec)
+
+        if n_processes_spec is None:
+            n_processes_spec = max(1, n_cpus / n_specs_parallel)
+
+        return n_specs_parallel, n_processes_spec
+
+    @staticmethod
+    def get_output_file(output_file, n_spec):
+        """
+        :param output_file: (str) e.g. 'output.json'
+        :param n_spec: int
+        :return: (str) e.g. 'spec_1_output.json', in the directory of output_file
+        """
+        return path.join(path.dirname(output_file),
+                         'spec_%d_' % n_spec + path.basename(output_file))
+
+    @classmethod
+    def read_status(cls, status_file, n_specs):
+        """
+        Read the status of the specs of a previous run. Specs that were running when that run
+        was killed are considered preempted.
+
+        :param status_file: str
+        :param n_specs: [int]
+        :return: {int: str}
+        """
+        status = {}
+        data = JSONFile.read(status_file)
+
+        if data is None:
+            data = {}
+
+        for n_spec in n_specs:
+            value = data.get(str(n_spec))
+            if value == RUNNING:
+                value = PREEMPTED
+            status[n_spec] = value
+
+        return status
+
+    @classmethod
+    def write_status(cls, status, status_file):
+        """
+        :param status: {int: str}
+        :param status_file: str
+        """
+        JSONFile.write({str(key): value for key, value in status.iteritems()}, status_file)
+
+    @classmethod
+    def run_multiple_spec(cls, multiple_spec, status_file, n_specs=None, n_specs_parallel=None,
+                          n_processes_spec=None, rerun_failed=True, poll_interval=1.0,
+                          output_file='output.json'):
+        """
+        Runs the specs of multiple_spec on this machine. At most n_specs_parallel specs run at
+        the same time, and each one uses at most n_processes_spec processes in its pools. The
+        status of each spec is written in status_file, so that the specs that were done are
+        skipped if the run is restarted, and the failed or preempted ones are run again.
+
+        :param multiple_spec: MultipleSpecEntity
+        :param status_file: str
+        :param n_specs: [int] indexes of the specs to run, all the specs if it's None.
+        :param n_specs_parallel: int
+        :param n_processes_spec: int
+        :param rerun_failed: (boolean) If False, specs that failed in a previous run are skipped.
+        :param poll_interval: (float) seconds between checks of the running specs.
+        :param output_file: (str) the output of BGO.run_spec of each spec is written in the file
+            given by get_output_file(output_file, n_spec).
+        :return: {int: str} status of each spec
+        """
+        if n_specs is None:
+            n_specs = range(len(multiple_spec.problem_names))
+
+        n_specs_parallel, n_processes_spec = cls.get_budget(n_specs_parallel, n_processes_spec)
+
+        status = cls.read_status(status_file, n_specs)
+
+        pending = [n_spec for n_spec in n_specs if status[n_spec] != DONE and
+                   (rerun_failed or status[n_spec] != FAILED)]
+
+        logger.info("Running %d specs, %d at the same time with %d processes each" % (
+            len(pending), n_specs_parallel, n_processes_spec))
+
+        running = {}
+
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                while len(pending) > 0 and len(running) < n_specs_parallel:
+                    n_spec = pending.pop(0)
+                    process = mp.Process(
+                        target=run_spec_process,
+                        args=(n_spec, multiple_spec, n_processes_spec,
+                              cls.get_output_file(output_file, n_spec)))
+                    process.start()
+                    running[n_spec] = process
+                    status[n_spec] = RUNNING
+                    cls.write_status(status, status_file)
+
+                for n_spec in running.keys():
+                    process = running[n_spec]
+                    if process.is_alive():
+                        continue
+
+                    process.join()
+                    del running[n_spec]
+
+                    if process.exitcode == 0:
+                        status[n_spec] = DONE
+                    else:
+                        status[n_spec] = FAILED
+                        logger.info("Spec %d failed" % n_spec)
+
+                    cls.write_status(status, status_file)
+
+                if len(running) >= n_specs_parallel or \
+                        (len(pending) == 0 and len(running) > 0):
+                    time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            logger.info("Ctrl+c received, terminating the running specs.")
+            for n_spec, process in running.iteritems():
+                process.terminate()
+                process.join()
+                status[n_spec] = PREEMPTED
+            cls.write_status(status, status_file)
+            raise
+
+        return status
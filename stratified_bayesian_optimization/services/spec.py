@@ -8,12 +8,12 @@ import numpy as np
 from stratified_bayesian_optimization.initializers.log import SBOLog
 from stratified_bayesian_optimization.entities.run_spec import RunSpecEntity
 from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.services.results_index import ResultsIndex
 from stratified_bayesian_optimization.lib.constant import (
     DEFAULT_RANDOM_SEED,
     UNIFORM_FINITE,
     DOGLEG,
     PROBLEM_DIR,
-    PARTIAL_RESULTS,
     AGGREGATED_RESULTS,
 )
 
@@ -1011,16 +1011,17 @@ class SpecService(object):
         if rs_up is not None:
             same_random_seeds = True
 
+        # The objective values of all the runs of each problem are read from its results index.
+        results_index = {}
+        for problem_name in set(multiple_spec.get('problem_names')):
+            results_index[problem_name] = ResultsIndex.load(problem_name)
+
         if same_random_seeds:
             random_seeds = {}
             for method in set(multiple_spec.get('method_optimizations')):
                 random_seeds[method] = []
             for i in range(n_specs):
                 problem_name = multiple_spec.get('problem_names')[i]
-                dir = path.join(PROBLEM_DIR, problem_name, PARTIAL_RESULTS)
-
-                if not os.path.exists(dir):
-                    continue
 
                 training_name = multiple_spec.get('training_names')[i]
                 n_training = multiple_spec.get('n_trainings')[i]
@@ -1038,8 +1039,7 @@ class SpecService(object):
                     n_samples_parameters=n_samples_parameters,
                 )
 
-                file_path = path.join(dir, file_name)
-                if not os.path.exists(file_path):
+                if file_name not in results_index[problem_name]:
                     continue
                 random_seeds[method].append(random_seed)
 
@@ -1053,10 +1053,6 @@ class SpecService(object):
 
         for i in xrange(n_specs):
             problem_name = multiple_spec.get('problem_names')[i]
-            dir = path.join(PROBLEM_DIR, problem_name, PARTIAL_RESULTS)
-
-            if not os.path.exists(dir):
-                continue
 
             training_name = multiple_spec.get('training_names')[i]
             n_training = multiple_spec.get('n_trainings')[i]
@@ -1077,21 +1073,17 @@ class SpecService(object):
                 n_samples_parameters=n_samples_parameters,
             )
 
-            file_path = path.join(dir, file_name)
-
-            if not os.path.exists(file_path):
+            if file_name not in results_index[problem_name]:
                 continue
 
-            results = JSONFile.read(file_path)
-            results = results['objective_values']
+            results = results_index[problem_name][file_name]
 
             key_dict = (problem_name, training_name, n_training, method)
             if key_dict not in results_dict:
-                results_dict[key_dict] = \
-                    [[] for _ in range(min(n_iterations + 1, total_iterations))]
+                results_dict[key_dict] = []
 
-            for iteration in range(min(total_iterations, n_iterations + 1, len(results))):
-                results_dict[key_dict][iteration].append(f(sign * results[iteration]))
+            results = results[0: min(total_iterations, n_iterations + 1)]
+            results_dict[key_dict].append(f(sign * results))
 
         problem_names = list(set(multiple_spec.get('problem_names')))
         training_names = set(multiple_spec.get('training_names'))
@@ -1124,15 +1116,23 @@ class SpecService(object):
                             file_path_aggregate = path.join(dir_aggregate, file_name_aggregate)
                             data_aggregate = JSONFile.read(file_path_aggregate)
 
-                        results = results_dict[key]
-
-                        for iteration in xrange(min(len(results), total_iterations)):
-                            if len(results[iteration]) > 0:
-                                values = results[iteration]
-
-                                mean = np.mean(values)
-                                std = np.std(values)
-                                n_samples = len(results[iteration])
+                        # Matrix with one row per run, padded with nan after its last
+                        # iteration.
+                        runs = results_dict[key]
+                        max_iterations = max([len(run) for run in runs])
+                        results = np.nan * np.ones((len(runs), max_iterations))
+                        for j, run in enumerate(runs):
+                            results[j, 0: len(run)] = run
+
+                        counts = np.sum(~np.isnan(results), axis=0)
+                        means = np.nanmean(results, axis=0)
+                        stds = np.nanstd(results, axis=0)
+
+                        for iteration in xrange(min(max_iterations, total_iterations)):
+                            if counts[iteration] > 0:
+                                mean = means[iteration]
+                                std = stds[iteration]
+                                n_samples = int(counts[iteration])
 
                                 if data_aggregate is not None:
                                     aggregate_iteration = data_aggregate[str(iteration)]
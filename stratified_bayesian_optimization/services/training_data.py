@@ -4,6 +4,7 @@ from os import path
 import os
 
 import numpy as np
+import ujson
 
 from stratified_bayesian_optimization.initializers.log import SBOLog
 from stratified_bayesian_optimization.lib.constant import (
@@ -27,6 +28,8 @@ class TrainingDataService(object):
     _filename = 'training_data_{problem_name}_{training_name}_{n_points}_{random_seed}.json'.format
     _filename_domain = 'training_points_{problem_name}_{training_name}_{n_points}_' \
                        '{random_seed}.json'.format
+    _filename_log = 'training_data_{problem_name}_{training_name}_{n_points}_{random_seed}' \
+                    '_log.json'.format
 
     @classmethod
     def from_dict(cls, spec):
@@ -48,6 +51,7 @@ class TrainingDataService(object):
             'random_seed': spec.get('random_seed'),
             'parallel': spec.get('parallel'),
             'type_bounds': spec.get('type_bounds'),
+            'streaming': spec.get('streaming', False),
         }
 
         return cls.get_training_data(**entry)
@@ -57,7 +61,7 @@ class TrainingDataService(object):
                           points=None, noise=False, n_samples=None,
                           random_seed=DEFAULT_RANDOM_SEED, parallel=True, type_bounds=None,
                           cache=True, gp_path_cache=None, simplex_domain=None,
-                          objective_function=None):
+                          objective_function=None, streaming=False):
         """
 
         :param problem_name: str
@@ -75,6 +79,8 @@ class TrainingDataService(object):
         :param type_bounds: [0 or 1], 0 if the bounds are lower or upper bound of the respective
             entry, 1 if the bounds are all the finite options for that entry.
         :param cache: (boolean) Try to get model from cache
+        :param streaming: (boolean) If True, each evaluation is appended to a log as soon as it
+            finishes, and the points already in the log aren't evaluated again.
         :return: {'points': [[float]], 'evaluations': [float], 'var_noise': [float] or []}
         """
 
@@ -134,6 +140,23 @@ class TrainingDataService(object):
             name_module = None
             module = None
 
+        if streaming:
+            log_path = path.join(training_dir, cls._filename_log(
+                problem_name=problem_name,
+                training_name=training_name,
+                n_points=n_training,
+                random_seed=rs,
+            ))
+            training_data = cls.evaluate_points_streaming(
+                points, log_path, noise=noise, n_samples=n_samples, name_module=name_module,
+                objective_function=objective_function, parallel=parallel)
+
+            if cache:
+                JSONFile.write(training_data, training_path)
+            os.remove(log_path)
+
+            return training_data
+
         training_data = {}
         training_data['points'] = points
         training_data['evaluations'] = []
@@ -180,6 +203,141 @@ class TrainingDataService(object):
 
         return training_data
 
+    @classmethod
+    def read_evaluations_log(cls, log_path, points):
+        """
+        Read the evaluations written by evaluate_points_streaming. A record is kept only if
+        its point is the point with the same index in points, and a truncated last line (e.g.
+        the process was killed while writing it) is ignored.
+
+        :param log_path: str
+        :param points: [[float]]
+        :return: {int: {'index': int, 'point': [float], 'evaluation': [float]}}
+        """
+        records = {}
+
+        if not path.exists(log_path):
+            return records
+
+        with open(log_path) as f:
+            for line in f:
+                try:
+                    record = ujson.loads(line)
+                except ValueError:
+                    continue
+
+                index = record['index']
+                if index < len(points) and np.allclose(record['point'], points[index]):
+                    records[index] = record
+
+        return records
+
+    @staticmethod
+    def remove_partial_line(log_path):
+        """
+        Cuts the log back to its last newline, so that a line truncated by a crash isn't glued to
+        the next record appended to the log.
+
+        :param log_path: str
+        """
+        if not path.exists(log_path):
+            return
+
+        with open(log_path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+
+            f.seek(size - 1)
+            if f.read(1) == '\n':
+                return
+
+            f.seek(0)
+            content = f.read()
+            f.truncate(content.rfind('\n') + 1)
+
+    @classmethod
+    def evaluate_points_streaming(cls, points, log_path, noise=False, n_samples=None,
+                                  name_module=None, objective_function=None, parallel=True):
+        """
+        Evaluate the objective function on the points. Each evaluation is appended to the log
+        as soon as it finishes, so that the evaluations aren't lost if the process is killed,
+        and the points that are already in the log aren't evaluated again.
+
+        :param points: [[float]]
+        :param log_path: str
+        :param noise: boolean, true if the evaluations are noisy
+        :param n_samples: int
+        :param name_module: (str) Name of the module of the problem
+        :param objective_function: function, it's used if name_module is None
+        :param parallel: (boolean) Evaluate the points with a pool of processes if it's True.
+        :return: {'points': [[float]], 'evaluations': [float], 'var_noise': [float] or []}
+        """
+        records = cls.read_evaluations_log(log_path, points)
+
+        missing = [i for i in xrange(len(points)) if i not in records]
+
+        if len(records) > 0:
+            logger.info("%d evaluations are read from %s" % (len(records), log_path))
+
+        kwargs = {'name_module': name_module, 'cls_': cls, 'n_samples': n_samples,
+                  'objective_function': objective_function}
+
+        cls.remove_partial_line(log_path)
+
+        with open(log_path, 'a') as f:
+            def write_record(index, evaluation):
+                record = {'index': index, 'point': [float(x) for x in points[index]],
+                          'evaluation': [float(x) for x in evaluation]}
+                f.write(ujson.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+                records[index] = record
+
+            # The workers of the process pools are daemonic, so they can't start a pool.
+            if not parallel or len(missing) == 0 or Parallel.is_worker():
+                for index in missing:
+                    write_record(
+                        index, wrapper_evaluate_objective_function(points[index], **kwargs))
+            else:
+                pool = Parallel.get_process_pool(len(missing))
+                jobs = {}
+
+                try:
+                    # The callbacks are run sequentially by the thread that handles the results
+                    # of the pool, so the records are written one by one.
+                    for index in missing:
+                        jobs[index] = pool.apply_async(
+                            wrapper_evaluate_objective_function, args=(points[index], ),
+                            kwds=kwargs,
+                            callback=lambda evaluation, index=index: write_record(
+                                index, evaluation))
+                    pool.close()
+                    pool.join()
+                except KeyboardInterrupt:
+                    logger.info("Ctrl+c received, terminating and joining pool.")
+                    pool.terminate()
+                    pool.join()
+                    raise
+
+                for index in missing:
+                    # Raises the exception of the failed evaluations, the finished ones are
+                    # already in the log.
+                    jobs[index].get()
+
+        training_data = {}
+        training_data['points'] = points
+        training_data['evaluations'] = \
+            [records[i]['evaluation'][0] for i in xrange(len(points))]
+        training_data['var_noise'] = []
+
+        if noise:
+            training_data['var_noise'] = \
+                [records[i]['evaluation'][1] for i in xrange(len(points))]
+
+        return training_data
+
     @classmethod
     def get_points_domain(cls, n_training, bounds_domain, random_seed, training_name, problem_name,
                           type_bounds=None, simplex_domain=None):
@@ -6,6 +6,8 @@ import mock
 from doubles import expect
 
 import warnings
+import shutil
+from os import path
 
 import numpy as np
 import numpy.testing as npt
@@ -20,6 +22,7 @@ from stratified_bayesian_optimization.lib.constant import (
     TASKS_KERNEL_NAME,
     UNIFORM_FINITE,
     TASKS,
+    DEBUGGING_DIR,
 )
 from stratified_bayesian_optimization.services.gp_fitting import GPFittingService
 from stratified_bayesian_optimization.models.gp_fitting_gaussian import GPFittingGaussian
@@ -137,13 +140,25 @@ class TestEI(unittest.TestCase):
         np.random.seed(2)
         opt = self.ei.optimize(random_seed=1, n_restarts=120)
 
+        self.addCleanup(shutil.rmtree, path.join(DEBUGGING_DIR, '1'), True)
         evaluations = self.ei.generate_evaluations('1', '2', '3', 1, 1, 1, [100], 2)
         npt.assert_almost_equal(opt['optimal_value'], np.max(evaluations))
 
+    def test_optimize_threads(self):
+        np.random.seed(2)
+        opt = self.ei.optimize(random_seed=1, n_restarts=10)
+
+        self.ei.clean_cache()
+        opt_2 = self.ei.optimize(random_seed=1, n_restarts=10, n_threads=4)
+
+        npt.assert_almost_equal(opt['optimal_value'], opt_2['optimal_value'])
+        npt.assert_almost_equal(opt['solution'], opt_2['solution'])
+
     def test_optimize_bq(self):
         np.random.seed(2)
         opt = self.ei_2.optimize(random_seed=1, n_restarts=50)
 
+        self.addCleanup(shutil.rmtree, path.join(DEBUGGING_DIR, '1'), True)
         evaluations = self.ei_2.generate_evaluations('1', '2', '3', 1, 1, 1, [100], 0)
 
         npt.assert_almost_equal(opt['optimal_value'], np.max(evaluations))
@@ -246,7 +261,44 @@ class TestEI(unittest.TestCase):
                                     n_samples_parameters=n_samples_parameters, maxepoch=5)
         npt.assert_almost_equal(value, 0.297100121625)
         npt.assert_almost_equal(gradient, np.array([0.00058253, 0]))
-        npt.assert_almost_equal(sol['optimal_value'], 0.3205552)
+
+        # SGD follows the gradient of the same average of EI that is maximized
+        sol_value = wrapper_objective_acquisition_function(
+            sol['solution'], self.ei, n_samples_parameters)
+        npt.assert_almost_equal(sol['optimal_value'], sol_value)
+
+    def test_evaluate_samples_parameters(self):
+        parameters = self.gp.get_value_parameters_model
+        n_samples_parameters = 3
+        self.gp.samples_parameters = []
+        for i in xrange(n_samples_parameters):
+            sample = deepcopy(parameters)
+            sample[2:] *= 1.0 + 0.05 * i
+            self.gp.samples_parameters.append(sample)
+
+        points = np.array([[99.9, 0], [99.5, 0]])
+        output = self.ei.evaluate_samples_parameters(points, n_samples_parameters,
+                                                     compute_gradient=True)
+        assert len(self.ei.cache_samples_parameters) == n_samples_parameters
+
+        for i in xrange(points.shape[0]):
+            values = []
+            gradients = []
+            for parameter in self.gp.samples_parameters[-n_samples_parameters:]:
+                params = (parameter[0], parameter[1], parameter[2:])
+                values.append(self.ei.evaluate(points[i:i + 1, :], *params))
+                gradients.append(self.ei.evaluate_gradient(points[i:i + 1, :], *params))
+
+            assert output['value'][i] > 0
+            npt.assert_almost_equal(output['value'][i], np.mean(values))
+            npt.assert_almost_equal(output['gradient'][i, :], np.mean(gradients, axis=0))
+
+        value = wrapper_objective_acquisition_function(points[0, :], self.ei,
+                                                       n_samples_parameters)
+        npt.assert_almost_equal(value, output['value'][0:1])
+
+        self.ei.clean_cache()
+        assert self.ei.cache_samples_parameters == {}
 
     def test_optimize_ei(self):
         np.random.seed(2)
@@ -266,10 +318,14 @@ class TestEI(unittest.TestCase):
         np.random.seed(2)
         opt = self.ei.optimize(random_seed=1, n_restarts=4, start_new_chain=True,
                                n_samples_parameters=n_samples_parameters, maxepoch=5)
+        value = wrapper_objective_acquisition_function(
+            opt['solution'], self.ei, n_samples_parameters)
+        npt.assert_almost_equal(opt['optimal_value'], value)
 
         np.random.seed(2)
         opt_2 = self.ei.optimize(random_seed=1, n_restarts=10, n_best_restarts=10,
                                  start_new_chain=True, n_samples_parameters=n_samples_parameters,
                                  maxepoch=5)
-        npt.assert_almost_equal(opt['optimal_value'], 0.31500651)
-        npt.assert_almost_equal(opt_2['optimal_value'], 0.20618003)
+        value = wrapper_objective_acquisition_function(
+            opt_2['solution'], self.ei, n_samples_parameters)
+        npt.assert_almost_equal(opt_2['optimal_value'], value)
@@ -6,6 +6,8 @@ import mock
 from doubles import expect
 
 import warnings
+import shutil
+from os import path
 
 import numpy as np
 import numpy.testing as npt
@@ -20,6 +22,7 @@ from stratified_bayesian_optimization.lib.constant import (
     TASKS_KERNEL_NAME,
     UNIFORM_FINITE,
     TASKS,
+    DEBUGGING_DIR,
     NEWTON_CG_NAME,
     TRUST_N_CG,
     DOGLEG,
@@ -223,6 +226,32 @@ class TestSBO(unittest.TestCase):
         z = self.sbo.hvoi(b, c, keep)
         assert z == 0
 
+    def test_build_adaptive_discretization(self):
+        np.random.seed(1)
+        sbo = SBO(self.gp, adaptive_discretization=True, n_points_adaptive_discretization=250)
+        sbo.bq.optimal_solutions[(0,)] = [{'solution': np.array([50.0]), 'optimal_value': 0.0}]
+
+        points = sbo.build_adaptive_discretization(parallel=False)
+
+        assert points.shape == (250, 1)
+        assert np.all(points >= 0) and np.all(points <= 100)
+        assert points[100, 0] == 50.0
+        npt.assert_almost_equal(points[0: 100, :], self.points[:, 0:1])
+        assert sbo.bq.cache_quadratures == {}
+
+        sbo.discretization = points
+        assert sbo.evaluate(np.array([[52.5, 0]])) >= 0
+
+        # The first points are kept in the next iterations, and the size of the discretization
+        # doesn't grow with the number of historical points
+        sbo.bq.gp.add_points_evaluations(np.array([[10.5, 0], [20.5, 1]]), np.array([1.0, 2.0]))
+        points_2 = sbo.build_adaptive_discretization(candidate=np.array([52.5, 0]),
+                                                     parallel=False)
+
+        assert points_2.shape == (250, 1)
+        npt.assert_almost_equal(points_2[0: 188, :], points[0: 188, :])
+        npt.assert_almost_equal(points_2[188: 190, :], np.array([[10.5], [20.5]]))
+
     def test_optimization(self):
         val = self.sbo_med.optimize(random_seed=1, parallel=False, n_restarts=1, start_ei=False)
         # Benchmark numbers obtained after optimizing the function manually, i.e. plot the function
@@ -243,6 +272,8 @@ class TestSBO(unittest.TestCase):
             self.sbo_med.optimize(random_seed=1, parallel=False)
 
     def test_generate_evaluations(self):
+        self.addCleanup(
+            shutil.rmtree, path.join(DEBUGGING_DIR, 'test_generate_sbo_evals'), True)
         evaluations = self.sbo_2.generate_evaluations(
             "test_generate_sbo_evals", "gp_fitting_gaussian", "test", 5, 1, 0, [10])
 
@@ -360,6 +391,59 @@ class TestSBO(unittest.TestCase):
 
         assert np.max(values) <= eval
 
+    def test_evaluate_sbo_by_sample_threads(self):
+        candidate_point = np.array([[52.5, 0]])
+        sample = -2.0
+
+        np.random.seed(1)
+        value = self.sbo.evaluate_sbo_by_sample(candidate_point, sample, n_restarts=3)
+        self.sbo.clean_cache()
+
+        np.random.seed(1)
+        value_threads = self.sbo.evaluate_sbo_by_sample(candidate_point, sample, n_restarts=3,
+                                                        n_threads=2)
+        npt.assert_almost_equal(value_threads['max'], value['max'])
+        npt.assert_almost_equal(value_threads['optimum'], value['optimum'])
+
+    def test_warm_start_store(self):
+        candidate_point = np.array([[52.5, 0]])
+        np.random.seed(1)
+        self.sbo.evaluate_mc(candidate_point, 3, n_restarts=2, parallel=False)
+        optima = self.sbo.optimal_samples.values()[0]['optimum']
+
+        self.sbo.clean_cache()
+        assert self.sbo.optimal_samples == {}
+
+        warm_start_points = self.sbo.get_warm_start_points_samples()
+        assert 0 < len(warm_start_points) <= 3
+        npt.assert_almost_equal(warm_start_points[0], optima[0])
+
+        start = self.sbo.generate_starting_points_evaluate_mc(5, cache=False)
+        assert start.shape == (6, 1)
+        npt.assert_almost_equal(start[0, :], optima[0])
+
+    def test_warm_start_store_parallel_optimize(self):
+        warnings.filterwarnings("ignore")
+        sbo = SBO(self.gp, common_random_numbers=True)
+
+        # The restarts run in a pool of processes when they are more than half of the budget.
+        Parallel.set_max_processes(2)
+        try:
+            sbo.optimize(random_seed=1, parallel=True, monte_carlo=True, n_samples=2,
+                         n_restarts_mc=2, n_restarts=2, start_ei=False,
+                         **{'factr': 1e12, 'maxiter': 10})
+        finally:
+            Parallel.set_max_processes(None)
+
+        assert sbo.optimal_samples == {}
+        optima = sbo.last_optima_samples
+        assert len(optima) == 2
+
+        sbo.clean_cache()
+        warm_start_points = sbo.get_warm_start_points_samples()
+        npt.assert_almost_equal(warm_start_points[0], optima[0])
+        npt.assert_almost_equal(warm_start_points[1], optima[1])
+
     def test_evaluate_sbo_by_sample_hessian(self):
         candidate_point = np.array([[52.5, 0]])
         np.random.seed(1)
@@ -427,6 +511,34 @@ class TestSBO(unittest.TestCase):
         assert value <= value_2['value'] + 1.96 * value_2['std']
         assert value >= value_2['value'] - 1.96 * value_2['std']
 
+    def test_evaluate_sbo_mc_common_random_numbers(self):
+        warnings.filterwarnings("ignore")
+        sbo = SBO(self.gp, common_random_numbers=True)
+
+        np.random.seed(1)
+        point = np.array([[52.5, 0]])
+        value = sbo.evaluate_mc(point, 10, n_restarts=5, parallel=False)
+        samples = sbo.samples
+
+        assert len(sbo.warm_start_samples) == 1
+        optima = sbo.warm_start_samples.values()[0]
+        assert len(optima) == 10
+
+        with mock.patch.object(sbo, 'evaluate_sbo_by_sample',
+                               wraps=sbo.evaluate_sbo_by_sample) as mock_evaluate:
+            value_2 = sbo.evaluate_mc(np.array([[52.6, 0]]), 10, n_restarts=5, parallel=False)
+            for i, call in enumerate(mock_evaluate.call_args_list):
+                npt.assert_almost_equal(call[1]['start'][0, :], optima[i])
+
+        assert np.all(sbo.samples == samples)
+        npt.assert_almost_equal(value_2['value'], value['value'], decimal=1)
+
+        gradient = sbo.gradient_mc(np.array([[52.6, 0]]), parallel=False)['gradient']
+        assert gradient.shape == (2,)
+
+        sbo.clean_cache()
+        assert sbo.warm_start_samples == {}
+
 
     def test_evaluate_gradient_sbo(self):
 
@@ -6,8 +6,10 @@ import numpy.testing as npt
 from mock import mock_open, patch, MagicMock
 
 import numpy as np
+import os
 
 from stratified_bayesian_optimization.entities.objective import Objective
+from stratified_bayesian_optimization.util.json_file import JSONFile
 
 
 class TestObjective(unittest.TestCase):
@@ -47,4 +49,48 @@ class TestObjective(unittest.TestCase):
         npt.assert_almost_equal(obj.objective_values, [1.0], decimal=1)
         assert obj.standard_deviation_evaluations == [7.8350152288466661e-05]
 
+    def test_log(self):
+        obj = Objective(self.problem_name, 'test_noise_log', self.random_seed, self.n_training,
+                        self.n_samples, self.noise)
+        if os.path.exists(obj.file_path_log):
+            os.remove(obj.file_path_log)
+        if os.path.exists(obj.file_path):
+            os.remove(obj.file_path)
 
+        np.random.seed(1)
+        obj.add_point(np.array([1.0]), 0.5)
+        obj.add_point(np.array([2.0]), np.float64(0.7))
+
+        # The results file is exported when the first point is added
+        assert JSONFile.read(obj.file_path)['evaluated_points'] == [[1.0]]
+        assert not os.path.exists(obj.file_path + '.tmp')
+
+        with open(obj.file_path_log, 'a') as f:
+            f.write('{"point": [3.0], "objective')
+
+        obj_2 = Objective(self.problem_name, 'test_noise_log', self.random_seed, self.n_training,
+                          self.n_samples, self.noise)
+        obj_2.set_data_from_file()
+        assert obj_2.serialize() == obj.serialize()
+
+        obj_2.add_point(np.array([3.0]), 0.9)
+        obj_3 = Objective(self.problem_name, 'test_noise_log', self.random_seed, self.n_training,
+                          self.n_samples, self.noise)
+        obj_3.set_data_from_file()
+        assert obj_3.evaluated_points == [[1.0], [2.0], [3.0]]
+        assert obj_3.model_objective_values == [0.5, 0.7, 0.9]
+        assert len(obj_3.standard_deviation_evaluations) == 3
+
+        obj_3.export_json()
+        data = JSONFile.read(obj_3.file_path)
+        assert data['evaluated_points'] == obj_3.evaluated_points
+        npt.assert_almost_equal(data['objective_values'], obj_3.objective_values)
+
+        # A new run without the history rewrites the log
+        obj_4 = Objective(self.problem_name, 'test_noise_log', self.random_seed, self.n_training,
+                          self.n_samples, self.noise)
+        obj_4.add_point(np.array([4.0]), 1.0)
+        assert obj_4.read_log()['evaluated_points'] == [[4.0]]
+
+        os.remove(obj.file_path_log)
+        os.remove(obj.file_path)
@@ -281,3 +281,75 @@ class TestTasksKernel(unittest.TestCase):
 
         kernel = TasksKernel.define_kernel_from_array(1, np.array([5.0]))
         assert np.all(result == kernel.grad_respect_point(np.array([[0]]), np.array([[0], [0]])))
+
+    def test_compute_base_cov_matrix(self):
+        params = np.array([0.1, -0.3, 0.5, 1.2, -2.0, 0.7])
+        chol, cov = TasksKernel.compute_base_cov_matrix(params, 3)
+
+        L = np.zeros((3, 3))
+        count = 0
+        for i in range(3):
+            for j in range(i + 1):
+                L[i, j] = np.exp(params[count + j])
+            count += i + 1
+
+        npt.assert_almost_equal(chol, L)
+        npt.assert_almost_equal(cov, np.dot(L, L.transpose()))
+
+        chol, cov = TasksKernel.compute_base_cov_matrix(np.array([0.0, 0.0]), 3, True)
+        npt.assert_almost_equal(cov, np.array([[3.0, 1.0, 1.0], [1.0, 3.0, 1.0],
+                                               [1.0, 1.0, 3.0]]))
+        assert np.all(chol == cov)
+
+    def test_get_base_cov_matrix(self):
+        TasksKernel.clean_cache()
+        params = np.array([0.1, -0.3, 0.5])
+
+        matrices = TasksKernel.get_base_cov_matrix(params, 2)
+        assert len(TasksKernel._cache_base_cov) == 1
+        assert TasksKernel.get_base_cov_matrix(params, 2) is matrices
+
+        kernel = TasksKernel.define_kernel_from_array(2, params)
+        kernel.compute_cov_matrix()
+        assert kernel.base_cov_matrix is matrices[1]
+        assert len(TasksKernel._cache_base_cov) == 1
+
+        TasksKernel.get_base_cov_matrix(params[0: 2], 2, True)
+        assert len(TasksKernel._cache_base_cov) == 2
+
+        # A hit makes the entry the most recently used one
+        TasksKernel.get_base_cov_matrix(params, 2)
+        assert TasksKernel._cache_base_cov.keys()[-1] == (2, False, tuple(params))
+
+        TasksKernel.clean_cache()
+        assert len(TasksKernel._cache_base_cov) == 0
+
+    def test_evaluate_defined_by_params_stateless(self):
+        params = np.array([0.1, -0.3, 0.5, 1.2, -2.0, 0.7])
+        inputs = np.array([[0], [2], [1], [2]])
+        inputs_2 = np.array([[1], [0]])
+
+        kernel = TasksKernel.define_kernel_from_array(3, params)
+
+        npt.assert_almost_equal(
+            TasksKernel.evaluate_cov_defined_by_params(params, inputs, 3), kernel.cov(inputs))
+        npt.assert_almost_equal(
+            TasksKernel.evaluate_cross_cov_defined_by_params(params, inputs, inputs_2, 3),
+            kernel.cross_cov(inputs, inputs_2))
+
+        gradient = TasksKernel.evaluate_grad_defined_by_params_respect_params(params, inputs, 3)
+        gradient_kernel = kernel.gradient_respect_parameters(inputs)[LOWER_TRIANG_NAME]
+
+        assert len(gradient) == len(params)
+        for i in xrange(len(params)):
+            npt.assert_almost_equal(gradient[i], gradient_kernel[i])
+            for j in xrange(inputs.shape[0]):
+                for h in xrange(inputs.shape[0]):
+                    dh = np.zeros(len(params))
+                    dh[i] = 1e-7
+                    cov_dh = TasksKernel.compute_base_cov_matrix(params + dh, 3)[1]
+                    cov = TasksKernel.compute_base_cov_matrix(params, 3)[1]
+                    npt.assert_almost_equal(
+                        gradient[i][j, h],
+                        (cov_dh[inputs[j, 0], inputs[h, 0]] - cov[inputs[j, 0], inputs[h, 0]]) /
+                        1e-7, decimal=5)
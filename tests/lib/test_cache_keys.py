@@ -0,0 +1,42 @@
+from __future__ import absolute_import
+
+import unittest
+
+import pickle
+
+import numpy as np
+
+from stratified_bayesian_optimization.lib.cache_keys import CacheKeys
+
+
+class TestCacheKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_keys = CacheKeys()
+
+    def test_get_id(self):
+        id_1 = self.cache_keys.get_id(1.0, np.array([2.0, 3.0]))
+        id_2 = self.cache_keys.get_id(1.0, np.array([2.0, 4.0]))
+
+        assert id_1 != id_2
+        assert self.cache_keys.get_id(1.0, np.array([2.0, 3.0])) == id_1
+        assert self.cache_keys.get_id(1, [2, 3]) == id_1
+        assert self.cache_keys.get_id(np.array([1.0, 2.0, 3.0])) != id_1
+
+    def test_get_key(self):
+        key = self.cache_keys.get_key(np.array([2.0, 3.0]))
+        assert key == (0, self.cache_keys.get_id(np.array([2.0, 3.0])))
+
+        self.cache_keys.new_data_version()
+        new_key = self.cache_keys.get_key(np.array([2.0, 3.0]))
+        assert new_key != key
+        assert new_key[1] == key[1]
+
+    def test_pickle(self):
+        id_1 = self.cache_keys.get_id(np.array([2.0, 3.0]))
+        self.cache_keys.new_data_version()
+
+        cache_keys = pickle.loads(pickle.dumps(self.cache_keys))
+        assert cache_keys.data_version == 1
+        assert cache_keys.get_id(np.array([2.0, 3.0])) == id_1
+        assert cache_keys.get_id(np.array([2.0, 5.0])) == id_1 + 1
@@ -0,0 +1,81 @@
+from __future__ import absolute_import
+
+import unittest
+
+import itertools
+import os
+import numpy as np
+import numpy.testing as npt
+
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
+
+
+class TestDiscretizationGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.bounds = [[0, 1], [2, 4], [-1, 1]]
+        self.n_points = [3, 2, 4]
+        self.grid = DiscretizationGrid.from_bounds(self.bounds, self.n_points)
+
+        points = [np.linspace(bound[0], bound[1], n) for bound, n in
+                  zip(self.bounds, self.n_points)]
+        self.points = np.array([list(point) for point in itertools.product(*points)])
+
+    def test_from_bounds(self):
+        assert self.grid.shape == (24, 3)
+        assert len(self.grid) == 24
+        assert self.grid._array is None
+
+        with self.assertRaises(ValueError):
+            DiscretizationGrid.from_bounds(self.bounds, [1, 2])
+
+        with self.assertRaises(ValueError):
+            DiscretizationGrid()
+
+    def test_get_points(self):
+        npt.assert_almost_equal(self.grid.get_points(5), self.points[5, :])
+        npt.assert_almost_equal(self.grid.get_points(np.array([0, 7, 23])),
+                                self.points[[0, 7, 23], :])
+        assert self.grid._array is None
+
+    def test_getitem(self):
+        npt.assert_almost_equal(self.grid[3], self.points[3])
+        npt.assert_almost_equal(self.grid[2:10], self.points[2:10])
+        npt.assert_almost_equal(self.grid[[1, 4], :], self.points[[1, 4], :])
+        npt.assert_almost_equal(self.grid[np.array([1, 4]), 1:], self.points[[1, 4], 1:])
+        npt.assert_almost_equal(self.grid[5, 2], self.points[5, 2])
+
+        keep = np.zeros(24, dtype=bool)
+        keep[[2, 3, 20]] = True
+        npt.assert_almost_equal(self.grid[keep, :], self.points[keep, :])
+
+        assert self.grid._array is None
+
+    def test_iter_chunks(self):
+        chunks = list(self.grid.iter_chunks(10))
+        assert [chunk.shape[0] for chunk in chunks] == [10, 10, 4]
+        npt.assert_almost_equal(np.concatenate(chunks, axis=0), self.points)
+
+        npt.assert_almost_equal(np.array([point for point in self.grid]), self.points)
+
+    def test_to_array(self):
+        array = np.array(self.grid)
+        npt.assert_almost_equal(array, self.points)
+        assert self.grid.to_array() is np.asarray(self.grid)
+        assert self.grid.to_array().flags['C_CONTIGUOUS']
+
+        npt.assert_almost_equal(self.grid[[1, 4], :], self.points[[1, 4], :])
+
+    def test_save_load(self):
+        filename = 'test_discretization_grid.npy'
+
+        assert DiscretizationGrid.load(filename) is None
+
+        self.grid.save(filename)
+        grid = DiscretizationGrid.load(filename)
+        os.remove(filename)
+
+        assert isinstance(grid._array, np.memmap)
+        assert grid.shape == (24, 3)
+        npt.assert_almost_equal(grid[[0, 5], :], self.points[[0, 5], :])
+        npt.assert_almost_equal(np.array(grid), self.points)
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import unittest
 
 import numpy as np
+import numpy.testing as npt
 
 from copy import deepcopy
 
@@ -10,6 +11,15 @@ from stratified_bayesian_optimization.lib.finite_differences import FiniteDiffer
 from stratified_bayesian_optimization.kernels.matern52 import Matern52
 
 
+def quadratic(x):
+    return np.array([np.sum(x ** 2) + x[0] * x[1], x[2] ** 3])
+
+
+def quadratic_vectorized(points):
+    return np.array([np.sum(points ** 2, axis=1) + points[:, 0] * points[:, 1],
+                     points[:, 2] ** 3]).transpose()
+
+
 class TestFiniteDifferences(unittest.TestCase):
 
     def setUp(self):
@@ -109,3 +119,36 @@ class TestFiniteDifferences(unittest.TestCase):
 
                 assert np.all(val_2 == val)
 
+    def test_forward_difference_batch(self):
+        x = np.array([1.0, 2.0, 3.0])
+        h = np.array([0.1])
+
+        result = FiniteDifferences.forward_difference(quadratic, x, h)
+        result_vectorized = FiniteDifferences.forward_difference(
+            quadratic_vectorized, x, h, vectorized=True)
+        result_parallel = FiniteDifferences.forward_difference(quadratic, x, h, parallel=True)
+
+        for i in xrange(3):
+            npt.assert_almost_equal(result_vectorized[i], result[i])
+            npt.assert_almost_equal(result_parallel[i], result[i])
+
+        npt.assert_almost_equal(result[0], [(1.1 ** 2 - 1.0 + 0.2) / 0.1, 0.0])
+
+    def test_second_order_central_batch(self):
+        x = np.array([1.0, 2.0, 3.0])
+        h = np.array([0.1])
+
+        result = FiniteDifferences.second_order_central(quadratic, x, h)
+        result_vectorized = FiniteDifferences.second_order_central(
+            quadratic_vectorized, x, h, vectorized=True)
+        result_parallel = FiniteDifferences.second_order_central(quadratic, x, h, parallel=True)
+
+        assert len(result) == 9
+        for key in result:
+            npt.assert_almost_equal(result_vectorized[key], result[key])
+            npt.assert_almost_equal(result_parallel[key], result[key])
+
+        npt.assert_almost_equal(result[(0, 0)], [2.0, 0.0])
+        npt.assert_almost_equal(result[(0, 1)], [1.0, 0.0])
+        npt.assert_almost_equal(result[(2, 2)], [2.0, 18.0])
+        npt.assert_almost_equal(result[(1, 2)], [0.0, 0.0])
@@ -0,0 +1,87 @@
+from __future__ import absolute_import
+
+import unittest
+
+import os
+import tempfile
+
+import numpy as np
+
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
+from stratified_bayesian_optimization.lib.la_functions import cholesky
+from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.lib.constant import (
+    CHOLESKY_COUNTER,
+    POOLS_COUNTER,
+    POOL_JOBS_COUNTER,
+)
+
+
+def f(x):
+    return x
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_file = tempfile.mktemp(suffix='.jsonl')
+
+    def tearDown(self):
+        Instrumentation.disable()
+        if os.path.exists(self.trace_file):
+            os.remove(self.trace_file)
+
+    def test_disabled(self):
+        Instrumentation.count('a')
+        Instrumentation.add_time('b', 1.0)
+        with Instrumentation.timer('c'):
+            pass
+
+        assert Instrumentation.write_iteration(0) is None
+        assert not os.path.exists(self.trace_file)
+
+    def test_write_iteration(self):
+        Instrumentation.enable(self.trace_file)
+        assert Instrumentation.is_enabled()
+
+        Instrumentation.count('a')
+        Instrumentation.count('a', 2)
+        Instrumentation.add_time('b', 1.0)
+        Instrumentation.add_time('b', 0.5)
+        with Instrumentation.timer('c'):
+            pass
+
+        record = Instrumentation.write_iteration(0, n_points=3)
+        assert record['counters'] == {'a': 3}
+        assert record['timers']['b'] == 1.5
+        assert record['timers']['c'] >= 0
+        assert record['n_points'] == 3
+        assert record['memory']['max_rss'] > 0
+
+        Instrumentation.count('a')
+        Instrumentation.write_iteration(1)
+
+        records = Instrumentation.read_trace(self.trace_file)
+        assert len(records) == 2
+        assert records[0]['iteration'] == 0
+        assert records[0]['counters'] == {'a': 3}
+        assert records[0]['timers']['b'] == 1.5
+        assert records[1]['iteration'] == 1
+        assert records[1]['counters'] == {'a': 1}
+        assert records[1]['timers'] == {}
+
+        Instrumentation.disable()
+        assert not Instrumentation.is_enabled()
+        assert Instrumentation.read_trace(self.trace_file + '.none') == []
+
+    def test_counters_hot_paths(self):
+        Instrumentation.enable()
+
+        cholesky(np.identity(2))
+        Parallel.run_function_different_arguments_parallel(f, {0: 1, 1: 2, 2: 3})
+
+        record = Instrumentation.write_iteration(0)
+        assert record['counters'][CHOLESKY_COUNTER] == 1
+        assert record['counters'][POOLS_COUNTER] == 1
+        assert record['counters'][POOL_JOBS_COUNTER] == 3
+        assert not os.path.exists(self.trace_file)
@@ -2,9 +2,13 @@ from __future__ import absolute_import
 
 import unittest
 
+import multiprocessing as mp
+import os
+
 from mock import Mock
 
 from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.lib.constant import BLAS_THREADS_VARIABLES
 
 
 def f(x):
@@ -15,6 +19,47 @@ def g(x):
     return x[1]
 
 
+def blas_threads(x):
+    return os.environ['OPENBLAS_NUM_THREADS']
+
+
+def blas_threads_top_level(x):
+    return os.environ.get('OPENBLAS_NUM_THREADS')
+
+
+def set_blas_threads_worker():
+    # It runs in its own process, so the BLAS threads of the tests aren't changed.
+    for variable in BLAS_THREADS_VARIABLES:
+        os.environ.pop(variable, None)
+
+    # A top-level thread pool pins BLAS to the budget of its threads while they run, and then
+    # restores the previous setting.
+    Parallel.set_max_processes(2)
+    budget = Parallel.get_max_processes()
+    result = Parallel.run_function_different_arguments_parallel(
+        blas_threads_top_level, {0: 0, 1: 1}, True, None, True, 2)
+    Parallel.set_max_processes(None)
+    if budget > 1:
+        assert result == {0: '1', 1: '1'}
+    assert 'OPENBLAS_NUM_THREADS' not in os.environ
+
+    Parallel.set_blas_threads(1)
+    assert os.environ['OPENBLAS_NUM_THREADS'] == '1'
+
+    # A worker with a budget of 4 that starts 2 threads pins BLAS to 2 threads while they run.
+    Parallel._init_process_worker(4)
+    result = Parallel.run_function_different_arguments_parallel(
+        blas_threads, {0: 0, 1: 1}, True, None, True, 2)
+    assert result == {0: '2', 1: '2'}
+    assert os.environ['OPENBLAS_NUM_THREADS'] == '4'
+
+
+def nested(x):
+    results = Parallel.run_function_different_arguments_parallel(f, {0: x, 1: x + 1})
+    failed = Parallel.run_function_different_arguments_parallel(g, {0: x})
+    return Parallel.is_worker(), Parallel.get_budget(), results, failed
+
+
 class TestParallel(unittest.TestCase):
 
     def test_run_function_different_arguments_parallel(self):
@@ -33,3 +78,46 @@ class TestParallel(unittest.TestCase):
 
         assert -1 == Parallel.run_function_different_arguments_parallel(
             mock, arguments, all_success=False, signal=mock)
+
+    def test_set_max_processes(self):
+        Parallel.set_max_processes(1)
+        assert Parallel.get_max_processes() == 1
+
+        arguments = {0: 1, 1: 2, 2: 3, 3: 4}
+        result = Parallel.run_function_different_arguments_parallel(f, arguments)
+        assert result == {0: 1, 1: 2, 2: 3, 3: 4}
+
+        Parallel.set_max_processes(None)
+        assert Parallel.get_max_processes() == mp.cpu_count()
+
+    def test_run_function_different_arguments_threads(self):
+        arguments = {0: 1, 1: 2, 2: 3, 3: 4}
+
+        # Lambdas can't be pickled, so this only works with threads.
+        result = Parallel.run_function_different_arguments_parallel(
+            lambda x, y: x + y, arguments, True, None, True, 2, 1)
+        assert result == {0: 2, 1: 3, 2: 4, 3: 5}
+
+    def test_nested_parallelism(self):
+        assert not Parallel.is_worker()
+        assert Parallel.get_budget() == Parallel.get_max_processes()
+
+        Parallel.set_max_processes(1)
+        arguments = {0: 1, 1: 2}
+
+        # The nested calls run sequentially, and the failed jobs are skipped as in the pools.
+        result = Parallel.run_function_different_arguments_parallel(nested, arguments)
+        assert result == {0: (True, 1, {0: 1, 1: 2}, {}), 1: (True, 1, {0: 2, 1: 3}, {})}
+
+        result = Parallel.run_function_different_arguments_parallel(
+            nested, arguments, False, None, True, 2)
+        assert result == {0: (True, 1, {0: 1, 1: 2}, {}), 1: (True, 1, {0: 2, 1: 3}, {})}
+
+        Parallel.set_max_processes(None)
+        assert not Parallel.is_worker()
+
+    def test_set_blas_threads(self):
+        process = mp.Process(target=set_blas_threads_worker)
+        process.start()
+        process.join()
+        assert process.exitcode == 0
@@ -3,8 +3,20 @@ import unittest
 import numpy as np
 import numpy.testing as npt
 
-from stratified_bayesian_optimization.lib.sample_functions import SampleFunctions
+from stratified_bayesian_optimization.lib.sample_functions import (
+    SampleFunctions,
+    FourierFeaturesSample,
+)
 from stratified_bayesian_optimization.kernels.matern52 import Matern52
+from stratified_bayesian_optimization.kernels.scaled_kernel import ScaledKernel
+from stratified_bayesian_optimization.kernels.tasks_kernel import TasksKernel
+from stratified_bayesian_optimization.kernels.product_kernels import ProductKernels
+from stratified_bayesian_optimization.entities.parameter import ParameterEntity
+from stratified_bayesian_optimization.lib.constant import (
+    CHOLESKY_SAMPLING,
+    FOURIER_FEATURES_SAMPLING,
+    SIGMA2_NAME,
+)
 
 
 class TestSampleFunctions(unittest.TestCase):
@@ -29,3 +41,77 @@ class TestSampleFunctions(unittest.TestCase):
 
         npt.assert_almost_equal(mean, np.zeros(len(mean)), decimal=1)
         npt.assert_almost_equal(cov, cov_, decimal=1)
+
+    def test_sample_from_gp_cholesky(self):
+        SampleFunctions.clean_cache()
+
+        x = np.linspace(0, 10, 50)
+        x = x.reshape([50, 1])
+        kernel = Matern52.define_kernel_from_array(1, np.array([3.0]))
+        function = SampleFunctions.sample_from_gp(x, kernel, n_samples=100000, random_seed=1,
+                                                  method=CHOLESKY_SAMPLING)
+
+        assert function.shape == (100000, 50)
+        npt.assert_almost_equal(np.mean(function, axis=0), np.zeros(50), decimal=1)
+        npt.assert_almost_equal(np.cov(function.transpose()), kernel.cov(x), decimal=1)
+
+        assert len(SampleFunctions._cache_cholesky) == 1
+        chol = SampleFunctions.get_cholesky(x, kernel)
+        npt.assert_almost_equal(np.dot(chol, chol.transpose()), kernel.cov(x))
+        assert len(SampleFunctions._cache_cholesky) == 1
+
+        function_2 = SampleFunctions.sample_from_gp(x, kernel, n_samples=10, random_seed=1,
+                                                    method=CHOLESKY_SAMPLING)
+        npt.assert_almost_equal(function_2, function[0:10, :])
+
+        SampleFunctions.clean_cache()
+        assert len(SampleFunctions._cache_cholesky) == 0
+
+    def test_sample_from_gp_fourier_features(self):
+        x = np.linspace(0, 10, 20)
+        x = x.reshape([20, 1])
+        kernel = Matern52.define_kernel_from_array(1, np.array([3.0]))
+
+        np.random.seed(1)
+        function = SampleFunctions.sample_from_gp(x, kernel, n_samples=20000,
+                                                  method=FOURIER_FEATURES_SAMPLING,
+                                                  n_features=2000)
+
+        npt.assert_almost_equal(np.mean(function, axis=0), np.zeros(20), decimal=1)
+        npt.assert_almost_equal(np.cov(function.transpose()), kernel.cov(x), decimal=1)
+
+        sigma2 = ParameterEntity(SIGMA2_NAME, np.array([4.0]), None)
+        scaled_kernel = ScaledKernel(1, kernel, sigma2)
+
+        np.random.seed(1)
+        sample = FourierFeaturesSample(scaled_kernel, 1, n_features=2000, n_samples=20000)
+        function = sample(x)
+        npt.assert_almost_equal(np.cov(function.transpose()) / 4.0, kernel.cov(x), decimal=1)
+
+        # The sample path can be evaluated anywhere consistently
+        npt.assert_almost_equal(sample(x[5:10, :]), function[:, 5:10])
+
+        with self.assertRaises(ValueError):
+            FourierFeaturesSample(TasksKernel.define_kernel_from_array(2, np.array([0, 0, 0])), 1)
+
+    def test_sample_from_gp_kronecker(self):
+        SampleFunctions.clean_cache()
+
+        x = np.linspace(0, 10, 10).reshape([10, 1])
+        tasks = np.arange(2).reshape([2, 1])
+
+        kernel_x = Matern52.define_kernel_from_array(1, np.array([3.0]))
+        kernel_tasks = TasksKernel.define_kernel_from_array(2, np.array([0.0, 0.5, -0.5]))
+        kernel = ProductKernels(kernel_x, kernel_tasks)
+
+        function = SampleFunctions.sample_from_gp_kronecker(
+            [x, tasks], [kernel.kernels[name] for name in kernel.names], n_samples=100000,
+            random_seed=1)
+
+        points = np.array([np.concatenate((point, task)) for point in x for task in tasks])
+
+        assert function.shape == (100000, 20)
+        npt.assert_almost_equal(np.mean(function, axis=0), np.zeros(20), decimal=1)
+        npt.assert_almost_equal(np.cov(function.transpose()), kernel.cov(points), decimal=1)
+
+        SampleFunctions.clean_cache()
@@ -19,6 +19,8 @@ from stratified_bayesian_optimization.lib.util import (
     reduce_dimension_vector,
     separate_vector,
     combine_vectors,
+    add_warm_start_points,
+    combine_start_points,
 )
 from stratified_bayesian_optimization.models.gp_fitting_gaussian import GPFittingGaussian
 from stratified_bayesian_optimization.services.training_data import TrainingDataService
@@ -113,3 +115,29 @@ class TestUtil(unittest.TestCase):
         assert np.all(result[0] == a1)
         assert np.all(result[1] == a2)
         assert len(result) == 2
+
+    def test_add_warm_start_points(self):
+        points = add_warm_start_points([np.array([1.0, 2.0])],
+                                       [np.array([3.0, 4.0]), np.array([1.0, 2.0])], 5)
+        assert len(points) == 2
+        assert np.all(points[0] == np.array([3.0, 4.0]))
+        assert np.all(points[1] == np.array([1.0, 2.0]))
+
+        points = add_warm_start_points(points, [np.array([5.0, np.nan]), [[6.0, 7.0]]], 2)
+        assert len(points) == 2
+        assert np.all(points[0] == np.array([6.0, 7.0]))
+        assert np.all(points[1] == np.array([3.0, 4.0]))
+
+    def test_combine_start_points(self):
+        start_points = [np.array([0.0, 0.0]), np.array([1.0, 1.0]), np.array([2.0, 2.0])]
+        warm_start_points = [np.array([5.0, 5.0]), np.array([6.0]), np.array([7.0, 7.0]),
+                             np.array([8.0, 8.0])]
+
+        start = combine_start_points(warm_start_points, start_points)
+        assert np.all(start == np.array([[5.0, 5.0], [7.0, 7.0], [0.0, 0.0]]))
+
+        start = combine_start_points([], start_points)
+        assert np.all(start == np.array(start_points))
+
+        start = combine_start_points(warm_start_points, start_points[0: 1])
+        assert np.all(start == np.array([[5.0, 5.0]]))
@@ -8,6 +8,7 @@ from copy import deepcopy
 from stratified_bayesian_optimization.models.gp_fitting_gaussian import (
     GPFittingGaussian,
     ValidationGPModel,
+    GradientGPFittingGaussian,
 )
 from stratified_bayesian_optimization.lib.constant import (
     MATERN52_NAME,
@@ -20,6 +21,7 @@ from stratified_bayesian_optimization.lib.constant import (
 )
 from stratified_bayesian_optimization.lib.finite_differences import FiniteDifferences
 from stratified_bayesian_optimization.lib.sample_functions import SampleFunctions
+from stratified_bayesian_optimization.lib.la_functions import cho_solve
 from stratified_bayesian_optimization.kernels.matern52 import Matern52
 from stratified_bayesian_optimization.kernels.scaled_kernel import ScaledKernel
 
@@ -138,6 +140,22 @@ class TestGPFittingGaussian(unittest.TestCase):
 
         assert self.gp_noisy.training_data == self.training_data_noisy
 
+    def test_add_points_evaluations_cache(self):
+        var_noise = self.gp.var_noise.value[0]
+        parameters_kernel = self.gp.kernel.hypers_values_as_array
+
+        chol = self.gp._chol_cov_including_noise(var_noise, parameters_kernel)[0]
+        key = self.gp.cache_keys.get_key(var_noise, parameters_kernel)
+        assert key in self.gp.cache_chol_cov
+
+        self.gp.add_points_evaluations(self.new_point, self.evaluation)
+        new_key = self.gp.cache_keys.get_key(var_noise, parameters_kernel)
+        assert new_key != key
+        assert new_key not in self.gp.cache_chol_cov
+
+        new_chol = self.gp._chol_cov_including_noise(var_noise, parameters_kernel)[0]
+        assert new_chol.shape == (chol.shape[0] + 1, chol.shape[1] + 1)
+
     def test_convert_from_list_to_numpy(self):
         data = GPFittingGaussian.convert_from_list_to_numpy(self.training_data_noisy)
         assert np.all(data['points'] == np.array([[42.2851784656]]))
@@ -331,6 +349,33 @@ class TestGPFittingGaussian(unittest.TestCase):
         assert grad_2[1] == grad['mean']
         assert np.all(grad_2[2:] == grad['kernel_params'])
 
+    def test_log_likelihood_and_gradient(self):
+        params = np.array([5.0, 1.0, -5.5, 10.0])
+        output = self.complex_gp_2.log_likelihood_and_gradient(1.82, 123.1, params)
+
+        llh = self.complex_gp_2.log_likelihood(1.82, 123.1, params)
+        npt.assert_almost_equal(output['log_likelihood'], llh)
+
+        chol, cov = self.complex_gp_2._chol_cov_including_noise(1.82, params)
+        y_unbiased = self.complex_gp_2.data['evaluations'] - 123.1
+        solve = cho_solve(chol, y_unbiased)
+        grad_cov = self.complex_gp_2.evaluate_grad_cov(params, self.complex_gp_2.data['points'])
+        n = chol.shape[0]
+
+        for i in xrange(len(params)):
+            npt.assert_almost_equal(
+                output['kernel_params'][i],
+                GradientGPFittingGaussian.compute_gradient_llh_given_grad_cov(
+                    grad_cov[i], chol, solve))
+        npt.assert_almost_equal(
+            output['var_noise'],
+            GradientGPFittingGaussian.compute_gradient_llh_given_grad_cov(
+                np.identity(n), chol, solve))
+        npt.assert_almost_equal(
+            output['mean'], GradientGPFittingGaussian.compute_gradient_mean(chol, y_unbiased, n))
+
+        assert len(self.complex_gp_2.cache_inv_cov) == 1
+
     def test_mle_parameters(self):
         # Results compared with the ones given by GPy
 
@@ -767,3 +812,63 @@ class TestGPFittingGaussian(unittest.TestCase):
 
         npt.assert_almost_equal(grad['cov'], finite_diff[0])
 
+
+    def test_compute_posterior_parameters_and_gradient(self):
+        points = np.array([[49.5], [10.2], [80.0]])
+        fused = self.gp_gaussian.compute_posterior_parameters_and_gradient(points)
+
+        for i in xrange(points.shape[0]):
+            point = points[i:i + 1, :]
+            posterior = self.gp_gaussian.compute_posterior_parameters(point)
+            grad = self.gp_gaussian.gradient_posterior_parameters(point)
+
+            npt.assert_almost_equal(fused['mean'][i], posterior['mean'][0])
+            npt.assert_almost_equal(fused['var'][i], posterior['cov'][0, 0])
+            npt.assert_almost_equal(fused['grad_mean'][i, :], grad['mean'])
+            npt.assert_almost_equal(fused['grad_var'][i, :], grad['cov'][0, :])
+
+    def test_refit_gp_regression_warm_start(self):
+        gp = GPFittingGaussian([MATERN52_NAME], self.training_data_gp, [1],
+                               bounds_domain=[[0, 500]], warm_start=True)
+        gp.fit_gp_regression(random_seed=1)
+        parameters = gp.get_value_parameters_model
+
+        assert gp.llh_change('mle') == 0.0
+
+        gp.add_points_evaluations(np.array([[250.0]]), np.array([0.0]))
+        assert gp.llh_change('mle') > 0.0
+
+        llh = gp.log_likelihood(parameters[0], parameters[1], parameters[2:])
+
+        reference = gp.llh_reference['mle']
+        gp.refit_threshold = np.inf
+        gp.refit_gp_regression(random_seed=1)
+        npt.assert_almost_equal(gp.get_value_parameters_model, parameters)
+        assert gp.llh_reference['mle'] is reference
+
+        gp.refit_threshold = 0.0
+        gp.refit_gp_regression(random_seed=1)
+        new_parameters = gp.get_value_parameters_model
+        assert gp.log_likelihood(new_parameters[0], new_parameters[1], new_parameters[2:]) >= llh
+        npt.assert_almost_equal(gp.llh_reference['mle'][0], new_parameters)
+
+        gp.n_burning = 20
+        gp.start_new_chain(random_seed=1)
+        assert 'chain' in gp.llh_reference
+
+        n_samples = []
+        sample_parameters = gp.sample_parameters
+
+        def sample(n, *args, **kwargs):
+            n_samples.append(n)
+            return sample_parameters(n, *args, **kwargs)
+
+        gp.sample_parameters = sample
+
+        gp.start_new_chain(random_seed=1)
+        assert n_samples == [2]
+
+        gp.refit_threshold = 0.0
+        gp.add_points_evaluations(np.array([[260.0]]), np.array([0.0]))
+        gp.start_new_chain(random_seed=1)
+        assert n_samples == [2, 20]
@@ -6,6 +6,8 @@ import numpy.testing as npt
 from mock import patch, mock_open
 
 from copy import deepcopy
+import pickle
+import threading
 
 from stratified_bayesian_optimization.models.gp_fitting_gaussian import (
     GPFittingGaussian,
@@ -115,6 +117,25 @@ class TestBayesianQuadrature(unittest.TestCase):
         assert gp._get_cached_data('a', POSTERIOR_MEAN) == 2
         assert gp._get_cached_data('b', B_NEW) == 3
 
+    def test_get_cached_data_thread(self):
+        gp = BayesianQuadrature(self.complex_gp, [0], UNIFORM_FINITE, {})
+        gp._updated_cached_data('a', 1, QUADRATURES, thread=True)
+        gp._updated_cached_data('b', 2, B_NEW, thread=True, clear_cache=False)
+
+        assert gp._get_cached_data('a', QUADRATURES, thread=True) == 1
+        assert gp._get_cached_data('b', B_NEW, thread=True) == 2
+        assert gp._get_cached_data('a', QUADRATURES) is None
+
+        values = []
+        thread = threading.Thread(
+            target=lambda: values.append(gp._get_cached_data('a', QUADRATURES, thread=True)))
+        thread.start()
+        thread.join()
+        assert values == [None]
+
+        gp_2 = pickle.loads(pickle.dumps(gp))
+        assert gp_2._get_cached_data('a', QUADRATURES, thread=True) is None
+
     def test_evaluate_quadrature_cross_cov(self):
         point = np.array([[1.0]])
         points_2 = np.array([[42.2851784656, 0], [42.3851784656, 0]])
@@ -149,6 +170,45 @@ class TestBayesianQuadrature(unittest.TestCase):
 
         assert value[1] == np.mean([value_1, value_2])
 
+    def test_get_quadratures_discretization(self):
+        gp = BayesianQuadrature(deepcopy(self.complex_gp), [0], UNIFORM_FINITE, {TASKS: 1})
+        points = np.array([[1.0], [40.0], [42.0]])
+        parameters_kernel = gp.gp.kernel.hypers_values_as_array
+
+        value = gp.get_quadratures_discretization(points, parameters_kernel, parallel=False)
+        expected = gp.compute_vectors_b(points, None, gp.gp.data['points'], parameters_kernel,
+                                        True, False, False)['vec_covs']
+        npt.assert_almost_equal(value, expected)
+
+        gp.gp.add_points_evaluations(np.array([[45.0, 0]]), np.array([1.2]))
+
+        with patch.object(BayesianQuadrature, 'compute_vectors_b',
+                          wraps=gp.compute_vectors_b) as mock_compute:
+            value = gp.get_quadratures_discretization(points, parameters_kernel,
+                                                      parallel=False)
+            assert mock_compute.call_args[0][2].shape == (1, 2)
+
+        expected = gp.compute_vectors_b(points, None, gp.gp.data['points'], parameters_kernel,
+                                        True, False, False)['vec_covs']
+        assert value.shape == (3, 3)
+        npt.assert_almost_equal(value, expected)
+
+        # Only the rows of the points added to the discretization are computed
+        points_2 = np.concatenate((points, np.array([[70.0]])), axis=0)
+        with patch.object(BayesianQuadrature, 'compute_vectors_b',
+                          wraps=gp.compute_vectors_b) as mock_compute:
+            value = gp.get_quadratures_discretization(points_2, parameters_kernel,
+                                                      parallel=False)
+            assert mock_compute.call_count == 1
+            npt.assert_almost_equal(mock_compute.call_args[0][0], np.array([[70.0]]))
+
+        expected = gp.compute_vectors_b(points_2, None, gp.gp.data['points'], parameters_kernel,
+                                        True, False, False)['vec_covs']
+        npt.assert_almost_equal(value, expected)
+
+        gp.clean_cache()
+        assert len(gp.quadratures_store) == 1
+
     def test_compute_posterior_parameters_kg(self):
         points = np.array([[42.0], [42.1], [41.0]])
         candidate_point = np.array([[41.0, 0]])
@@ -232,7 +292,7 @@ class TestBayesianQuadrature(unittest.TestCase):
         parameters_kernel = gp.gp.kernel.hypers_values_as_array
         mean = gp.gp.mean.value[0]
 
-        index_cache = (var_noise, mean, tuple(parameters_kernel))
+        index_cache = gp.gp.cache_keys.get_id(var_noise, mean, parameters_kernel)
         if index_cache not in gp.optimal_solutions:
             gp.optimal_solutions[index_cache] = []
         gp.optimal_solutions[index_cache].append({'solution': start})
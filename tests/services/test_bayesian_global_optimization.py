@@ -1,13 +1,15 @@
 import unittest
 
 from mock import create_autospec
-from doubles import expect
+from doubles import expect, allow
 
 import numpy.testing as npt
 
 from copy import deepcopy
 
 import numpy as np
+import os
+import shutil
 
 from stratified_bayesian_optimization.services.bayesian_global_optimization import BGO
 from stratified_bayesian_optimization.services.domain import DomainService
@@ -21,7 +23,13 @@ from stratified_bayesian_optimization.lib.constant import (
     TASKS_KERNEL_NAME,
     UNIFORM_FINITE,
     TASKS,
+    TRACES_DIR,
+    GP_DIR,
+    DEBUGGING_DIR,
+    CHOLESKY_COUNTER,
+    KERNEL_EVALUATIONS_COUNTER,
 )
+from stratified_bayesian_optimization.lib.instrumentation import Instrumentation
 from stratified_bayesian_optimization.kernels.matern52 import Matern52
 from stratified_bayesian_optimization.lib.sample_functions import SampleFunctions
 from stratified_bayesian_optimization.models.gp_fitting_gaussian import GPFittingGaussian
@@ -163,6 +171,9 @@ class TestBGOService(unittest.TestCase):
 
         #self.bgo = BGO(self.acquisition_function, self.gp_model)
 
+    def tearDown(self):
+        shutil.rmtree(os.path.join(DEBUGGING_DIR, 'test_simulated_gp'), True)
+
     def test_from_spec(self):
        # bgo = BGO.from_spec(self.spec)
         assert True
@@ -178,6 +189,93 @@ class TestBGOService(unittest.TestCase):
         # assert BGO.run_spec(self.spec) == {}
         assert 1 == 1
 
+    def test_prepare_run(self):
+        spec = RunSpecEntity(deepcopy(self.spec_2.to_primitive()))
+        spec.use_only_training_points = True
+        spec.use_prepared_run = True
+        spec.profile_startup = True
+
+        filename = BGO.get_prepared_run_path(spec)
+        if os.path.exists(filename):
+            os.remove(filename)
+
+        bgo = BGO.prepare_run(spec)
+        assert os.path.exists(filename)
+        assert bgo.startup_profile.keys() == \
+            ['gp_model', 'domain', 'acquisition_function', 'bgo', 'history']
+        state = np.random.get_state()
+
+        np.random.seed(1)
+        expect(BGO).from_spec.never()
+        bgo_2 = BGO.prepare_run(spec)
+
+        # The prepared run isn't used if a file read by from_spec was regenerated
+        input_files = BGO.get_input_files(spec)
+        assert len(input_files) == 3
+        filename_gp = [name for name in input_files if name.startswith(GP_DIR)][0]
+        input_files[filename_gp] = [0.0, 1]
+        allow(BGO).get_input_files.and_return(input_files)
+        assert BGO.load_prepared_run(spec) is None
+        os.remove(filename)
+
+        assert bgo_2.startup_profile.keys() == ['prepared_run']
+        npt.assert_almost_equal(bgo_2.gp_model.get_value_parameters_model,
+                                bgo.gp_model.get_value_parameters_model)
+        npt.assert_almost_equal(bgo_2.gp_model.data['points'], bgo.gp_model.data['points'])
+        npt.assert_almost_equal(np.array(bgo_2.acquisition_function.discretization),
+                                np.array(bgo.acquisition_function.discretization))
+        assert bgo_2.objective.file_path == bgo.objective.file_path
+        assert bgo_2.objective.module is not None
+        npt.assert_equal(np.random.get_state()[1], state[1])
+
+        spec.use_only_training_points = False
+        assert BGO.load_prepared_run(spec) is None
+
+    def test_optimize_trace(self):
+        spec = RunSpecEntity(deepcopy(self.spec_2.to_primitive()))
+        spec.use_only_training_points = True
+
+        bgo = BGO.from_spec(spec)
+        trace_file = bgo.get_trace_path()
+        assert trace_file.startswith(TRACES_DIR)
+
+        if os.path.exists(trace_file):
+            os.remove(trace_file)
+
+        bgo.optimize(random_seed=1, n_restarts=1, trace_file=trace_file)
+        assert not Instrumentation.is_enabled()
+
+        records = Instrumentation.read_trace(trace_file)
+        os.remove(trace_file)
+
+        assert [record['iteration'] for record in records] == \
+            ['startup', 'initial'] + range(bgo.n_iterations)
+        assert sorted(records[0]['timers'].keys()) == sorted(bgo.startup_profile.keys())
+        assert 'optimize_posterior_mean' in records[1]['timers']
+
+        for record in records[2:]:
+            for name in ['optimize_acquisition_function', 'evaluate_objective',
+                         'add_points_evaluations', 'write_gp_model', 'iteration']:
+                assert name in record['timers']
+            assert record['counters'][KERNEL_EVALUATIONS_COUNTER] > 0
+            assert record['counters'][CHOLESKY_COUNTER] > 0
+            assert record['memory']['max_rss'] > 0
+
+    def test_optimize_trace_error(self):
+        spec = RunSpecEntity(deepcopy(self.spec_2.to_primitive()))
+        spec.use_only_training_points = True
+
+        bgo = BGO.from_spec(spec)
+        trace_file = bgo.get_trace_path()
+
+        expect(bgo.acquisition_function).optimize.and_raise(ValueError)
+        with self.assertRaises(ValueError):
+            bgo.optimize(random_seed=1, n_restarts=1, trace_file=trace_file)
+        assert not Instrumentation.is_enabled()
+
+        if os.path.exists(trace_file):
+            os.remove(trace_file)
+
     def test_optimize(self):
        # expect(JSONFile).read.and_return(None)
         #bgo = BGO.from_spec(self.spec)
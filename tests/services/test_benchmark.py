@@ -0,0 +1,62 @@
+import unittest
+
+import os
+import tempfile
+
+import numpy.testing as npt
+
+from stratified_bayesian_optimization.services.benchmark import BenchmarkService
+
+
+class TestBenchmarkService(unittest.TestCase):
+
+    def test_run(self):
+        results = BenchmarkService.run(sizes=[(10, 1, 2)], n_repeats=1)
+
+        assert results.keys() == [BenchmarkService.get_key(name, 10, 1, 2) for name in
+                                  BenchmarkService._benchmarks]
+
+        for result in results.itervalues():
+            assert result['time'] >= 0
+            assert result['memory'] is None or result['memory'] >= 0
+            assert result['n'] == 10
+
+    def test_get_function(self):
+        with self.assertRaises(ValueError):
+            BenchmarkService.get_function('a', 10, 1, 2)
+
+    def test_baseline(self):
+        results = BenchmarkService.run(names=['matern52_cov'], sizes=[(10, 1, 2)], n_repeats=1)
+
+        fd, filename = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        BenchmarkService.write_baseline(results, filename)
+        baseline = BenchmarkService.read_baseline(filename)
+        os.remove(filename)
+
+        assert baseline.keys() == results.keys()
+        key = results.keys()[0]
+        npt.assert_almost_equal(baseline[key]['time'], results[key]['time'])
+        assert BenchmarkService.compare(results, baseline) == {}
+
+    def test_compare(self):
+        baseline = {
+            'a': {'time': 1.0, 'memory': 10.0},
+            'b': {'time': 1.0, 'memory': 10.0},
+            'c': {'time': 0.0001, 'memory': 0.1},
+            'e': {'time': 1.0, 'memory': None},
+        }
+        results = {
+            'a': {'time': 1.2, 'memory': 40.0},
+            'b': {'time': 2.0, 'memory': 10.0},
+            'c': {'time': 0.0005, 'memory': 0.5},
+            'd': {'time': 1.0, 'memory': 10.0},
+            'e': {'time': 1.0, 'memory': 10.0},
+        }
+
+        regressions = BenchmarkService.compare(results, baseline, tolerance=0.5,
+                                               memory_tolerance=0.5)
+        assert regressions == {
+            'a': {'memory': {'value': 40.0, 'baseline': 10.0, 'ratio': 4.0}},
+            'b': {'time': {'value': 2.0, 'baseline': 1.0, 'ratio': 2.0}},
+        }
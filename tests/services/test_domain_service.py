@@ -4,11 +4,13 @@ from doubles import allow, expect
 import unittest
 
 import numpy as np
+import numpy.testing as npt
 import os
 from mock import patch, MagicMock
 
 from stratified_bayesian_optimization.services.domain import DomainService
 from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.lib.discretization_grid import DiscretizationGrid
 from stratified_bayesian_optimization.entities.domain import(
     BoundsEntity,
     DomainEntity,
@@ -78,3 +80,19 @@ class TestDomainService(unittest.TestCase):
         b = list(np.random.uniform(2, 3, 2))
 
         assert sample_2 == [[a[0], b[0]], [a[1], b[1]]]
+
+    def test_load_discretization_as_grid(self):
+        expect(JSONFile).read.never()
+        expect(JSONFile).write.never()
+
+        grid = DomainService.load_discretization('test_problem', [self.bounds_domain_x], [5],
+                                                 as_grid=True)
+        assert isinstance(grid, DiscretizationGrid)
+        npt.assert_almost_equal(
+            np.array(grid), np.array(DomainEntity.discretize_domain([self.bounds_domain_x], [5])))
+
+        self.spec['number_points_each_dimension'] = [5]
+        self.spec['problem_name'] = 'test_problem'
+        domain = DomainService.from_dict(self.spec)
+        assert isinstance(domain.discretization_domain_x, DiscretizationGrid)
+        domain.validate()
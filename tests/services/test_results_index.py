@@ -0,0 +1,137 @@
+import unittest
+
+import os
+from os import path
+import shutil
+
+import numpy as np
+import numpy.testing as npt
+
+from stratified_bayesian_optimization.services.results_index import ResultsIndex
+from stratified_bayesian_optimization.services.spec import SpecService
+from stratified_bayesian_optimization.util.json_file import JSONFile
+from stratified_bayesian_optimization.lib.constant import (
+    PROBLEM_DIR,
+    PARTIAL_RESULTS,
+    AGGREGATED_RESULTS,
+)
+
+
+class TestResultsIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.problem_name = 'test_problem_results_index'
+        self.dir = path.join(PROBLEM_DIR, self.problem_name)
+        os.makedirs(path.join(self.dir, PARTIAL_RESULTS))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_append_and_read_index(self):
+        ResultsIndex.append(self.problem_name, 'results_a.json', 0, 1.0)
+        ResultsIndex.append(self.problem_name, 'results_a.json', 1, 2.0)
+        ResultsIndex.append(self.problem_name, 'results_b.json', 0, 3.0)
+        ResultsIndex.append(self.problem_name, 'results_a.json', 2, 4.0)
+
+        assert ResultsIndex.read_index(self.problem_name) == \
+            {'results_a.json': [1.0, 2.0, 4.0], 'results_b.json': [3.0]}
+
+        # The run a is restarted
+        ResultsIndex.append(self.problem_name, 'results_a.json', 0, 5.0)
+        assert ResultsIndex.read_index(self.problem_name) == \
+            {'results_a.json': [5.0], 'results_b.json': [3.0]}
+
+    def test_load(self):
+        ResultsIndex.append(self.problem_name, 'results_a.json', 0, 1.0)
+        JSONFile.write({'objective_values': [2.0, 3.0]},
+                       path.join(self.dir, PARTIAL_RESULTS, 'results_c.json'))
+
+        results = ResultsIndex.load(self.problem_name)
+        npt.assert_almost_equal(results['results_a.json'], [1.0])
+        npt.assert_almost_equal(results['results_c.json'], [2.0, 3.0])
+
+        # The results file is added to the index
+        assert ResultsIndex.read_index(self.problem_name)['results_c.json'] == [2.0, 3.0]
+
+        assert ResultsIndex.load('test_problem_results_index_2') == {}
+
+    def test_load_log(self):
+        # The run crashed before its results file was exported again
+        JSONFile.write({'objective_values': [2.0]},
+                       path.join(self.dir, PARTIAL_RESULTS, 'results_e.json'))
+        with open(path.join(self.dir, PARTIAL_RESULTS, 'results_e.jsonl'), 'w') as f:
+            f.write('{"point": [1.0], "objective_value": 2.0}\n')
+            f.write('{"point": [2.0], "objective_value": 3.0}\n')
+            f.write('{"point": [3.0], "objective_v')
+
+        results = ResultsIndex.load(self.problem_name)
+        assert results.keys() == ['results_e.json']
+        npt.assert_almost_equal(results['results_e.json'], [2.0, 3.0])
+
+    def test_load_index_with_gap(self):
+        # The run was at iteration 2 when the index started being written
+        ResultsIndex.append(self.problem_name, 'results_d.json', 2, 4.0)
+        assert ResultsIndex.read_index(self.problem_name) == {}
+
+        JSONFile.write({'objective_values': [2.0, 3.0, 4.0]},
+                       path.join(self.dir, PARTIAL_RESULTS, 'results_d.json'))
+        results = ResultsIndex.load(self.problem_name)
+        npt.assert_almost_equal(results['results_d.json'], [2.0, 3.0, 4.0])
+
+        ResultsIndex.append(self.problem_name, 'results_d.json', 3, 5.0)
+        assert ResultsIndex.read_index(self.problem_name)['results_d.json'] == \
+            [2.0, 3.0, 4.0, 5.0]
+
+    def test_collect_multi_spec_results(self):
+        random_seeds = [1, 2, 3, 1, 2]
+        methods = ['sbo', 'sbo', 'sbo', 'ei', 'ei']
+        values = {
+            (1, 'sbo'): [-1.0, -2.0, -3.0],
+            (2, 'sbo'): [-2.0, -4.0],
+            (3, 'sbo'): [-3.0, -3.0, -3.0, -3.0],
+            (1, 'ei'): [-1.0],
+            (2, 'ei'): [-1.0, -5.0],
+        }
+
+        for random_seed, method in zip(random_seeds, methods):
+            file_name = SpecService._filename_results(
+                problem_name=self.problem_name, training_name='test', n_points=5,
+                random_seed=random_seed, method=method, n_samples_parameters=0)
+            for iteration, value in enumerate(values[(random_seed, method)]):
+                ResultsIndex.append(self.problem_name, file_name, iteration, value)
+
+        multiple_spec = {
+            'random_seeds': random_seeds,
+            'problem_names': [self.problem_name] * 5,
+            'training_names': ['test'] * 5,
+            'n_trainings': [5] * 5,
+            'method_optimizations': methods,
+            'n_samples_parameterss': [0] * 5,
+            'n_iterationss': [2] * 5,
+        }
+
+        SpecService.collect_multi_spec_results(multiple_spec)
+
+        file_path = path.join(self.dir, AGGREGATED_RESULTS, SpecService._aggregated_results(
+            problem_name=self.problem_name, training_name='test', n_points=5, method='sbo'))
+        results = JSONFile.read(file_path)
+
+        assert sorted(results.keys()) == ['0', '1', '2']
+        npt.assert_almost_equal(results['0']['mean'], 2.0)
+        npt.assert_almost_equal(results['0']['std'], np.std([1.0, 2.0, 3.0]))
+        assert results['1']['n_samples'] == 3
+        npt.assert_almost_equal(results['1']['mean'], 3.0)
+        assert results['2']['n_samples'] == 2
+        npt.assert_almost_equal(results['2']['mean'], 3.0)
+
+        SpecService.collect_multi_spec_results(multiple_spec, same_random_seeds=True)
+        results = JSONFile.read(file_path)
+        npt.assert_almost_equal(results['0']['mean'], 1.5)
+        npt.assert_almost_equal(results['1']['mean'], 3.0)
+
+        file_path = path.join(self.dir, AGGREGATED_RESULTS, SpecService._aggregated_results(
+            problem_name=self.problem_name, training_name='test', n_points=5, method='ei'))
+        results = JSONFile.read(file_path)
+        assert results['0']['n_samples'] == 2
+        assert results['1']['n_samples'] == 1
+        npt.assert_almost_equal(results['1']['mean'], 5.0)
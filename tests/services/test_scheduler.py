@@ -0,0 +1,74 @@
+import unittest
+
+from mock import patch, MagicMock
+
+import os
+from os import path
+import shutil
+import tempfile
+
+from stratified_bayesian_optimization.lib.parallel import Parallel
+from stratified_bayesian_optimization.services.spec import SpecService
+from stratified_bayesian_optimization.services.bayesian_global_optimization import BGO
+from stratified_bayesian_optimization.services.scheduler import (
+    SchedulerService,
+    DONE,
+    FAILED,
+    RUNNING,
+    PREEMPTED,
+)
+from stratified_bayesian_optimization.util.json_file import JSONFile
+
+
+def run_spec(spec):
+    if spec == 1:
+        raise Exception('failed spec')
+    assert Parallel.get_max_processes() == 1
+    return {'optimal_value': float(spec)}
+
+
+class TestSchedulerService(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.status_file = path.join(self.dir, 'status.json')
+        self.output_file = path.join(self.dir, 'output.json')
+        self.multiple_spec = MagicMock()
+        self.multiple_spec.problem_names = ['test_problem'] * 4
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_get_budget(self):
+        with patch('multiprocessing.cpu_count', new=MagicMock(return_value=8)):
+            assert SchedulerService.get_budget() == (8, 1)
+            assert SchedulerService.get_budget(n_specs_parallel=2) == (2, 4)
+            assert SchedulerService.get_budget(n_processes_spec=3) == (2, 3)
+            assert SchedulerService.get_budget(16, 16) == (16, 16)
+
+    def test_run_multiple_spec(self):
+        JSONFile.write({'0': DONE, '2': RUNNING}, self.status_file)
+
+        assert SchedulerService.read_status(self.status_file, range(4)) == \
+            {0: DONE, 1: None, 2: PREEMPTED, 3: None}
+
+        with patch.object(SpecService, 'generate_specs',
+                          new=MagicMock(side_effect=lambda n_spec, spec: n_spec)), \
+                patch.object(BGO, 'run_spec', new=MagicMock(side_effect=run_spec)):
+            status = SchedulerService.run_multiple_spec(
+                self.multiple_spec, self.status_file, n_specs_parallel=2, n_processes_spec=1,
+                poll_interval=0.01, output_file=self.output_file)
+
+            assert status == {0: DONE, 1: FAILED, 2: DONE, 3: DONE}
+            assert JSONFile.read(path.join(self.dir, 'spec_3_output.json')) == \
+                {'optimal_value': 3.0}
+            assert not path.exists(path.join(self.dir, 'spec_0_output.json'))
+            assert JSONFile.read(self.status_file) == \
+                {'0': DONE, '1': FAILED, '2': DONE, '3': DONE}
+
+            status = SchedulerService.run_multiple_spec(
+                self.multiple_spec, self.status_file, n_specs_parallel=2, n_processes_spec=1,
+                rerun_failed=False, poll_interval=0.01)
+            assert status == {0: DONE, 1: FAILED, 2: DONE, 3: DONE}
+
+        assert Parallel.get_max_processes() > 0
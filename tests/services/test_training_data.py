@@ -147,3 +147,53 @@ class TestTrainingDataService(unittest.TestCase):
         assert training_data['var_noise'] == []
         assert np.all(training_data['evaluations'] == [i[0] for i in points])
         assert np.all(training_data['points'] == points)
+
+    def test_get_training_data_streaming(self):
+        points = \
+            [[42.2851784656], [72.3121248508], [1.0113231069], [30.9309246906], [15.5288331909]]
+        problem_name = 'test_problem'
+        training_name = 'test_streaming'
+        bounds_domain = [[1, 100]]
+
+        log_path = os.path.join('problems', problem_name, 'data', TrainingDataService._filename_log(
+            problem_name=problem_name, training_name=training_name, n_points=5, random_seed=0))
+
+        with open(log_path, 'w') as f:
+            f.write('{"index": 0, "point": [42.2851784656], "evaluation": [-1.0]}\n')
+            f.write('{"index": 1, "point": [0.0], "evaluation": [-1.0]}\n')
+            f.write('{"index": 2, "point": [1.01')
+
+        training_data = \
+            TrainingDataService.get_training_data(problem_name, training_name, bounds_domain,
+                                                  points=points, cache=False, streaming=True)
+
+        assert training_data['var_noise'] == []
+        assert training_data['evaluations'] == [-1.0] + [i[0] for i in points[1:]]
+        assert training_data['points'] == points
+        assert not os.path.exists(log_path)
+
+        training_data = \
+            TrainingDataService.get_training_data(problem_name, training_name, bounds_domain,
+                                                  points=points, cache=False, streaming=True,
+                                                  parallel=False)
+        npt.assert_almost_equal(training_data['evaluations'], [i[0] for i in points])
+
+    def test_evaluate_points_streaming_truncated_line(self):
+        points = [[42.2851784656], [72.3121248508], [1.0113231069]]
+        log_path = os.path.join('problems', 'test_problem', 'data', 'test_truncated_log.json')
+
+        with open(log_path, 'w') as f:
+            f.write('{"index": 0, "point": [42.2851784656], "evaluation": [-1.0]}\n')
+            f.write('{"index": 1, "point": [72.31')
+
+        name_module = TrainingDataService.get_name_module('test_problem')
+        training_data = TrainingDataService.evaluate_points_streaming(
+            points, log_path, name_module=name_module, parallel=False)
+
+        records = TrainingDataService.read_evaluations_log(log_path, points)
+        os.remove(log_path)
+
+        assert sorted(records.keys()) == [0, 1, 2]
+        npt.assert_almost_equal(records[1]['evaluation'][0], points[1][0])
+        npt.assert_almost_equal(records[2]['evaluation'][0], points[2][0])
+        assert training_data['evaluations'][0] == -1.0